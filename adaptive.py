@@ -0,0 +1,159 @@
+# --- Python 3.8 ---
+"""
+@File : adaptive.py
+@Time : 2021/05/02
+@Author : Peter Atma
+@Desc : Quadtree sampling of two-parameter trade maps, refined where the contours need it
+"""
+
+# --- Standard Python modules ---
+import inspect
+
+# --- External Python modules ---
+import numpy as np
+
+# --- Extension modules ---
+import equations
+
+
+def sample_quadtree(func, x_range, y_range, levels=None, tol=1e-3, base=8, max_depth=6):
+    """
+    Contour data of ``func(x, y)`` (vectorized, returning an array or a
+    dict of named arrays) on a uniform grid of ``base * 2**max_depth``
+    cells per side, without evaluating most of it.
+
+    Starting from ``base`` x ``base`` cells, a cell is split in four when
+    its center value differs from the bilinear interpolation of its corners
+    by more than ``tol`` times the field's range, or, where one of the
+    contour ``levels`` (name -> values, e.g. [0] for a constraint boundary)
+    crosses the cell, by more than ``tol`` times the cell's own range of
+    values. Each round evaluates the new points of all cells at once.
+    Unrefined cells are filled by bilinear interpolation, so flat regions
+    cost a handful of evaluations while steep ones and curved contours get
+    the fine resolution.
+
+    Returns X and Y as from np.meshgrid, the fields on that grid (a dict,
+    "value" for a plain array) and the number of points evaluated.
+    """
+    levels = {name: np.sort(np.atleast_1d(vals)) for name, vals in (levels or {}).items()}
+    n = base * 2 ** max_depth
+    xs = np.linspace(x_range[0], x_range[1], n + 1)
+    ys = np.linspace(y_range[0], y_range[1], n + 1)
+    known = np.zeros((n + 1, n + 1), dtype=bool)  # indexed [j, i], rows along y as in np.meshgrid
+    fields = {}
+
+    def evaluate(i, j):
+        flat = np.unique(j * (n + 1) + i)
+        flat = flat[~known.flat[flat]]
+        if flat.size == 0:
+            return
+        jj, ii = np.divmod(flat, n + 1)
+        values = func(xs[ii], ys[jj])
+        if not isinstance(values, dict):
+            values = {"value": values}
+        for name, val in values.items():
+            if name not in fields:
+                fields[name] = np.full((n + 1, n + 1), np.nan)
+            fields[name][jj, ii] = val
+        known[jj, ii] = True
+
+    s = 2 ** max_depth
+    j0, i0 = (idx.ravel() * s for idx in np.meshgrid(np.arange(base), np.arange(base), indexing="ij"))
+    evaluate(np.r_[i0, i0 + s, i0, i0 + s], np.r_[j0, j0, j0 + s, j0 + s])
+    with np.errstate(invalid="ignore"):
+        scale = {name: np.nanmax(Z[known]) - np.nanmin(Z[known]) or 1.0 for name, Z in fields.items()}
+
+    leaves = []
+    while i0.size:
+        evaluate(np.r_[i0, i0 + s, i0, i0 + s], np.r_[j0, j0, j0 + s, j0 + s])
+        if s == 1:
+            leaves.append((i0, j0, s))
+            break
+
+        h = s // 2
+        evaluate(i0 + h, j0 + h)
+        refine = np.zeros(i0.size, dtype=bool)
+        for name, Z in fields.items():
+            interp = (Z[j0, i0] + Z[j0, i0 + s] + Z[j0 + s, i0] + Z[j0 + s, i0 + s]) / 4
+            center = Z[j0 + h, i0 + h]
+            with np.errstate(invalid="ignore"):
+                refine |= ~(np.abs(center - interp) <= tol * scale[name])
+            if name in levels:
+                # a level crossing the cell is placed by the fill to within the cell's size times the
+                # relative error of the interpolated center, so it sets the tolerance there
+                vals = np.stack([Z[j0, i0], Z[j0, i0 + s], Z[j0 + s, i0], Z[j0 + s, i0 + s], center])
+                band = np.searchsorted(levels[name], vals)
+                crossed = band.min(axis=0) != band.max(axis=0)
+                with np.errstate(invalid="ignore"):
+                    refine |= crossed & ~(np.abs(center - interp) <= tol * np.ptp(vals, axis=0))
+
+        leaves.append((i0[~refine], j0[~refine], s))
+        i0, j0 = i0[refine], j0[refine]
+        i0, j0 = np.r_[i0, i0 + h, i0, i0 + h], np.r_[j0, j0, j0 + h, j0 + h]
+        s = h
+
+    # Leaves come coarsest first. Points on the edges of a leaf that a finer
+    # neighbour evaluated (hanging nodes at the T-junctions) are set from the
+    # leaf's edge interpolation, and the finer leaves interpolate from those,
+    # so the filled field is continuous across every change of level.
+    out = {name: np.where(known, Z, 0.0) for name, Z in fields.items()}
+    for i0, j0, s in leaves:
+        if s == 1 or i0.size == 0:
+            continue  # every point of the finest cells is evaluated
+        u = np.arange(s + 1) / s
+        rows, cols = np.broadcast_arrays(
+            j0[:, None, None] + np.arange(s + 1)[None, :, None], i0[:, None, None] + np.arange(s + 1)[None, None, :]
+        )
+        U, V = u[None, None, :], u[None, :, None]
+        side_u, side_v = (U == 0) | (U == 1), (V == 0) | (V == 1)
+        fill = ~known[rows, cols] | (side_u ^ side_v)
+        corners = ((i0, j0), (i0 + s, j0), (i0, j0 + s), (i0 + s, j0 + s))
+        for name in fields:
+            f00, f10, f01, f11 = (out[name][j, i][:, None, None] for i, j in corners)
+            block = f00 * (1 - U) * (1 - V) + f10 * U * (1 - V) + f01 * (1 - U) * V + f11 * U * V
+            out[name][rows[fill], cols[fill]] = block[fill]
+
+    X, Y = np.meshgrid(xs, ys)
+    return X, Y, out, int(known.sum())
+
+
+def stage_fields(x_name, y_name, fields=("mass_ratio", "con1", "con2", "con3"), **fixed):
+    """
+    ``func(x, y)`` for sample_quadtree over any two arguments of
+    equations.stage and the constraints, the rest taken from ``fixed`` or
+    the equations' defaults. ``fields`` are any stage outputs and con1-con3.
+    """
+    constraints = {"con1": equations.con1, "con2": equations.con2, "con3": equations.con3}
+
+    def call(fn, kwargs):
+        params = inspect.signature(fn).parameters
+        return fn(**{name: val for name, val in kwargs.items() if name in params})
+
+    def func(x, y):
+        kwargs = dict(fixed, **{x_name: x, y_name: y})
+        values = call(equations.stage, kwargs) if set(fields) - set(constraints) else {}
+        return {
+            name: call(constraints[name], kwargs) if name in constraints else values[name] for name in fields
+        }
+
+    return func
+
+
+if __name__ == "__main__":
+    import time
+
+    # wall thickness against barrel length: con1 ~ 1 / t is steep at thin walls
+    func = stage_fields("L", "t", m_L=100.0)
+    x_range, y_range = (0.5, 10.0), (1e-4, 1e-2)
+    levels = {"mass_ratio": np.geomspace(1.5, 40, 30), "con1": [0.0], "con2": [0.0], "con3": [0.0]}
+
+    start = time.perf_counter()
+    X, Y, adaptive, n_evals = sample_quadtree(func, x_range, y_range, levels=levels)
+    elapsed = time.perf_counter() - start
+
+    uniform = func(X, Y)
+    print(f"adaptive: {n_evals} of {X.size} points evaluated ({n_evals / X.size:.1%}) in {elapsed * 1e3:.1f} ms")
+    for name, Z in uniform.items():
+        err = np.max(np.abs(adaptive[name] - Z)) / np.ptp(Z)
+        side = np.mean((adaptive[name] <= 0) != (Z <= 0)) if name.startswith("con") else 0.0
+        print(f"{name:<12} max error {err:.2e} of range, feasibility differs at {side:.2%} of points")
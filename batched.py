@@ -0,0 +1,264 @@
+# --- Python 3.8 ---
+"""
+@File : batched.py
+@Time : 2021/05/04
+@Author : Peter Atma
+@Desc : Batched primal-dual interior point solve of many basecase sizing problems at once, in plain NumPy
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+
+# --- Extension modules ---
+import constants as c
+import equations
+from equations import BASECASE_L_LOWER as L_LOWER
+from equations import BASECASE_T_LOWER as T_LOWER
+from equations import BASECASE_T_UPPER as T_UPPER
+
+# Loads and materials a problem may set, with their defaults
+PARAMETERS = {
+    "R": c.R,
+    "rho_s": c.rho_ss,
+    "rho_o": c.rho_02,
+    "rho_f": c.rho_rp1,
+    "OF": c.OF_rp1_o,
+    "m_L": c.m_L,
+    "p": c.p,
+    "s_t": c.st_ss,
+    "s_y": c.sy_ss,
+    "g": c.g0,
+}
+
+# Scaling as in basecase.build_problem: objective ref, constraint refs and a wall thickness ref
+OBJECTIVE_REF = 1e3
+CONSTRAINT_REFS = (c.st_ss, c.sy_ss, 1.0)
+T_REF = 1e-3
+
+N_CONSTRAINTS = 3  # con1-con3, followed by the bounds L >= L_lower, t >= t_lower, t <= t_upper
+
+
+def _evaluate(x, prm, bounds):
+    """Scaled objective (k,) and constraints (k, 6) at scaled design points x = (L, t / T_REF), (k, 2)."""
+    L, t = x[:, 0], x[:, 1] * T_REF
+    m01 = equations.stage(L, t, **{name: prm[name] for name in ("R", "rho_s", "rho_o", "rho_f", "OF", "m_L")})["m01"]
+    L_lower, t_lower, t_upper = bounds
+    # con1 and con2 are multiplied through by t > 0: the same feasible set, but con1 becomes linear in t and
+    # con2 nearly so, where their 1 / t form sends Newton steps far past the boundary
+    con2 = equations.con2(t, p=prm["p"], R=prm["R"], s_y=prm["s_y"], g=prm["g"], m_L=prm["m_L"])
+    cons = (
+        equations.con1(t, p=prm["p"], R=prm["R"], s_t=prm["s_t"]) * x[:, 1] / CONSTRAINT_REFS[0],
+        con2 * x[:, 1] / CONSTRAINT_REFS[1],
+        equations.con3(L, R=prm["R"]) / CONSTRAINT_REFS[2],
+        L_lower - x[:, 0],
+        t_lower / T_REF - x[:, 1],
+        x[:, 1] - t_upper / T_REF,
+    )
+    return m01 / OBJECTIVE_REF, np.stack(cons, axis=1)
+
+
+def _derivatives(x, prm, bounds, h=1e-30):
+    """Objective, constraints, objective gradient (k, 2) and constraint Jacobian (k, 6, 2) by complex step."""
+    grad, jac = np.empty(x.shape), np.empty(x.shape[:1] + (2 * N_CONSTRAINTS, 2))
+    for j in range(2):
+        xc = x.astype(complex)
+        xc[:, j] += 1j * h
+        f, cons = _evaluate(xc, prm, bounds)
+        grad[:, j] = f.imag / h
+        jac[:, :, j] = cons.imag / h
+    return f.real, cons.real, grad, jac
+
+
+def _hessian(x, z, prm, bounds, grad, jac, h=1e-6):
+    """Hessian of the Lagrangian f + z c (k, 2, 2), forward differences of its complex-step gradient."""
+    grad_l = grad + np.einsum("kij,ki->kj", jac, z)
+    hess = np.empty(x.shape + (2,))
+    for j in range(2):
+        xh = x.copy()
+        xh[:, j] += h
+        _, _, grad_h, jac_h = _derivatives(xh, prm, bounds)
+        hess[:, :, j] = (grad_h + np.einsum("kij,ki->kj", jac_h, z) - grad_l) / h
+    return 0.5 * (hess + hess.transpose(0, 2, 1))
+
+
+def _max_step(v, dv, tau):
+    """Largest step in (0, 1] keeping v + step * dv above (1 - tau) v, per row."""
+    with np.errstate(divide="ignore"):
+        ratio = np.where(dv < 0, -tau * v / dv, np.inf)
+    return np.minimum(1.0, ratio.min(axis=1))
+
+
+def solve_batch(
+    n=None,
+    L0=1.0,
+    t0=0.01,
+    L_lower=L_LOWER,
+    t_lower=T_LOWER,
+    t_upper=T_UPPER,
+    tol=1e-8,
+    max_iter=100,
+    **params,
+):
+    """
+    Minimum m01 over L and t subject to con1-con3 and the bounds, the
+    basecase.py problem, for every entry of ``params`` (any of PARAMETERS,
+    scalars or arrays of one value per problem) at once.
+
+    Primal-dual interior point with slacks on the constraints. The bounds
+    keep their slacks exact, so the iterates stay strictly inside them.
+    Every iteration solves each problem's 2 x 2 reduced Newton system in
+    closed form, with complex-step gradients, a forward-difference Hessian
+    of the Lagrangian shifted to positive definite, a fraction-to-boundary
+    rule and a backtracking search on an l1 merit function. Problems are
+    masked out as they converge, so the vectorized evaluations shrink.
+
+    Returns a dict of arrays: L, t, m01, iterations and success.
+    """
+    unknown = set(params) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown parameters {sorted(unknown)}, expected any of {tuple(PARAMETERS)}")
+    values = {name: params.get(name, default) for name, default in PARAMETERS.items()}
+    shape = np.broadcast(*values.values(), np.empty(n if n is not None else ())).shape
+    values = {name: np.broadcast_to(np.asarray(val, dtype=float), shape).ravel() for name, val in values.items()}
+    n_problems = int(np.prod(shape))
+    bounds = (L_lower, t_lower, t_upper)
+
+    x = np.tile([L0, t0 / T_REF], (n_problems, 1)).astype(float)
+    _, cons = _evaluate(x, values, bounds)
+    s = np.where(np.arange(2 * N_CONSTRAINTS) < N_CONSTRAINTS, np.maximum(-cons, 1e-2), -cons)
+    z = np.ones_like(s)
+    iterations = np.zeros(n_problems, dtype=int)
+    success = np.zeros(n_problems, dtype=bool)
+
+    active = np.arange(n_problems)
+    for it in range(max_iter):
+        if active.size == 0:
+            break
+        prm = {name: val[active] for name, val in values.items()}
+        xa, sa, za = x[active], s[active], z[active]
+
+        f, cons, grad, jac = _derivatives(xa, prm, bounds)
+        r_d = grad + np.einsum("kij,ki->kj", jac, za)
+        r_p = cons + sa
+        gap = np.mean(sa * za, axis=1)
+
+        done = (np.abs(r_d).max(axis=1) <= tol) & (np.abs(r_p).max(axis=1) <= tol) & (gap <= tol)
+        iterations[active] = it
+        success[active[done]] = True
+        keep = ~done
+        active, prm = active[keep], {name: val[keep] for name, val in prm.items()}
+        xa, sa, za, f, cons, grad, jac = xa[keep], sa[keep], za[keep], f[keep], cons[keep], grad[keep], jac[keep]
+        r_d, r_p, gap = r_d[keep], r_p[keep], gap[keep]
+        if active.size == 0:
+            break
+
+        mu = 0.1 * gap
+        r_c = sa * za - mu[:, None]
+
+        # reduced system (W + J' Z/S J) dx = -r_d + J' (r_c - Z r_p) / S
+        hess = _hessian(xa, za, prm, bounds, grad, jac)
+        A = hess + np.einsum("kij,ki,kil->kjl", jac, za / sa, jac)
+        a, b, d = A[:, 0, 0], A[:, 0, 1], A[:, 1, 1]
+        lam = 0.5 * (a + d) - np.sqrt(0.25 * (a - d) ** 2 + b ** 2)
+        shift = np.maximum(0.0, 1e-8 - lam)
+        a, d = a + shift, d + shift
+        rhs = -r_d + np.einsum("kij,ki->kj", jac, (r_c - za * r_p) / sa)
+        det = a * d - b * b
+        dx = np.stack(((d * rhs[:, 0] - b * rhs[:, 1]) / det, (a * rhs[:, 1] - b * rhs[:, 0]) / det), axis=1)
+        failed = ~np.isfinite(dx).all(axis=1)
+        if failed.any():
+            keep = ~failed
+            active, prm = active[keep], {name: val[keep] for name, val in prm.items()}
+            xa, sa, za, f, jac, grad, dx = xa[keep], sa[keep], za[keep], f[keep], jac[keep], grad[keep], dx[keep]
+            r_p, r_c, mu = r_p[keep], r_c[keep], mu[keep]
+        jdx = np.einsum("kij,kj->ki", jac, dx)
+        ds = -r_p - jdx
+        dz = (-r_c + za * r_p + za * jdx) / sa
+
+        alpha = _max_step(sa, ds, 0.995)
+        alpha_z = _max_step(za, dz, 0.995)
+
+        # backtracking on f - mu sum(log s) + nu |c + s|_1, nu above the multipliers
+        nu = np.abs(za).max(axis=1) + 1.0
+        merit = f - mu * np.log(sa).sum(axis=1) + nu * np.abs(r_p).sum(axis=1)
+        slope = np.einsum("kj,kj->k", grad, dx) - mu * (ds / sa).sum(axis=1)
+        slope = slope - nu * np.abs(r_p).sum(axis=1)
+        trial = np.ones(active.size, dtype=bool)
+        for _ in range(30):
+            idx = np.flatnonzero(trial)
+            if idx.size == 0:
+                break
+            x_new = xa[idx] + alpha[idx, None] * dx[idx]
+            s_new = sa[idx] + alpha[idx, None] * ds[idx]
+            f_new, c_new = _evaluate(x_new, {name: val[idx] for name, val in prm.items()}, bounds)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                merit_new = f_new - mu[idx] * np.log(s_new).sum(axis=1) + nu[idx] * np.abs(c_new + s_new).sum(axis=1)
+            accept = merit_new <= merit[idx] + 1e-4 * alpha[idx] * np.minimum(slope[idx], 0.0)
+            trial[idx[accept]] = False
+            alpha[idx[~accept]] *= 0.5
+
+        x[active] = xa + alpha[:, None] * dx
+        s[active] = sa + alpha[:, None] * ds
+        z[active] = za + alpha_z[:, None] * dz
+
+    L, t = x[:, 0], x[:, 1] * T_REF
+    m01 = equations.stage(L, t, **{name: values[name] for name in ("R", "rho_s", "rho_o", "rho_f", "OF", "m_L")})["m01"]
+    return {
+        "L": L.reshape(shape),
+        "t": t.reshape(shape),
+        "m01": m01.reshape(shape),
+        "iterations": iterations.reshape(shape),
+        "success": success.reshape(shape),
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    # wall materials, density and tensile strength together: aluminium 6061-T6, Ti-6Al-4V, stainless steel
+    materials = np.array([[2700.0, 310e6], [4430.0, 900e6], [8000.0, 515e6]])
+
+    # a catalog of stages: payloads, pressures, radii and wall materials
+    n = 10000
+    rng = np.random.default_rng(0)
+    material = materials[rng.integers(len(materials), size=n)]
+    catalog = {
+        "m_L": rng.uniform(100.0, 5e4, n),
+        "p": rng.uniform(0.1e6, 1e6, n),
+        "R": rng.uniform(0.3, 1.5, n),
+        "rho_s": material[:, 0],
+        "s_t": material[:, 1],
+    }
+
+    start = time.perf_counter()
+    res = solve_batch(**catalog)
+    elapsed = time.perf_counter() - start
+    print(f"{n} problems in {elapsed:.3f} s ({n / elapsed:.0f} per second), {res['success'].mean():.2%} converged")
+    print(f"iterations: median {np.median(res['iterations']):.0f}, max {res['iterations'].max()}")
+
+    # the same problems through the OpenMDAO stack, on a sample
+    import basecase
+    from multistart import driver_success, make_driver
+
+    prob = basecase.build_problem(make_driver("scipy"))
+    prob.setup()
+    prob.set_solver_print(level=0)
+
+    sample = rng.choice(n, 20, replace=False)
+    start = time.perf_counter()
+    err, failed = [], 0
+    for i in sample:
+        for name, val in catalog.items():
+            prob.set_val(name, val[i])
+        prob.set_val("L", 1.0)
+        prob.set_val("t", 0.01)
+        if not driver_success(prob.run_driver()):
+            failed += 1
+            continue
+        err.append(abs(res["m01"][i] / prob.get_val("m01")[0] - 1))
+    elapsed = time.perf_counter() - start
+    print(
+        f"run_driver: {sample.size / elapsed:.1f} problems per second, {failed} of {sample.size} failed, "
+        f"max relative m01 difference {max(err):.1e} on the rest"
+    )
@@ -0,0 +1,218 @@
+# --- Python 3.8 ---
+"""
+@File : benchmark.py
+@Time : 2021/04/20
+@Author : Peter Atma
+@Desc : Timing harness for component evaluation, derivatives and full optimizations
+"""
+
+# --- Standard Python modules ---
+import argparse
+import datetime
+import importlib
+import json
+import platform
+import sys
+import time
+import warnings
+
+# --- External Python modules ---
+import numpy as np
+import openmdao
+import openmdao.api as om
+
+# --- Extension modules ---
+import components
+from multistart import PROBLEMS, make_driver
+
+# Components shared by the sizing scripts
+COMPONENTS = ("StageMass", "Con1", "Con2", "Con3")
+
+# Designs per call for the vectorized throughput cases
+VEC_SIZE = 10000
+
+# Designs per problem for the colored total derivative cases
+TOTALS_VEC_SIZES = (1, 10, 100, 300)
+
+# Registered cases: name -> factory returning (callable to time, points per call)
+CASES = {}
+
+# Optimizer used by the driver cases, see make_driver
+driver_name = "pyoptsparse"
+
+
+def case(name):
+    def register(factory):
+        CASES[name] = factory
+        return factory
+
+    return register
+
+
+def _component_problem(cls, vec_size=1):
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("cmp", cls(vec_size=vec_size))
+    prob.setup()
+    prob.final_setup()
+    if vec_size > 1:
+        rng = np.random.default_rng(0)
+        names = {meta["prom_name"] for meta in prob.model.cmp.get_io_metadata(iotypes="input").values()}
+        if "L" in names:
+            prob.set_val("cmp.L", rng.uniform(1.0, 5.0, vec_size))
+        if "t" in names:
+            prob.set_val("cmp.t", rng.uniform(1e-3, 0.05, vec_size))
+    return prob
+
+
+def _totals_problem(module, method):
+    prob = importlib.import_module(module).build_problem(om.ScipyOptimizeDriver(), method=method)
+    prob.setup(force_alloc_complex=method == "cs")
+    prob.set_val("L", 2.0)
+    prob.set_val("t", 0.01)
+    prob.run_model()
+    return prob
+
+
+def _colored_totals(vec_size):
+    prob = components.build_problem(om.ScipyOptimizeDriver(), objective="m_s", vec_size=vec_size)
+    prob.setup()
+    prob.set_solver_print(level=0)
+    rng = np.random.default_rng(0)
+    prob.set_val("L", rng.uniform(1.0, 5.0, vec_size))
+    prob.set_val("t", rng.uniform(1e-3, 0.05, vec_size))
+    prob.run_model()
+    prob.compute_totals()  # the first call computes the coloring
+    return prob.compute_totals
+
+
+def _register_cases():
+    for comp in COMPONENTS:
+
+        @case(f"compute/components.{comp}")
+        def scalar(comp=comp):
+            prob = _component_problem(getattr(components, comp))
+            return prob.run_model, 1
+
+        @case(f"throughput/components.{comp}")
+        def vectorized(comp=comp):
+            prob = _component_problem(getattr(components, comp), VEC_SIZE)
+            return prob.run_model, VEC_SIZE
+
+    for n in TOTALS_VEC_SIZES:
+
+        @case(f"totals/components.vec{n}")
+        def colored(n=n):
+            return _colored_totals(n), n
+
+    for module in PROBLEMS:
+        for method in ("fd", "cs", None):
+
+            @case(f"totals/{module}.{method or 'analytic'}")
+            def totals(module=module, method=method):
+                prob = _totals_problem(module, method)
+                return prob.compute_totals, 1
+
+        @case(f"driver/{module}")
+        def driver(module=module):
+            prob = importlib.import_module(module).build_problem(make_driver(driver_name))
+            prob.setup()
+            prob.set_solver_print(level=0)
+
+            # every run starts from the same point
+            def run():
+                prob.set_val("L", 2.0)
+                prob.set_val("t", 0.01)
+                prob.run_driver()
+
+            return run, 1
+
+
+_register_cases()
+
+
+def measure(func, repeat=7, min_time=0.05):
+    """Median and minimum seconds per call, looping each sample to at least min_time."""
+    func()  # warm up caches and lazy setup
+    start = time.perf_counter()
+    func()
+    once = time.perf_counter() - start
+    number = max(1, int(min_time / max(once, 1e-9)))
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return float(np.median(samples)), float(np.min(samples)), number
+
+
+def run(pattern="", repeat=7, out=print):
+    results = {}
+    for name, factory in CASES.items():
+        if pattern not in name:
+            continue
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                func, points = factory()
+                median, best, number = measure(func, repeat=repeat)
+        except Exception as err:  # a missing optimizer should not stop the other cases
+            out(f"{name:<40} skipped ({type(err).__name__}: {err})")
+            continue
+        results[name] = {"median": median, "min": best, "number": number, "repeat": repeat, "points": points}
+        out(f"{name:<40} {median * 1e3:12.4f} ms" + (f"  {points / median:12.4g} points/s" if points > 1 else ""))
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Names of the cases whose median slowed down by more than ``tolerance``."""
+    regressions = []
+    for name, res in results.items():
+        ref = baseline.get(name)
+        if ref is not None and res["median"] > (1 + tolerance) * ref["median"]:
+            regressions.append(name)
+    return regressions
+
+
+def metadata():
+    return {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "openmdao": openmdao.__version__,
+        "platform": platform.platform(),
+        "driver": driver_name,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the stage sizing models")
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("-b", "--baseline", help="compare against results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--driver", default="pyoptsparse", choices=("pyoptsparse", "scipy"))
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(CASES))
+        sys.exit(0)
+
+    driver_name = args.driver
+    results = run(args.filter, repeat=args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": metadata(), "cases": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["cases"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name in regressions:
+            median, ref = results[name]["median"], baseline[name]["median"]
+            print(f"REGRESSION {name}: {median * 1e3:.4f} ms vs {ref * 1e3:.4f} ms")
+        sys.exit(1 if regressions else 0)
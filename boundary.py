@@ -0,0 +1,196 @@
+# --- Python 3.8 ---
+"""
+@File : boundary.py
+@Time : 2021/05/03
+@Author : Peter Atma
+@Desc : Continuation tracing of the con1/con2/con3 = 0 limit curves, many curves at once
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+
+# --- Extension modules ---
+from adaptive import stage_fields
+
+
+class _Counted:
+    """func with a count of the points it was evaluated at."""
+
+    def __init__(self, func):
+        self.func = func
+        self.n_evals = 0
+
+    def __call__(self, x, y):
+        self.n_evals += np.size(x)
+        return self.func(x, y)
+
+
+def constraint(name, x_name, y_name, **fixed):
+    """
+    ``func(x, y)`` of constraint ``name`` over two arguments of the
+    equations module, e.g. constraint("con1", "p", "t", R=R). ``fixed``
+    values may be arrays with one entry per traced curve.
+    """
+    fields = stage_fields(x_name, y_name, fields=(name,), **fixed)
+    return lambda x, y: fields(x, y)[name]
+
+
+def seed_on_segments(func, start, end, n=64, tol=1e-12):
+    """
+    A zero of ``func`` on each segment from start[k] to end[k] ((m, 2)
+    arrays), the first sign change of n samples refined by bisection. NaN
+    where there is none. Returns the points and the evaluation count.
+    """
+    func = func if isinstance(func, _Counted) else _Counted(func)
+    start, end = np.asarray(start, dtype=float), np.asarray(end, dtype=float)
+
+    s = np.linspace(0.0, 1.0, n)
+    vals = np.array([func(*(start + si * (end - start)).T) for si in s])
+    change = np.sign(vals[:-1]) * np.sign(vals[1:]) <= 0
+    found = change.any(axis=0)
+    k = np.argmax(change, axis=0)
+
+    a, b = s[k], s[np.minimum(k + 1, n - 1)]
+    g_a = vals[k, np.arange(k.size)]
+    while np.max(b - a) > tol:
+        mid = 0.5 * (a + b)
+        g_mid = func(*(start + mid[:, None] * (end - start)).T)
+        left = np.sign(g_mid) * np.sign(g_a) <= 0
+        b = np.where(left, mid, b)
+        a, g_a = np.where(left, a, mid), np.where(left, g_a, g_mid)
+
+    points = start + (0.5 * (a + b))[:, None] * (end - start)
+    points[~found] = np.nan
+    return points, func.n_evals
+
+
+def trace_zero(func, seeds, bounds, step=0.01, max_steps=2000, tol=1e-10, max_newton=10):
+    """
+    Polylines along the zero level set of ``func(x, y)`` through each of
+    the (m, 2) ``seeds``, inside ``bounds`` ((x_lower, x_upper),
+    (y_lower, y_upper)).
+
+    Pseudo-arclength continuation in coordinates scaled to the unit box:
+    each step predicts ``step`` along the tangent of the level set and
+    corrects back onto it with minimum-norm Newton steps, using
+    complex-step gradients (func must accept complex input). All curves
+    advance in lockstep, so every predictor and Newton iteration is one
+    vectorized call over the m curves. A curve stops when it leaves the
+    box, where its last segment is cut at the edge, when Newton fails, or
+    when it closes on its seed. Returns the polylines, traced both ways
+    from their seed, and the evaluation count.
+    """
+    func = func if isinstance(func, _Counted) else _Counted(func)
+    lo, hi = np.asarray(bounds, dtype=float).T
+    span = hi - lo
+    seeds = np.asarray(seeds, dtype=float)
+
+    def value_and_gradient(u, v):
+        x, y = lo[0] + u * span[0], lo[1] + v * span[1]
+        h = 1e-30
+        gu = func(x + 1j * h * span[0], y).imag / h
+        gv = func(x, y + 1j * h * span[1]).imag / h
+        return func(x, y), gu, gv
+
+    halves = []
+    for sign in (1.0, -1.0):
+        u, v = ((seeds - lo) / span).T
+        active = np.isfinite(u) & np.isfinite(v)
+        path = [np.c_[u, v]]
+        t_prev = None
+        for i in range(max_steps):
+            if not active.any():
+                break
+            _, gu, gv = value_and_gradient(u, v)
+            norm = np.hypot(gu, gv)
+            tu, tv = -gv / norm, gu / norm
+            if t_prev is None:
+                tu, tv = sign * tu, sign * tv
+            else:
+                flip = np.where(tu * t_prev[0] + tv * t_prev[1] < 0, -1.0, 1.0)
+                tu, tv = flip * tu, flip * tv
+            t_prev = (tu, tv)
+
+            # predictor along the tangent, then Newton back onto g = 0
+            un, vn = u + step * tu, v + step * tv
+            converged = np.zeros(u.size, dtype=bool)
+            for _ in range(max_newton):
+                g, gu, gv = value_and_gradient(un, vn)
+                d = g / (gu ** 2 + gv ** 2)
+                un, vn = un - d * gu, vn - d * gv
+                converged = np.abs(d) * np.hypot(gu, gv) < tol
+                if converged[active].all():
+                    break
+
+            ok = active & converged & np.isfinite(un) & np.isfinite(vn)
+            inside = (un >= 0) & (un <= 1) & (vn >= 0) & (vn <= 1)
+
+            # a step leaving the box is cut where it crosses the edge, then corrected along that edge
+            leaving = ok & ~inside
+            if leaving.any():
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    du, dv = un - u, vn - v
+                    frac_u = np.where(du < 0, -u / du, np.where(du > 0, (1 - u) / du, np.inf))
+                    frac_v = np.where(dv < 0, -v / dv, np.where(dv > 0, (1 - v) / dv, np.inf))
+                frac = np.minimum(frac_u, frac_v)
+                on_u = leaving & (frac_u <= frac_v)
+                on_v = leaving & ~on_u
+                un = np.where(leaving, u + frac * du, un)
+                vn = np.where(leaving, v + frac * dv, vn)
+                for _ in range(max_newton):
+                    g, gu, gv = value_and_gradient(un, vn)
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        un = np.where(on_v, un - g / gu, un)
+                        vn = np.where(on_u, vn - g / gv, vn)
+
+            closed = ok & (i > 2) & (np.hypot(un - path[0][:, 0], vn - path[0][:, 1]) < step)
+            u, v = np.where(ok, un, u), np.where(ok, vn, v)
+            u, v = np.where(closed, path[0][:, 0], u), np.where(closed, path[0][:, 1], v)
+            path.append(np.where(ok[:, None], np.c_[u, v], np.nan))
+            active = ok & inside & ~closed
+        halves.append(np.array(path))
+
+    polylines = []
+    for k in range(seeds.shape[0]):
+        forward, backward = (half[:, k][np.isfinite(half[:, k, 0])] for half in halves)
+        polylines.append(lo + np.r_[backward[::-1], forward[1:]] * span)
+    return polylines, func.n_evals
+
+
+if __name__ == "__main__":
+    import time
+
+    import constants as c
+    import equations
+
+    def vertical(x, y_lower, y_upper):
+        """Seeding segments x = const from y_lower to y_upper, one per x."""
+        x = np.asarray(x, dtype=float)
+        return np.c_[x, np.full(x.size, y_lower)], np.c_[x, np.full(x.size, y_upper)]
+
+    # minimum wall thickness against pressure, one con1 curve per radius: a mesh of the t(p, R) surface
+    R = np.linspace(0.25, 1.5, 6)
+    bounds = ((1e5, 2e6), (1e-5, 5e-3))
+    func = _Counted(constraint("con1", "p", "t", R=R))
+
+    start = time.perf_counter()
+    seeds, _ = seed_on_segments(func, *vertical(np.full(R.size, 1e6), *bounds[1]))
+    curves, n_evals = trace_zero(func, seeds, bounds)
+    elapsed = time.perf_counter() - start
+
+    err = max(np.max(np.abs(cu[:, 1] / (cu[:, 0] * r / c.st_ss) - 1)) for cu, r in zip(curves, R))
+    n_points = sum(map(len, curves))
+    print(f"con1: {len(curves)} curves, {n_points} points, {n_evals} evaluations in {elapsed * 1e3:.1f} ms")
+    print(f"      max relative error against t = p R / s_t {err:.1e}")
+    print(f"      a grid with the same spacing takes {101 ** 2 * R.size} evaluations and locates t to 1% of the box")
+
+    # payload the wall can carry (con2) against thickness, for a few pressures
+    p = np.array([0.0, 1e5, 3e5])
+    bounds = ((1e-5, 5e-3), (0.0, 1e7))
+    func = _Counted(constraint("con2", "t", "m_L", p=p))
+    seeds, _ = seed_on_segments(func, *vertical(np.full(p.size, 1e-3), *bounds[1]))
+    curves, n_evals = trace_zero(func, seeds, bounds)
+
+    residual = max(np.max(np.abs(equations.con2(cu[:, 0], p=pi, m_L=cu[:, 1]))) for cu, pi in zip(curves, p))
+    print(f"con2: {len(curves)} curves, {n_evals} evaluations, max |con2| / s_y on them {residual / c.sy_ss:.1e}")
@@ -0,0 +1,212 @@
+# --- Python 3.8 ---
+"""
+@File : cache.py
+@Time : 2021/04/19
+@Author : Peter Atma
+@Desc : LRU memoization of component evaluations keyed on quantized inputs
+"""
+
+# --- Standard Python modules ---
+from collections import OrderedDict, namedtuple
+
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+
+# --- Extension modules ---
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def _flat(vec):
+    # packed by sorted name, so OpenMDAO vectors and plain dicts (direct compute calls) give the same key
+    return np.concatenate([np.ravel(vec[name]) for name in sorted(vec.keys())])
+
+
+class _RecordingPartials:
+    """Passes sub-Jacobians through to ``partials`` and remembers which were set."""
+
+    def __init__(self, partials):
+        self.partials = partials
+        self.keys = []
+
+    def __setitem__(self, key, val):
+        self.partials[key] = val
+        self.keys.append(key)
+
+    def __getitem__(self, key):
+        return self.partials[key]
+
+
+class ComputeCache:
+    """
+    Bounded LRU tables of the outputs and sub-Jacobians of one component.
+
+    Inputs are quantized to ``bits`` mantissa bits (relative, so the same
+    setting suits lengths and pressures) to form the key. Keep the quantum
+    well below any finite-difference step or the perturbed points will
+    alias to the unperturbed one. Inputs, outputs and partials may be
+    OpenMDAO vectors or plain dicts of arrays.
+    """
+
+    def __init__(self, maxsize=128, bits=40):
+        self.maxsize = maxsize
+        self.bits = bits
+        self._scale = 2.0 ** bits
+        self._outputs = OrderedDict()
+        self._partials = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, inputs):
+        mantissa, exponent = np.frexp(_flat(inputs))
+        return np.rint(mantissa * self._scale).tobytes() + exponent.tobytes()
+
+    def _get(self, table, key):
+        val = table.get(key)
+        if val is None:
+            self.misses += 1
+        else:
+            table.move_to_end(key)
+            self.hits += 1
+        return val
+
+    def _put(self, table, key, val):
+        table[key] = val
+        if len(table) > self.maxsize:
+            table.popitem(last=False)
+
+    def compute(self, compute, inputs, outputs):
+        """``compute(inputs, outputs)`` unless the outputs at these inputs are cached."""
+        key = self.key(inputs)
+        hit = self._get(self._outputs, key)
+        if hit is None:
+            compute(inputs, outputs)
+            hit = {name: np.array(outputs[name]) for name in outputs.keys()}
+            self._put(self._outputs, key, hit)
+            return
+        for name, val in hit.items():
+            outputs[name] = val.copy()
+
+    def compute_partials(self, compute_partials, inputs, partials):
+        """``compute_partials(inputs, partials)`` unless the sub-Jacobians at these inputs are cached."""
+        key = self.key(inputs)
+        hit = self._get(self._partials, key)
+        if hit is None:
+            recorder = _RecordingPartials(partials)
+            compute_partials(inputs, recorder)
+            self._put(self._partials, key, {name: np.array(partials[name]) for name in recorder.keys})
+            return
+        for name, val in hit.items():
+            partials[name] = val.copy()
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._outputs) + len(self._partials))
+
+    def clear(self):
+        self._outputs.clear()
+        self._partials.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class CachedComponentMixin:
+    """
+    Memoize ``compute`` and ``compute_partials`` of an ExplicitComponent in
+    a ComputeCache of ``cache_size`` points and ``cache_bits`` mantissa
+    bits. Complex-step evaluations bypass the cache.
+
+        class CachedStageMass(CachedComponentMixin, mass.StageMass):
+            pass
+    """
+
+    def initialize(self):
+        super().initialize()
+        self.options.declare("cache_size", types=int, default=128, desc="Maximum number of cached input points")
+        self.options.declare("cache_bits", types=int, default=40, desc="Mantissa bits kept when quantizing inputs")
+
+    def setup(self):
+        self._compute_cache = ComputeCache(self.options["cache_size"], self.options["cache_bits"])
+        super().setup()
+
+    def compute(self, inputs, outputs):
+        if self.under_complex_step:
+            return super().compute(inputs, outputs)
+        self._compute_cache.compute(super().compute, inputs, outputs)
+
+    def compute_partials(self, inputs, partials):
+        if self.under_complex_step:
+            return super().compute_partials(inputs, partials)
+        self._compute_cache.compute_partials(super().compute_partials, inputs, partials)
+
+    def cache_info(self):
+        return self._compute_cache.info()
+
+    def cache_clear(self):
+        self._compute_cache.clear()
+
+
+def cached(cls):
+    """Subclass of component class ``cls`` with CachedComponentMixin applied."""
+    return type(f"Cached{cls.__name__}", (CachedComponentMixin, cls), {"__module__": cls.__module__})
+
+
+def _wrap(system, name):
+    """Instance attribute shadowing ``system.<name>`` with its call through the system's cache."""
+    method = getattr(system, name)
+
+    def wrapper(inputs, vec):
+        if system.under_complex_step:
+            return method(inputs, vec)
+        getattr(system._compute_cache, name)(method, inputs, vec)
+
+    setattr(system, name, wrapper)
+
+
+def enable_cache(model, maxsize=128, bits=40):
+    """
+    Turn on caching for every explicit component of an already set-up
+    model, e.g. one of the OneStage groups, without changing its classes.
+    Each component's compute and compute_partials are wrapped on the
+    instance; components already cached get a fresh cache of this size.
+    """
+    for system in model.system_iter(recurse=True, typ=om.ExplicitComponent):
+        if isinstance(system, om.IndepVarComp):
+            continue
+        if not hasattr(system, "_compute_cache"):
+            _wrap(system, "compute")
+            _wrap(system, "compute_partials")
+        system._compute_cache = ComputeCache(maxsize, bits)
+
+
+def cache_report(model, out=print):
+    """Hit/miss counts of the cached components in ``model``, by pathname."""
+    report = {}
+    for system in model.system_iter(recurse=True, typ=om.ExplicitComponent):
+        cache = getattr(system, "_compute_cache", None)
+        if cache is not None:
+            info = cache.info()
+            report[system.pathname] = info
+            if out is not None:
+                calls = info.hits + info.misses
+                rate = info.hits / calls if calls else 0.0
+                out(f"{system.pathname:<12} {info.hits:>8} hits {info.misses:>8} misses  {rate:6.1%}")
+    return report
+
+
+if __name__ == "__main__":
+    import basecase
+    from multistart import make_driver
+
+    prob = basecase.build_problem(make_driver("scipy"))
+    prob.setup()
+    prob.set_solver_print(level=0)
+    enable_cache(prob.model)
+
+    prob.run_driver()
+
+    print("minimum found at")
+    print(prob.get_val("L")[0])
+    print(prob.get_val("t")[0])
+
+    cache_report(prob.model)
@@ -0,0 +1,390 @@
+# --- Python 3.8 ---
+"""
+@File : components.py
+@Time : 2021/04/26
+@Author : Peter Atma
+@Desc : Stage sizing components shared by the basecase, one_stage, volume and mass scripts
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+
+# --- Extension modules ---
+import constants as c
+import equations
+
+# Outputs StageMass can expose and the inputs each one depends on
+STAGE_OUTPUTS = {
+    "v": ("L", "R"),
+    "v_p": ("L", "R", "t"),
+    "v_s": ("L", "R", "t"),
+    "v_f": ("L", "R", "t", "rho_o", "rho_f", "OF"),
+    "v_o": ("L", "R", "t", "rho_o", "rho_f", "OF"),
+    "m_s": ("L", "R", "t", "rho_s"),
+    "m_p": ("L", "R", "t", "rho_o", "rho_f", "OF"),
+    "m01": ("L", "R", "t", "rho_s", "rho_o", "rho_f", "OF"),
+    "mass_ratio": ("L", "R", "t", "rho_s", "rho_o", "rho_f", "OF", "m_L"),
+}
+
+STAGE_INPUTS = ("L", "R", "t", "rho_s", "rho_o", "rho_f", "OF", "m_L")
+
+# Inputs of each constraint
+CONSTRAINT_INPUTS = {
+    "con1": ("p", "t", "R", "s_t"),
+    "con2": ("p", "t", "R", "s_y", "g", "m_L"),
+    "con3": ("L", "R"),
+}
+
+# Default value and units of every input of the sizing problem
+INPUTS = {
+    "L": (1.0, "m"),
+    "R": (c.R, "m"),
+    "t": (0.01, "m"),
+    "rho_s": (c.rho_ss, "kg/m ** 3"),
+    "rho_o": (c.rho_02, "kg/m ** 3"),
+    "rho_f": (c.rho_rp1, "kg/m ** 3"),
+    "OF": (c.OF_rp1_o, None),
+    "m_L": (c.m_L, "kg"),
+    "p": (c.p, "Pa"),
+    "s_t": (c.st_ss, "Pa"),
+    "s_y": (c.sy_ss, "Pa"),
+    "g": (c.g0, "m/s**2"),
+}
+
+# Constraint scaling, roughly the size of each constraint's terms
+CONSTRAINT_REFS = {"con1": c.st_ss, "con2": c.sy_ss, "con3": 1.0}
+
+# Objective scaling, roughly each output at the sizing optima (the refs of basecase, mass and volume)
+OBJECTIVE_REFS = {
+    "v": 1.0,
+    "v_p": 1.0,
+    "v_s": 1e-3,
+    "v_f": 0.1,
+    "v_o": 1.0,
+    "m_s": 1e1,
+    "m_p": 1e3,
+    "m01": 1e3,
+    "mass_ratio": 1e1,
+}
+
+
+def _add_inputs(comp, names):
+    n = comp.options["vec_size"]
+    for name in names:
+        val, units = INPUTS[name]
+        comp.add_input(name, val=val, shape=n, units=units)
+
+
+def output_units(output):
+    """Units of a StageMass or constraint output."""
+    if output in ("mass_ratio", "con3"):
+        return None
+    if output in CONSTRAINT_INPUTS:
+        return "Pa"
+    return "m**3" if output[0] == "v" else "kg"
+
+
+class StageMass(om.ExplicitComponent):
+    """
+    Volumes and masses of a cylindrical tank with hemispherical domes of
+    radius R, wall thickness t and barrel length L, filled with oxidizer
+    and fuel at mixture ratio OF. Only the ``outputs`` asked for are
+    added, with their partials.
+    """
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of stage designs evaluated per call")
+        self.options.declare("outputs", types=tuple, default=("m01",), desc=f"Any of {tuple(STAGE_OUTPUTS)}")
+
+    def setup(self):
+        n = self.options["vec_size"]
+        unknown = set(self.options["outputs"]) - set(STAGE_OUTPUTS)
+        if unknown:
+            raise ValueError(f"{self.msginfo}: unknown outputs {sorted(unknown)}, expected {tuple(STAGE_OUTPUTS)}")
+
+        # --- Inputs ---
+        _add_inputs(self, STAGE_INPUTS)
+
+        # --- Outputs ---
+        for name in self.options["outputs"]:
+            self.add_output(name, shape=n, units=output_units(name))
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        ar = np.arange(self.options["vec_size"])
+        for name in self.options["outputs"]:
+            self.declare_partials(name, STAGE_OUTPUTS[name], rows=ar, cols=ar)
+        if "m01" in self.options["outputs"]:
+            self.declare_partials("m01", "m_L", rows=ar, cols=ar, val=1.0)
+
+    def compute(self, inputs, outputs):
+        values = equations.stage(**{name: inputs[name] for name in STAGE_INPUTS})
+
+        for name in self.options["outputs"]:
+            outputs[name] = values[name]
+
+    def compute_partials(self, inputs, partials):
+        L = inputs["L"]
+        R = inputs["R"]
+        t = inputs["t"]
+        rho_s = inputs["rho_s"]
+        rho_o = inputs["rho_o"]
+        rho_f = inputs["rho_f"]
+        OF = inputs["OF"]
+        m_L = inputs["m_L"]
+
+        v, v_p = equations.tank_volumes(L, t, R)
+        dvol = equations.tank_volume_partials(L, t, R)
+
+        # fuel volume fraction k = v_f / v_p and bulk propellant density rho_p = m_p / v_p
+        D = OF * rho_f + rho_o
+        k = rho_o / D
+        dk = {"rho_o": OF * rho_f / D ** 2, "rho_f": -OF * rho_o / D ** 2, "OF": -rho_o * rho_f / D ** 2}
+        rho_p = rho_o * rho_f * (1 + OF) / D
+        drho_p = {
+            "rho_o": rho_f ** 2 * OF * (1 + OF) / D ** 2,
+            "rho_f": rho_o ** 2 * (1 + OF) / D ** 2,
+            "OF": rho_o * rho_f * (rho_o - rho_f) / D ** 2,
+        }
+
+        d = dict(dvol)
+        d["v_s"] = {name: dvol["v"].get(name, 0.0) - val for name, val in dvol["v_p"].items()}
+        d["v_f"] = {name: k * val for name, val in d["v_p"].items()}
+        d["v_f"].update((name, v_p * val) for name, val in dk.items())
+        d["v_o"] = {name: (1 - k) * val for name, val in d["v_p"].items()}
+        d["v_o"].update((name, -v_p * val) for name, val in dk.items())
+        d["m_s"] = {name: rho_s * val for name, val in d["v_s"].items()}
+        d["m_s"]["rho_s"] = v - v_p
+        d["m_p"] = {name: rho_p * val for name, val in d["v_p"].items()}
+        d["m_p"].update((name, v_p * val) for name, val in drho_p.items())
+        d["m01"] = {name: d["m_s"].get(name, 0.0) + d["m_p"].get(name, 0.0) for name in STAGE_OUTPUTS["m01"]}
+        d["mass_ratio"] = {name: val / m_L for name, val in d["m01"].items()}
+        d["mass_ratio"]["m_L"] = -(rho_s * (v - v_p) + rho_p * v_p) / m_L ** 2
+
+        for name in self.options["outputs"]:
+            for wrt in STAGE_OUTPUTS[name]:
+                partials[name, wrt] = d[name][wrt]
+
+
+class Con1(om.ExplicitComponent):
+    """Hoop stress p R / t within the tensile strength s_t."""
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of stage designs evaluated per call")
+
+    def setup(self):
+        n = self.options["vec_size"]
+
+        # --- Inputs ---
+        _add_inputs(self, CONSTRAINT_INPUTS["con1"])
+
+        # --- Outputs ---
+        self.add_output("con1", shape=n, units="Pa")
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        ar = np.arange(self.options["vec_size"])
+        self.declare_partials("con1", ["p", "t", "R"], rows=ar, cols=ar)
+        self.declare_partials("con1", "s_t", rows=ar, cols=ar, val=-1.0)
+
+    def compute(self, inputs, outputs):
+        outputs["con1"] = equations.con1(**{name: inputs[name] for name in CONSTRAINT_INPUTS["con1"]})
+
+    def compute_partials(self, inputs, partials):
+        p = inputs["p"]
+        t = inputs["t"]
+        R = inputs["R"]
+
+        partials["con1", "p"] = R / t
+        partials["con1", "t"] = -p * R / t ** 2
+        partials["con1", "R"] = p / t
+
+
+class Con2(om.ExplicitComponent):
+    """Axial stress from the payload weight, relieved by the pressure, within the yield strength s_y."""
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of stage designs evaluated per call")
+
+    def setup(self):
+        n = self.options["vec_size"]
+
+        # --- Inputs ---
+        _add_inputs(self, CONSTRAINT_INPUTS["con2"])
+
+        # --- Outputs ---
+        self.add_output("con2", shape=n, units="Pa")
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        ar = np.arange(self.options["vec_size"])
+        self.declare_partials("con2", ["p", "t", "R", "g", "m_L"], rows=ar, cols=ar)
+        self.declare_partials("con2", "s_y", rows=ar, cols=ar, val=-1.0)
+
+    def compute(self, inputs, outputs):
+        outputs["con2"] = equations.con2(**{name: inputs[name] for name in CONSTRAINT_INPUTS["con2"]})
+
+    def compute_partials(self, inputs, partials):
+        p = inputs["p"]
+        t = inputs["t"]
+        R = inputs["R"]
+        g = inputs["g"]
+        m_L = inputs["m_L"]
+
+        A = np.pi * (2 * R * t - t ** 2)  # wall cross-section area
+        dcon2_dA = -g * m_L / A ** 2
+
+        partials["con2", "p"] = -R / (2 * t)
+        partials["con2", "t"] = dcon2_dA * 2 * np.pi * (R - t) + p * R / (2 * t ** 2)
+        partials["con2", "R"] = dcon2_dA * 2 * np.pi * t - p / (2 * t)
+        partials["con2", "g"] = m_L / A
+        partials["con2", "m_L"] = g / A
+
+
+class Con3(om.ExplicitComponent):
+    """Barrel at least as long as the radius, 1 - L / R."""
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of stage designs evaluated per call")
+
+    def setup(self):
+        n = self.options["vec_size"]
+
+        # --- Inputs ---
+        _add_inputs(self, CONSTRAINT_INPUTS["con3"])
+
+        # --- Outputs ---
+        self.add_output("con3", shape=n)
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        ar = np.arange(self.options["vec_size"])
+        self.declare_partials("con3", ["L", "R"], rows=ar, cols=ar)
+
+    def compute(self, inputs, outputs):
+        outputs["con3"] = equations.con3(**{name: inputs[name] for name in CONSTRAINT_INPUTS["con3"]})
+
+    def compute_partials(self, inputs, partials):
+        L = inputs["L"]
+        R = inputs["R"]
+
+        partials["con3", "L"] = -1 / R
+        partials["con3", "R"] = L / R ** 2
+
+
+CONSTRAINTS = {"con1": Con1, "con2": Con2, "con3": Con3}
+
+
+class Total(om.ExplicitComponent):
+    """Sum of a StageMass output over the designs, the objective of a vectorized problem."""
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of stage designs evaluated per call")
+        self.options.declare("output", types=str, default="m01", desc="StageMass output to sum")
+
+    def setup(self):
+        name = self.options["output"]
+
+        # --- Inputs ---
+        self.add_input(name, shape=self.options["vec_size"], units=output_units(name))
+
+        # --- Outputs ---
+        self.add_output(f"{name}_total", units=output_units(name))
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        name = self.options["output"]
+        self.declare_partials(f"{name}_total", name, val=1.0)
+
+    def compute(self, inputs, outputs):
+        name = self.options["output"]
+        outputs[f"{name}_total"] = np.sum(inputs[name])
+
+
+class OneStage(om.Group):
+    """
+    StageMass and the chosen constraints with every input promoted, so
+    L, t and any load or material value are set by their plain names.
+    """
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of stage designs evaluated per call")
+        self.options.declare("outputs", types=tuple, default=("m01",), desc="StageMass outputs to expose")
+        self.options.declare("constraints", types=tuple, default=tuple(CONSTRAINTS), desc="Constraints to include")
+        self.options.declare("total", types=str, default=None, allow_none=True, desc="Output summed over the designs")
+
+    def setup(self):
+        n = self.options["vec_size"]
+
+        self.add_subsystem("obj_cmp", StageMass(vec_size=n, outputs=self.options["outputs"]), promotes=["*"])
+        used = set(STAGE_INPUTS)
+        for name in self.options["constraints"]:
+            self.add_subsystem(f"{name}_cmp", CONSTRAINTS[name](vec_size=n), promotes=["*"])
+            used.update(CONSTRAINT_INPUTS[name])
+        if self.options["total"] is not None:
+            self.add_subsystem("total_cmp", Total(vec_size=n, output=self.options["total"]), promotes=["*"])
+
+        for name in INPUTS:
+            if name in used:
+                val, units = INPUTS[name]
+                self.set_input_defaults(name, np.full(n, val), units=units)
+
+
+def build_problem(
+    driver=None,
+    objective="m01",
+    outputs=None,
+    constraints=tuple(CONSTRAINTS),
+    L_lower=0.0,
+    t_lower=1e-6,
+    t_upper=0.49,
+    ref=None,
+    method=None,
+    vec_size=1,
+):
+    """
+    OneStage minimizing ``objective`` over L and t subject to
+    ``constraints`` <= 0, scaled by CONSTRAINT_REFS and ``ref`` (per
+    design, OBJECTIVE_REFS by default). Derivatives are analytic unless
+    ``method`` ("fd" or "cs") asks for approximated totals.
+
+    With ``vec_size`` > 1 the problem sizes that many independent designs
+    at once, minimizing the sum of their objectives, scaled by
+    ``vec_size * ref``. The analytic total Jacobian is then colored, so it
+    takes two linear solves however many designs there are. Its cost still
+    grows with the designs, the solves with their size and the dense total
+    Jacobian handed to the driver with its square. Approximated
+    totals take one perturbation per design variable, since the summed
+    objective couples them all.
+    """
+    prob = om.Problem(reports=False)
+    prob.model = OneStage(
+        vec_size=vec_size,
+        outputs=tuple(outputs or (objective,)),
+        constraints=tuple(constraints),
+        total=objective if vec_size > 1 else None,
+    )
+
+    if driver is None:
+        driver = om.pyOptSparseDriver()
+        driver.options["optimizer"] = "SLSQP"
+    prob.driver = driver
+
+    prob.model.add_design_var("L", lower=L_lower)
+    prob.model.add_design_var("t", lower=t_lower, upper=t_upper)
+    for name in constraints:
+        prob.model.add_constraint(name, upper=0.0, ref=CONSTRAINT_REFS[name])
+
+    ref = OBJECTIVE_REFS[objective] if ref is None else ref
+    if vec_size > 1:
+        prob.model.add_objective(f"{objective}_total", ref=vec_size * ref)
+        prob.driver.declare_coloring(show_summary=False)
+    else:
+        prob.model.add_objective(objective, ref=ref)
+
+    if method is not None:
+        prob.model.approx_totals(method=method)
+
+    return prob
@@ -0,0 +1,26 @@
+# --- Python 3.8 ---
+"""
+@File : constants.py
+@Time : 2021/04/07
+@Author : Peter Atma
+@Desc : Default geometry, material and propellant values shared by the sizing scripts
+"""
+
+# --- Geometry ---
+R = 0.5  # tank radius, m
+
+# --- Propellants (LOX / RP-1) ---
+rho_02 = 1000  # oxidizer density, kg/m**3
+rho_rp1 = 1021  # fuel density, kg/m**3
+OF_rp1_o = 2.56  # oxidizer to fuel mass ratio
+isp_rp1 = 300  # specific impulse, s
+
+# --- Structure (stainless steel) ---
+rho_ss = 8000  # density, kg/m**3
+st_ss = 515e6  # tensile strength, Pa
+sy_ss = 332e6  # yield strength, Pa
+
+# --- Loads ---
+p = 0.36e6  # tank pressure, Pa
+m_L = 100  # payload mass, kg
+g0 = 9.81  # standard gravity, m/s**2
@@ -0,0 +1,174 @@
+# --- Python 3.8 ---
+"""
+@File : distributed.py
+@Time : 2021/04/28
+@Author : Peter Atma
+@Desc : Stage populations split across MPI ranks, with collective min mass and feasible count
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.array_utils import evenly_distrib_idxs
+from openmdao.utils.mpi import MPI
+
+# --- Extension modules ---
+from components import CONSTRAINT_INPUTS, CONSTRAINTS, INPUTS, STAGE_INPUTS, StageMass, output_units
+
+
+def allreduce(comm, value, op="sum"):
+    """Reduce ``value`` over the ranks of ``comm``. Without MPI (one rank) the value is returned as is."""
+    if MPI is None or comm.size == 1:
+        return value
+    return comm.allreduce(value, op={"sum": MPI.SUM, "min": MPI.MIN, "max": MPI.MAX}[op])
+
+
+def local_slice(comm, n):
+    """Slice of a population of ``n`` designs owned by this rank."""
+    sizes, offsets = evenly_distrib_idxs(comm.size, n)
+    start = int(offsets[comm.rank])
+    return slice(start, start + int(sizes[comm.rank]))
+
+
+class PopulationSummary(om.ExplicitComponent):
+    """
+    Collective statistics of a distributed population: the lightest
+    feasible design (objective, L and t), the mean objective and the
+    number of feasible designs. Inputs are this rank's slice, outputs are
+    the same on every rank. No partials, it reports a sampled population.
+    """
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of designs on this rank")
+        self.options.declare("objective", types=str, default="m01", desc="StageMass output to minimize")
+        self.options.declare("constraints", types=tuple, default=tuple(CONSTRAINTS), desc="Constraint outputs")
+        self.options["distributed"] = True
+
+    def setup(self):
+        n = self.options["vec_size"]
+        obj = self.options["objective"]
+
+        # --- Inputs ---
+        self.add_input(obj, shape=n, units=output_units(obj), distributed=True)
+        self.add_input("L", shape=n, units="m", distributed=True)
+        self.add_input("t", shape=n, units="m", distributed=True)
+        for name in self.options["constraints"]:
+            self.add_input(name, shape=n, units=output_units(name), distributed=True)
+
+        # --- Outputs ---
+        self.add_output(f"{obj}_min", val=np.nan, units=output_units(obj), distributed=False)
+        self.add_output(f"{obj}_mean", val=np.nan, units=output_units(obj), distributed=False)
+        self.add_output("L_best", val=np.nan, units="m", distributed=False)
+        self.add_output("t_best", val=np.nan, units="m", distributed=False)
+        self.add_output("n_feasible", val=0.0, distributed=False)
+
+    def compute(self, inputs, outputs):
+        obj = self.options["objective"]
+        feasible = np.ones(self.options["vec_size"], dtype=bool)
+        for name in self.options["constraints"]:
+            feasible &= inputs[name] <= 0
+
+        local = inputs[obj]
+        outputs["n_feasible"] = allreduce(self.comm, int(feasible.sum()))
+        n = allreduce(self.comm, local.size)
+        outputs[f"{obj}_mean"] = allreduce(self.comm, float(local.sum())) / max(n, 1)
+
+        # each rank offers its lightest feasible design, every rank keeps the overall best
+        best = (np.inf, np.nan, np.nan)
+        if feasible.any():
+            i = np.flatnonzero(feasible)[np.argmin(local[feasible])]
+            best = (float(local[i]), float(inputs["L"][i]), float(inputs["t"][i]))
+        if MPI is not None and self.comm.size > 1:
+            best = min(self.comm.allgather(best))
+
+        outputs[f"{obj}_min"] = best[0] if np.isfinite(best[0]) else np.nan
+        outputs["L_best"] = best[1]
+        outputs["t_best"] = best[2]
+
+
+class DistributedPopulation(om.Group):
+    """
+    ``pop_size`` stage designs split evenly over the ranks of the group's
+    communicator. Every input is a distributed independent variable, so
+    each rank only holds and evaluates its own slice. Set values with
+    set_population, which hands every rank its part of a full array.
+    """
+
+    def initialize(self):
+        self.options.declare("pop_size", types=int, desc="Number of designs over all ranks")
+        self.options.declare("objective", types=str, default="m01", desc="StageMass output to minimize")
+        self.options.declare("constraints", types=tuple, default=tuple(CONSTRAINTS), desc="Constraints to include")
+
+    def setup(self):
+        obj = self.options["objective"]
+        constraints = self.options["constraints"]
+        rows = local_slice(self.comm, self.options["pop_size"])
+        n = rows.stop - rows.start
+
+        used = list(STAGE_INPUTS)
+        for name in constraints:
+            used += [inp for inp in CONSTRAINT_INPUTS[name] if inp not in used]
+
+        ivc = self.add_subsystem("ivc", om.IndepVarComp(), promotes=["*"])
+        for name in used:
+            val, units = INPUTS[name]
+            ivc.add_output(name, np.full(n, val), units=units, distributed=True)
+
+        self.add_subsystem("obj_cmp", StageMass(vec_size=n, outputs=(obj,), distributed=True), promotes=["*"])
+        for name in constraints:
+            self.add_subsystem(f"{name}_cmp", CONSTRAINTS[name](vec_size=n, distributed=True), promotes=["*"])
+        self.add_subsystem(
+            "summary_cmp",
+            PopulationSummary(vec_size=n, objective=obj, constraints=constraints),
+            promotes_inputs=[obj, "L", "t"] + list(constraints),
+            promotes_outputs=["*"],
+        )
+
+
+def set_population(prob, name, values):
+    """Set the distributed input ``name`` from the full population array ``values`` (same on every rank)."""
+    values = np.asarray(values)
+    prob.set_val(name, values[local_slice(prob.comm, values.size)])
+
+
+def run_population(L, t, **params):
+    """
+    Summary outputs of DistributedPopulation for the designs ``L`` and
+    ``t``, other inputs at ``params`` or their defaults. Arrays are the
+    full population, the same on every rank, and so is the result.
+    """
+    prob = om.Problem(DistributedPopulation(pop_size=np.size(L)), reports=False)
+    prob.setup()
+    for name, val in dict(params, L=L, t=t).items():
+        set_population(prob, name, np.broadcast_to(val, np.shape(L)))
+    prob.run_model()
+    return {name: float(prob.get_val(name)[0]) for name in ("m01_min", "m01_mean", "L_best", "t_best", "n_feasible")}
+
+
+if __name__ == "__main__":
+    # mpirun -n 4 python distributed.py
+    import time
+
+    n = 10 ** 6
+    rng = np.random.default_rng(0)  # same seed on every rank, each rank keeps its slice
+    L = rng.uniform(0.5, 5.0, n)
+    t = 10 ** rng.uniform(-4, -2, n)
+
+    prob = om.Problem(DistributedPopulation(pop_size=n), reports=False)
+    prob.setup()
+    set_population(prob, "L", L)
+    set_population(prob, "t", t)
+    prob.final_setup()  # the transfers are built here, keep them out of the timing
+
+    start = time.perf_counter()
+    prob.run_model()
+    elapsed = allreduce(prob.comm, time.perf_counter() - start, "max")
+
+    if prob.comm.rank == 0:
+        print(f"{n} designs on {prob.comm.size} rank(s) in {elapsed:.3f} s")
+        print(f"{int(prob.get_val('n_feasible')[0])} feasible, mean m01 {prob.get_val('m01_mean')[0]:.2f} kg")
+        print(
+            f"lightest feasible m01 {prob.get_val('m01_min')[0]:.2f} kg "
+            f"at L = {prob.get_val('L_best')[0]:.4f}, t = {prob.get_val('t_best')[0]:.6f}"
+        )
@@ -0,0 +1,139 @@
+# --- Python 3.8 ---
+"""
+@File : equations.py
+@Time : 2021/04/27
+@Author : Peter Atma
+@Desc : Stage sizing equations in plain NumPy, for quick evaluations without OpenMDAO
+"""
+
+# --- Standard Python modules ---
+import argparse
+
+# --- External Python modules ---
+import numpy as np
+
+# --- Extension modules ---
+import constants as c
+
+# --- Design variable bounds of the mass.py problem ---
+L_LOWER = 0.5
+T_LOWER = 1e-6
+T_UPPER = 0.49
+
+# --- Design variable bounds of the basecase.py problem ---
+BASECASE_L_LOWER = 0.0
+BASECASE_T_LOWER = 1e-5
+BASECASE_T_UPPER = 0.4
+
+
+def tank_volumes(L, t, R=c.R):
+    """Outer volume v and propellant (inner) volume v_p of a cylindrical tank with hemispherical domes."""
+    v = np.pi * (R ** 2 * L + 4 / 3 * R ** 3)
+    v_p = np.pi * ((R - t) ** 2 * L + 4 / 3 * (R - t) ** 3)
+    return v, v_p
+
+
+def tank_volume_partials(L, t, R=c.R):
+    """Partials of tank_volumes, {"v": {"L", "R"}, "v_p": {"L", "R", "t"}}."""
+    r_i = R - t  # inner radius
+    dv_p_dr = np.pi * (2 * r_i * L + 4 * r_i ** 2)
+    return {
+        "v": {"L": np.pi * R ** 2, "R": np.pi * (2 * R * L + 4 * R ** 2)},
+        "v_p": {"L": np.pi * r_i ** 2, "R": dv_p_dr, "t": -dv_p_dr},
+    }
+
+
+def stage(L, t, R=c.R, rho_s=c.rho_ss, rho_o=c.rho_02, rho_f=c.rho_rp1, OF=c.OF_rp1_o, m_L=c.m_L):
+    """
+    Volumes and masses of a cylindrical tank with hemispherical domes, the
+    outputs of components.StageMass as a dict. All arguments broadcast.
+    A single propellant of density rho_p is rho_o = rho_f = rho_p.
+    """
+    v, v_p = tank_volumes(L, t, R)
+    k = rho_o / (OF * rho_f + rho_o)  # fuel share of the propellant volume
+
+    values = {"v": v, "v_p": v_p, "v_s": v - v_p, "v_f": k * v_p, "v_o": (1 - k) * v_p}
+    values["m_s"] = values["v_s"] * rho_s
+    values["m_p"] = values["v_o"] * rho_o + values["v_f"] * rho_f
+    values["m01"] = values["m_s"] + values["m_p"] + m_L
+    values["mass_ratio"] = values["m01"] / m_L
+    return values
+
+
+def con1(t, p=c.p, R=c.R, s_t=c.st_ss):
+    """Hoop stress p R / t within the tensile strength s_t."""
+    return p * R / t - s_t
+
+
+def con2(t, p=c.p, R=c.R, s_y=c.sy_ss, g=c.g0, m_L=c.m_L):
+    """Axial stress from the payload weight, relieved by the pressure, within the yield strength s_y."""
+    return (g * m_L) / (np.pi * (2 * R * t - t ** 2)) - p * R / (2 * t) - s_y
+
+
+def con3(L, R=c.R):
+    """Barrel at least as long as the radius, 1 - L / R."""
+    return 1 - L / R
+
+
+def closed_form_optimum(
+    R=c.R,
+    p=c.p,
+    s_t=c.st_ss,
+    rho_s=c.rho_ss,
+    L_lower=L_LOWER,
+    t_lower=T_LOWER,
+    t_upper=T_UPPER,
+    con2=False,
+    s_y=c.sy_ss,
+    g=c.g0,
+    m_L=c.m_L,
+    con3=False,
+):
+    """
+    Optimum of the OneStage sizing problem read off its active set.
+
+    m_s grows with L, and with t while the wall is thinner than the radius,
+    so the optimum is the shortest tank allowed by the L bound (and by con3,
+    L >= R, when included) with the thinnest wall allowed by the t bound and
+    con1, t >= p R / s_t. All arguments broadcast, so a batch of problems
+    is solved at once. ``ok`` marks the problems where this holds: the wall
+    fits under t_upper, t_upper < R, and con2 is satisfied there when
+    included. The rest need the optimizer.
+    """
+    R, p, s_t, rho_s, L_lower, t_lower, t_upper = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (R, p, s_t, rho_s, L_lower, t_lower, t_upper))
+    )
+
+    L = np.maximum(L_lower, R) if con3 else L_lower.copy()
+    t = np.maximum(t_lower, p * R / s_t)  # con1 = p * R / t - s_t <= 0
+    ok = (t <= t_upper) & (t_upper < R)
+
+    m_s = stage(L, t, R=R, rho_s=rho_s)["m_s"]
+
+    if con2:
+        A = np.pi * (2 * R * t - t ** 2)
+        ok &= (g * m_L) / A - p * R / (2 * t) - s_y <= 0
+
+    return L, t, m_s, ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate one stage design, or the closed-form optimum")
+    parser.add_argument("L", type=float, nargs="?", help="barrel length, m (omit for the optimum)")
+    parser.add_argument("t", type=float, nargs="?", help="wall thickness, m")
+    parser.add_argument("--p", type=float, default=c.p, help="tank pressure, Pa")
+    parser.add_argument("--s_t", type=float, default=c.st_ss, help="tensile strength, Pa")
+    args = parser.parse_args()
+
+    if args.L is None:
+        L, t, _, ok = closed_form_optimum(p=args.p, s_t=args.s_t)
+        print(f"optimum {'(closed form)' if ok else '(needs the optimizer)'}")
+    else:
+        L, t = args.L, args.t if args.t is not None else 0.01
+
+    values = stage(L, t)
+    values.update(con1=con1(t, p=args.p, s_t=args.s_t), con2=con2(t, p=args.p), con3=con3(L))
+    print(f"{'L':<10} {float(L):.6g}")
+    print(f"{'t':<10} {float(t):.6g}")
+    for name, val in values.items():
+        print(f"{name:<10} {float(val):.6g}")
@@ -9,13 +9,11 @@
 # --- Standard Python modules ---
 # --- External Python modules ---
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib import ticker
-
 
 # import pint
 
 # --- Extension modules ---
+import equations
 
 # --- Code ---
 rho_s = 1000
@@ -24,57 +22,45 @@ mL = 10
 r = 0.5
 
 
-def mass_ratio(L1, L2):
-    # --- Stage 2 ---
-    # L2 = 2.0
-    t2 = 0.005
-
-    v2 = np.pi * (r ** 2 * L2 + 4 / 3 * r ** 3)
-    vp2 = np.pi * (L2 * (r - t2) ** 2 + 4 / 3 * (r - t2) ** 3)
-    vs2 = v2 - vp2
-
-    ms2 = vs2 * rho_s
-    mp2 = vp2 * rho_p
+def mass_ratio(L1, L2, t1=0.01, t2=0.005, r=r, rho_s=rho_s, rho_p=rho_p, mL=mL):
+    # one propellant of density rho_p, so the mixture ratio drops out of equations.stage
+    props = dict(R=r, rho_s=rho_s, rho_o=rho_p, rho_f=rho_p)
 
-    m02 = ms2 + mp2 + mL
-    # mb2 = mL + ms2
-
-    # R2 = m02 / mb2
-    e2 = ms2 / (ms2 + mp2)
+    # --- Stage 2 ---
+    m02 = equations.stage(L2, t2, m_L=mL, **props)["m01"]
 
     # --- Stage 1 ---
-    # L1 = 8.0
-    t1 = 0.01
+    m01 = equations.stage(L1, t1, m_L=m02, **props)["m01"]
+    return m01 / mL
 
-    v1 = np.pi * (r ** 2 * L1 + 4 / 3 * r ** 3)
-    vp1 = np.pi * (L1 * (r - t1) ** 2 + 4 / 3 * (r - t1) ** 3)
-    vs1 = v1 - vp1
 
-    ms1 = vs1 * rho_s
-    mp1 = vp1 * rho_p
+def plot_contour(L1, L2, obj):
+    # matplotlib is only imported when a plot is asked for
+    import matplotlib.pyplot as plt
+    from matplotlib import ticker
 
-    m01 = ms1 + mp1 + m02
-    # mb1 = m02 + ms1
+    plt.figure(figsize=(8, 6))
+    plt.contour(L1, L2, obj, locator=ticker.LogLocator(), levels=100)
+    plt.colorbar()
+    plt.show()
 
-    # R1 = m01 / mb1
-    e1 = ms1 / (ms1 + mp1)
-    print(e1, e2)
-    return m01 / mL
 
+if __name__ == "__main__":
+    import sys
 
-# t_1 = np.linspace(0, 0.01, 100)
-# t_2 = np.linspace(0, 0.01, 100)
-# T1, T2 = np.meshgrid(t_1, t_2)
+    from adaptive import sample_quadtree
 
-l1 = np.linspace(1, 8, 100)
-l2 = np.linspace(1, 3, 100)
-L1, L2 = np.meshgrid(l1, l2)
+    # t_1 = np.linspace(0, 0.01, 100)
+    # t_2 = np.linspace(0, 0.01, 100)
+    # T1, T2 = np.meshgrid(t_1, t_2)
 
-# obj = mass_ratio(L1, L2)
+    # 129 x 129 grid, only evaluated where the bilinear fill would miss the contours, refined
+    # between the log-spaced levels plot_contour draws (mass_ratio grows with L1 and L2)
+    levels = {"value": np.geomspace(mass_ratio(1, 1), mass_ratio(8, 3), 100)}
+    L1, L2, fields, n_evals = sample_quadtree(mass_ratio, (1, 8), (1, 3), levels=levels, tol=1e-4, base=4, max_depth=5)
+    print(f"{n_evals} of {L1.size} grid points evaluated")
 
-# plt.figure(figsize=(8, 6))
-# plt.contour(L1, L2, obj, locator=ticker.LogLocator(), levels=100)
-# plt.colorbar()
-# plt.show()
+    if "--plot" in sys.argv:
+        plot_contour(L1, L2, fields["value"])
 
-print(mass_ratio(8, 2))
+    print(mass_ratio(8, 2))
@@ -0,0 +1,156 @@
+# --- Python 3.8 ---
+"""
+@File : multistage.py
+@Time : 2021/04/16
+@Author : Peter Atma
+@Desc : N-stage vehicle mass model, the OpenMDAO counterpart of model.mass_ratio
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+
+# --- Extension modules ---
+import equations
+import model
+
+
+class Stage(om.ExplicitComponent):
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of vehicle designs evaluated per call")
+
+    def setup(self):
+        n = self.options["vec_size"]
+
+        # --- Inputs ---
+        self.add_input("L", val=1.0, shape=n, units="m")
+        self.add_input("R", val=model.r, shape=n, units="m")
+        self.add_input("t", val=0.01, shape=n, units="m")
+        self.add_input("rho_s", val=model.rho_s, shape=n, units="kg/m ** 3")
+        self.add_input("rho_p", val=model.rho_p, shape=n, units="kg/m ** 3")
+        self.add_input("m_pay", val=model.mL, shape=n, units="kg")  # everything the stage carries
+
+        # --- Outputs ---
+        self.add_output("m_s", shape=n, units="kg")
+        self.add_output("m_p", shape=n, units="kg")
+        self.add_output("m0", shape=n, units="kg")
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        ar = np.arange(self.options["vec_size"])
+        self.declare_partials(["m_s", "m_p", "m0"], ["L", "R", "t"], rows=ar, cols=ar)
+        self.declare_partials(["m_s", "m0"], "rho_s", rows=ar, cols=ar)
+        self.declare_partials(["m_p", "m0"], "rho_p", rows=ar, cols=ar)
+        self.declare_partials("m0", "m_pay", rows=ar, cols=ar, val=1.0)
+
+    def compute(self, inputs, outputs):
+        # one propellant: equal oxidizer and fuel densities make the mixture ratio irrelevant
+        rho_p = inputs["rho_p"]
+        stage = equations.stage(
+            inputs["L"], inputs["t"], R=inputs["R"], rho_s=inputs["rho_s"], rho_o=rho_p, rho_f=rho_p,
+            m_L=inputs["m_pay"]
+        )
+
+        outputs["m_s"] = stage["m_s"]
+        outputs["m_p"] = stage["m_p"]
+        outputs["m0"] = stage["m01"]
+
+    def compute_partials(self, inputs, partials):
+        L = inputs["L"]
+        R = inputs["R"]
+        t = inputs["t"]
+        rho_s = inputs["rho_s"]
+        rho_p = inputs["rho_p"]
+
+        v, v_p = equations.tank_volumes(L, t, R)
+        dvol = equations.tank_volume_partials(L, t, R)
+
+        for name in ("L", "R", "t"):
+            dv_p = dvol["v_p"][name]
+            partials["m_s", name] = rho_s * (dvol["v"].get(name, 0.0) - dv_p)
+            partials["m_p", name] = rho_p * dv_p
+            partials["m0", name] = partials["m_s", name] + partials["m_p", name]
+        partials["m_s", "rho_s"] = v - v_p
+        partials["m_p", "rho_p"] = v_p
+        partials["m0", "rho_s"] = v - v_p
+        partials["m0", "rho_p"] = v_p
+
+
+class MassRatio(om.ExplicitComponent):
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of vehicle designs evaluated per call")
+
+    def setup(self):
+        n = self.options["vec_size"]
+
+        # --- Inputs ---
+        self.add_input("m01", shape=n, units="kg")
+        self.add_input("m_L", val=model.mL, shape=n, units="kg")
+
+        # --- Outputs ---
+        self.add_output("mass_ratio", shape=n)
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        ar = np.arange(self.options["vec_size"])
+        self.declare_partials("mass_ratio", ["m01", "m_L"], rows=ar, cols=ar)
+
+    def compute(self, inputs, outputs):
+        outputs["mass_ratio"] = inputs["m01"] / inputs["m_L"]
+
+    def compute_partials(self, inputs, partials):
+        m01 = inputs["m01"]
+        m_L = inputs["m_L"]
+
+        partials["mass_ratio", "m01"] = 1 / m_L
+        partials["mass_ratio", "m_L"] = -m01 / m_L ** 2
+
+
+class MultiStage(om.Group):
+    """
+    Stages stacked bottom (stage1) to top (stage<n>). Each stage carries the
+    gross mass m0 of the stage above it, the top stage carries the payload
+    m_L. R, rho_s and rho_p are shared by all stages; L and t are per stage
+    (``stage<i>.L``, ``stage<i>.t``).
+    """
+
+    def initialize(self):
+        self.options.declare("n_stages", types=int, default=2, desc="Number of stages")
+        self.options.declare("vec_size", types=int, default=1, desc="Number of vehicle designs evaluated per call")
+
+    def setup(self):
+        n_stages = self.options["n_stages"]
+        n = self.options["vec_size"]
+
+        # top stage first so each stage's payload is computed before it runs
+        for i in range(n_stages, 0, -1):
+            self.add_subsystem(f"stage{i}", Stage(vec_size=n), promotes_inputs=["R", "rho_s", "rho_p"])
+        self.add_subsystem("ratio_cmp", MassRatio(vec_size=n), promotes_inputs=["m_L"], promotes_outputs=["mass_ratio"])
+
+        # --- Stacking ---
+        for i in range(1, n_stages):
+            self.connect(f"stage{i + 1}.m0", f"stage{i}.m_pay")
+        self.promotes(f"stage{n_stages}", inputs=[("m_pay", "m_L")])
+        self.connect("stage1.m0", "ratio_cmp.m01")
+
+        self.set_input_defaults("R", np.full(n, model.r), units="m")
+        self.set_input_defaults("rho_s", np.full(n, model.rho_s), units="kg/m ** 3")
+        self.set_input_defaults("rho_p", np.full(n, model.rho_p), units="kg/m ** 3")
+        self.set_input_defaults("m_L", np.full(n, model.mL), units="kg")
+
+
+if __name__ == "__main__":
+    prob = om.Problem(reports=False)
+    prob.model = MultiStage(n_stages=2)
+    prob.setup()
+
+    prob.set_val("stage1.L", 8.0)
+    prob.set_val("stage1.t", 0.01)
+    prob.set_val("stage2.L", 2.0)
+    prob.set_val("stage2.t", 0.005)
+    prob.run_model()
+
+    print("mass ratio")
+    print(prob.get_val("mass_ratio")[0])
+    print(model.mass_ratio(8, 2))
@@ -0,0 +1,168 @@
+# --- Python 3.8 ---
+"""
+@File : multistart.py
+@Time : 2021/04/14
+@Author : Peter Atma
+@Desc : Process-parallel multistart optimization of the OneStage problems
+"""
+
+# --- Standard Python modules ---
+import argparse
+import importlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+
+# --- Extension modules ---
+
+# Sizing scripts providing build_problem()
+PROBLEMS = ("basecase", "mass", "one_stage", "volume")
+
+# Sampling box for the starting points, the design variable bounds are
+# open-ended on L so they cannot be used directly
+BOUNDS = {"L": (0.5, 10.0), "t": (1e-3, 0.4)}
+
+# Problem owned by the current worker process, set up once by _init_worker
+_prob = None
+
+
+def make_driver(name="pyoptsparse"):
+    if name == "pyoptsparse":
+        driver = om.pyOptSparseDriver()
+        driver.options["optimizer"] = "SLSQP"
+        driver.options["print_results"] = False
+    elif name == "scipy":
+        driver = om.ScipyOptimizeDriver(optimizer="SLSQP", disp=False)
+    else:
+        raise ValueError(f"Unknown driver '{name}', expected 'pyoptsparse' or 'scipy'")
+    return driver
+
+
+def latin_hypercube(n, bounds, seed=None):
+    """n stratified samples inside ``bounds``, one (lower, upper) pair per dimension."""
+    rng = np.random.default_rng(seed)
+    lower, upper = np.array(bounds, dtype=float).T
+    u = (np.arange(n)[:, None] + rng.random((n, lower.size))) / n
+    for j in range(lower.size):
+        u[:, j] = rng.permutation(u[:, j])
+    return lower + u * (upper - lower)
+
+
+def driver_success(result):
+    # run_driver returns a DriverResult on newer OpenMDAO and a failed flag on older ones
+    if hasattr(result, "success"):
+        return bool(result.success)
+    return not result
+
+
+def is_feasible(prob, tol=1e-6):
+    values = prob.driver.get_constraint_values()
+    for name, meta in prob.model.get_constraints().items():
+        val = values[name]
+        if meta["upper"] is not None and np.any(val > meta["upper"] + tol * max(1.0, abs(meta["upper"]))):
+            return False
+        if meta["lower"] is not None and np.any(val < meta["lower"] - tol * max(1.0, abs(meta["lower"]))):
+            return False
+        if meta["equals"] is not None and np.any(np.abs(val - meta["equals"]) > tol * max(1.0, abs(meta["equals"]))):
+            return False
+    return True
+
+
+def _init_worker(problem, driver):
+    global _prob
+    module = importlib.import_module(problem)
+    _prob = module.build_problem(make_driver(driver))
+    _prob.setup()
+    _prob.set_solver_print(level=0)
+
+
+def _solve(start):
+    L0, t0 = start
+    _prob.set_val("L", L0)
+    _prob.set_val("t", t0)
+    try:
+        success = driver_success(_prob.run_driver())
+        feasible = is_feasible(_prob)
+    except om.AnalysisError:
+        return L0, t0, np.nan, np.nan, np.nan, False, False
+
+    obj = next(iter(_prob.driver.get_objective_values(driver_scaling=False).values()))
+    return L0, t0, _prob.get_val("L")[0], _prob.get_val("t")[0], obj[0], success, feasible
+
+
+class MultistartResult:
+    """
+    All multistart solutions as columns (L0, t0, L, t, obj, success, feasible)
+    plus the best feasible optimum, or None when no start converged to one.
+    """
+
+    def __init__(self, rows):
+        cols = list(zip(*rows))
+        self.L0 = np.array(cols[0], dtype=float)
+        self.t0 = np.array(cols[1], dtype=float)
+        self.L = np.array(cols[2], dtype=float)
+        self.t = np.array(cols[3], dtype=float)
+        self.obj = np.array(cols[4], dtype=float)
+        self.success = np.array(cols[5], dtype=bool)
+        self.feasible = np.array(cols[6], dtype=bool)
+
+        ok = np.flatnonzero(self.success & self.feasible)
+        if ok.size:
+            i = ok[np.argmin(self.obj[ok])]
+            self.best = {"L": self.L[i], "t": self.t[i], "obj": self.obj[i], "start": i}
+        else:
+            self.best = None
+
+    def __len__(self):
+        return self.obj.size
+
+
+def multistart(problem="basecase", n_starts=100, bounds=None, driver="pyoptsparse", n_workers=None, seed=None):
+    """
+    Solve ``<problem>.build_problem()`` from ``n_starts`` Latin-hypercube
+    starting points for L and t.
+
+    Each worker process sets the problem up once in its initializer and then
+    runs the driver for its share of the starts.
+    """
+    if problem not in PROBLEMS:
+        raise ValueError(f"Unknown problem '{problem}', expected one of {PROBLEMS}")
+    bounds = dict(BOUNDS, **(bounds or {}))
+    starts = latin_hypercube(n_starts, [bounds["L"], bounds["t"]], seed=seed)
+
+    n_workers = n_workers or os.cpu_count()
+    if n_workers == 1:
+        _init_worker(problem, driver)
+        rows = [_solve(x) for x in starts]
+    else:
+        chunksize = max(1, n_starts // (4 * n_workers))
+        with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(problem, driver)) as pool:
+            rows = list(pool.map(_solve, starts, chunksize=chunksize))
+
+    return MultistartResult(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multistart optimization of a OneStage problem")
+    parser.add_argument("problem", nargs="?", default="basecase", choices=PROBLEMS)
+    parser.add_argument("-n", "--n-starts", type=int, default=100)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--driver", default="pyoptsparse", choices=("pyoptsparse", "scipy"))
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    res = multistart(args.problem, args.n_starts, driver=args.driver, n_workers=args.workers, seed=args.seed)
+
+    print(f"{res.success.sum()} of {len(res)} starts converged, {res.feasible.sum()} feasible")
+    if res.best is None:
+        print("no feasible optimum found")
+    else:
+        print("minimum found at")
+        print(res.best["L"])
+        print(res.best["t"])
+
+        print("minumum objective")
+        print(res.best["obj"])
@@ -0,0 +1,420 @@
+# --- Python 3.8 ---
+"""
+@File : pareto.py
+@Time : 2021/04/23
+@Author : Peter Atma
+@Desc : Pareto fronts of structural mass, mass ratio and stress margin for one stage
+"""
+
+# --- Standard Python modules ---
+import json
+import os
+
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+
+# --- Extension modules ---
+import components
+import constants as c
+import mass
+from multistart import driver_success, is_feasible, make_driver
+
+# Traded objectives and their sense, +1 minimized and -1 maximized
+OBJECTIVES = ("m_s", "mass_ratio", "margin")
+SENSE = np.array([1.0, 1.0, -1.0])
+
+# Design variables and the box the evolutionary search samples
+DESIGN_VARS = ("L", "t")
+BOUNDS = {"L": (mass.L_LOWER, 10.0), "t": (1e-4, 1e-2)}
+
+
+class Margins(om.ExplicitComponent):
+    """
+    Relative stress margins, positive when the constraint holds:
+    margin1 = -con1 / s_t and margin2 = -con2 / s_y.
+    """
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of stage designs evaluated per call")
+
+    def setup(self):
+        n = self.options["vec_size"]
+
+        # --- Inputs ---
+        self.add_input("con1", shape=n, units="Pa")
+        self.add_input("con2", shape=n, units="Pa")
+        self.add_input("s_t", val=c.st_ss, shape=n, units="Pa")
+        self.add_input("s_y", val=c.sy_ss, shape=n, units="Pa")
+
+        # --- Outputs ---
+        self.add_output("margin1", shape=n)
+        self.add_output("margin2", shape=n)
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        ar = np.arange(self.options["vec_size"])
+        self.declare_partials("margin1", ["con1", "s_t"], rows=ar, cols=ar)
+        self.declare_partials("margin2", ["con2", "s_y"], rows=ar, cols=ar)
+
+    def compute(self, inputs, outputs):
+        outputs["margin1"] = -inputs["con1"] / inputs["s_t"]
+        outputs["margin2"] = -inputs["con2"] / inputs["s_y"]
+
+    def compute_partials(self, inputs, partials):
+        s_t = inputs["s_t"]
+        s_y = inputs["s_y"]
+
+        partials["margin1", "con1"] = -1 / s_t
+        partials["margin1", "s_t"] = inputs["con1"] / s_t ** 2
+        partials["margin2", "con2"] = -1 / s_y
+        partials["margin2", "s_y"] = inputs["con2"] / s_y ** 2
+
+
+class EpsilonConstraints(om.ExplicitComponent):
+    """g_ratio = mass_ratio - eps_ratio and g_margin<i> = eps_margin - margin<i>, all feasible when <= 0."""
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of stage designs evaluated per call")
+
+    def setup(self):
+        n = self.options["vec_size"]
+
+        # --- Inputs ---
+        self.add_input("mass_ratio", shape=n)
+        self.add_input("margin1", shape=n)
+        self.add_input("margin2", shape=n)
+        self.add_input("eps_ratio", val=1e3, shape=n)
+        self.add_input("eps_margin", val=0.0, shape=n)
+
+        # --- Outputs ---
+        self.add_output("g_ratio", shape=n)
+        self.add_output("g_margin1", shape=n)
+        self.add_output("g_margin2", shape=n)
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        ar = np.arange(self.options["vec_size"])
+        self.declare_partials("g_ratio", "mass_ratio", rows=ar, cols=ar, val=1.0)
+        self.declare_partials("g_ratio", "eps_ratio", rows=ar, cols=ar, val=-1.0)
+        self.declare_partials("g_margin1", "margin1", rows=ar, cols=ar, val=-1.0)
+        self.declare_partials("g_margin2", "margin2", rows=ar, cols=ar, val=-1.0)
+        self.declare_partials(["g_margin1", "g_margin2"], "eps_margin", rows=ar, cols=ar, val=1.0)
+
+    def compute(self, inputs, outputs):
+        outputs["g_ratio"] = inputs["mass_ratio"] - inputs["eps_ratio"]
+        outputs["g_margin1"] = inputs["eps_margin"] - inputs["margin1"]
+        outputs["g_margin2"] = inputs["eps_margin"] - inputs["margin2"]
+
+
+class TradeStage(components.OneStage):
+    """
+    components.OneStage exposing every traded quantity: m_s, the mass
+    ratio m01 / m_L of the stage flown alone and the stress margins of
+    con1 and con2. Loads and materials keep their promoted names (p, s_t,
+    s_y, R, rho_s, m_L, ...) so a trade can move them.
+    """
+
+    def initialize(self):
+        super().initialize()
+        self.options.declare("outputs", types=tuple, default=("m_s", "mass_ratio"), desc="StageMass outputs to expose")
+        self.options.declare("constraints", types=tuple, default=("con1", "con2"), desc="Constraints to include")
+
+    def setup(self):
+        super().setup()
+        n = self.options["vec_size"]
+
+        self.add_subsystem("margin_cmp", Margins(vec_size=n), promotes=["*"])
+        self.add_subsystem("eps_cmp", EpsilonConstraints(vec_size=n), promotes=["*"])
+
+
+def objectives(prob):
+    """Objective columns (m_s, mass_ratio, margin) of a set-up TradeStage problem after run_model."""
+    margin = np.minimum(prob.get_val("margin1"), prob.get_val("margin2"))
+    return np.column_stack((prob.get_val("m_s"), prob.get_val("mass_ratio"), margin))
+
+
+def dominates(F, violation=None):
+    """
+    dom[i, j] is True when design i dominates design j. Feasible designs
+    dominate infeasible ones and infeasible ones are ranked by violation.
+    """
+    G = F * SENSE
+    dom = np.all(G[:, None] <= G[None], axis=2) & np.any(G[:, None] < G[None], axis=2)
+    if violation is not None:
+        feasible = violation <= 0
+        dom = np.where(feasible[:, None] & feasible[None], dom, violation[:, None] < violation[None])
+    return dom
+
+
+def nondominated_rank(dom):
+    """Front index of each design, 0 for the non-dominated set."""
+    count = dom.sum(axis=0)
+    rank = np.full(dom.shape[0], -1)
+    front = 0
+    while np.any(rank < 0):
+        current = (count == 0) & (rank < 0)
+        rank[current] = front
+        count = count - dom[current].sum(axis=0)
+        front += 1
+    return rank
+
+
+def crowding_distance(F, rank):
+    distance = np.zeros(F.shape[0])
+    for front in np.unique(rank):
+        idx = np.flatnonzero(rank == front)
+        if idx.size <= 2:
+            distance[idx] = np.inf
+            continue
+        for j in range(F.shape[1]):
+            order = idx[np.argsort(F[idx, j])]
+            span = F[order[-1], j] - F[order[0], j]
+            distance[order[[0, -1]]] = np.inf
+            if span > 0:
+                distance[order[1:-1]] += (F[order[2:], j] - F[order[:-2], j]) / span
+    return distance
+
+
+def configuration(params=None, ratio_constraint=False):
+    """Key of the problem an epsilon level is solved on: the input values set and whether the mass ratio is capped."""
+    params = {name: np.ravel(val).tolist() for name, val in sorted((params or {}).items())}
+    return json.dumps({"params": params, "ratio_constraint": bool(ratio_constraint)}, sort_keys=True)
+
+
+class ParetoArchive:
+    """
+    Non-dominated designs found so far, each under the configuration of
+    the problem it was found for, with the epsilon levels already solved
+    and their configurations, so an extended front skips them. Designs
+    are only compared with others of the same configuration: each
+    configuration keeps its own front. Saved and reloaded as .npz.
+
+    Designs are keyed by configuration(params), without the mass ratio
+    cap: the cap only steers the epsilon sweep, the front is the same.
+    """
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.X = np.empty((0, len(DESIGN_VARS)))
+        self.F = np.empty((0, len(OBJECTIVES)))
+        self.design_configs = np.empty(0, dtype=str)
+        self.eps = np.empty((0, 2))
+        self.configs = np.empty(0, dtype=str)
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    def front(self, config=configuration()):
+        """Designs and objectives of the front of ``config``."""
+        mine = self.design_configs == config
+        return self.X[mine], self.F[mine]
+
+    def add(self, X, F, config=configuration()):
+        """Merge feasible designs ``X`` with objectives ``F`` into the front of ``config``, dropping dominated ones."""
+        old_X, old_F = self.front(config)
+        X = np.vstack((old_X, np.atleast_2d(X)))
+        F = np.vstack((old_F, np.atleast_2d(F)))
+        _, unique = np.unique(np.round(X, 12), axis=0, return_index=True)
+        X, F = X[unique], F[unique]
+
+        keep = ~dominates(F).any(axis=0)
+        X, F = X[keep], F[keep]
+        if X.shape[0] > self.max_size:
+            # thin the most crowded part of the front
+            order = np.argsort(-crowding_distance(F, np.zeros(F.shape[0], dtype=int)), kind="stable")
+            X, F = X[order[: self.max_size]], F[order[: self.max_size]]
+
+        others = self.design_configs != config
+        self.X = np.vstack((self.X[others], X))
+        self.F = np.vstack((self.F[others], F))
+        self.design_configs = np.concatenate((self.design_configs[others], np.full(X.shape[0], config)))
+
+    def solved(self, eps, config=configuration()):
+        same = np.all(np.isclose(self.eps, eps, equal_nan=True), axis=1) & (self.configs == config)
+        return bool(np.any(same))
+
+    def mark_solved(self, eps, config=configuration()):
+        self.eps = np.vstack((self.eps, eps))
+        self.configs = np.append(self.configs, config)
+
+    def save(self, path):
+        np.savez(path, X=self.X, F=self.F, design_configs=self.design_configs, eps=self.eps, configs=self.configs)
+
+    @classmethod
+    def load(cls, path, max_size=1000):
+        archive = cls(max_size)
+        if os.path.exists(path):
+            data = np.load(path)
+            archive.X, archive.F, archive.eps = data["X"], data["F"], data["eps"]
+            # designs and levels saved without their configuration belong to no front and are never taken as solved
+            configs = {"design_configs": "X", "configs": "eps"}
+            for name, rows in configs.items():
+                setattr(archive, name, data[name] if name in data else np.full(data[rows].shape[0], ""))
+        return archive
+
+
+def build_problem(driver=None, params=None, ratio_constraint=False):
+    """
+    TradeStage set up for the epsilon-constraint method: minimize m_s with
+    margin1, margin2 >= eps_margin and, optionally, mass_ratio <= eps_ratio.
+    """
+    prob = om.Problem(reports=False)
+    prob.model = TradeStage()
+
+    if driver is None:
+        driver = om.pyOptSparseDriver()
+        driver.options["optimizer"] = "SLSQP"
+    prob.driver = driver
+
+    prob.model.add_design_var("L", lower=mass.L_LOWER)
+    prob.model.add_design_var("t", lower=mass.T_LOWER, upper=mass.T_UPPER)
+    prob.model.add_objective("m_s", ref=1e1)
+    prob.model.add_constraint("g_margin1", upper=0.0)
+    prob.model.add_constraint("g_margin2", upper=0.0)
+    if ratio_constraint:
+        prob.model.add_constraint("g_ratio", upper=0.0)
+
+    prob.setup()
+    prob.set_solver_print(level=0)
+    for name, val in (params or {}).items():
+        prob.set_val(name, val)
+    return prob
+
+
+def epsilon_front(margin_levels, ratio_levels=None, driver="pyoptsparse", params=None, archive=None, x0=None):
+    """
+    Epsilon-constraint front: minimum m_s for each margin level (and mass
+    ratio cap, when ``ratio_levels`` is given). Levels are solved in
+    ascending order, each warm-started from the previous optimum, and
+    levels already in ``archive`` are skipped.
+    """
+    archive = ParetoArchive() if archive is None else archive
+    prob = build_problem(make_driver(driver), params, ratio_constraint=ratio_levels is not None)
+    config = configuration(params, ratio_constraint=ratio_levels is not None)
+    x0 = dict({"L": mass.L_LOWER, "t": 1e-3}, **(x0 or {}))
+    for name, val in x0.items():
+        prob.set_val(name, val)
+
+    ratios = [np.nan] if ratio_levels is None else np.sort(ratio_levels)[::-1]
+    for k, eps_ratio in enumerate(ratios):
+        margins = np.sort(margin_levels)
+        if k % 2:
+            margins = margins[::-1]  # sweep back and forth so every step starts next to its neighbour
+        for eps_margin in margins:
+            eps = (eps_margin, eps_ratio)
+            if archive.solved(eps, config):
+                continue
+            prob.set_val("eps_margin", eps_margin)
+            if ratio_levels is not None:
+                prob.set_val("eps_ratio", eps_ratio)
+
+            try:
+                success = driver_success(prob.run_driver())
+            except om.AnalysisError:
+                success = False
+            if success and is_feasible(prob):
+                X = np.column_stack([prob.get_val(name) for name in DESIGN_VARS])
+                archive.add(X, objectives(prob), configuration(params))
+            else:
+                for name, val in x0.items():
+                    prob.set_val(name, val)
+            archive.mark_solved(eps, config)
+    return archive
+
+
+def nsga2(pop_size=100, generations=100, params=None, bounds=None, archive=None, seed=None):
+    """
+    NSGA-II over (L, t). Each population is evaluated in one run_model of a
+    vectorized TradeStage; feasible offspring are merged into the front of
+    ``params`` in ``archive``.
+    """
+    if pop_size % 2:
+        raise ValueError("pop_size must be even, crossover pairs up the parents")
+    rng = np.random.default_rng(seed)
+    archive = ParetoArchive() if archive is None else archive
+    bounds = dict(BOUNDS, **(bounds or {}))
+    lower, upper = np.array([bounds[name] for name in DESIGN_VARS], dtype=float).T
+    config = configuration(params)
+
+    prob = om.Problem(reports=False)
+    prob.model = TradeStage(vec_size=pop_size)
+    prob.setup()
+    for name, val in (params or {}).items():
+        prob.set_val(name, val)
+
+    def evaluate(X):
+        for j, name in enumerate(DESIGN_VARS):
+            prob.set_val(name, X[:, j])
+        prob.run_model()
+        margins = np.column_stack((prob.get_val("margin1"), prob.get_val("margin2")))
+        return objectives(prob), np.maximum(-margins, 0.0).sum(axis=1)
+
+    X = lower + rng.random((pop_size, lower.size)) * (upper - lower)
+    F, V = evaluate(X)
+    for _ in range(generations):
+        rank = nondominated_rank(dominates(F, V))
+        crowd = crowding_distance(F * SENSE, rank)
+
+        # binary tournament on (rank, crowding)
+        a, b = rng.integers(pop_size, size=(2, pop_size))
+        better = (rank[a] < rank[b]) | ((rank[a] == rank[b]) & (crowd[a] > crowd[b]))
+        parents = X[np.where(better, a, b)]
+
+        children = _sbx(parents, lower, upper, rng)
+        children = _mutate(children, lower, upper, rng)
+        F_c, V_c = evaluate(children)
+        archive.add(children[V_c <= 0], F_c[V_c <= 0], config)
+
+        X, F, V = np.vstack((X, children)), np.vstack((F, F_c)), np.concatenate((V, V_c))
+        rank = nondominated_rank(dominates(F, V))
+        crowd = crowding_distance(F * SENSE, rank)
+        survivors = np.lexsort((-crowd, rank))[:pop_size]
+        X, F, V = X[survivors], F[survivors], V[survivors]
+
+    return archive
+
+
+def _sbx(parents, lower, upper, rng, eta=15.0, p_cross=0.9):
+    """Simulated binary crossover of consecutive parent pairs."""
+    p1, p2 = parents[0::2], parents[1::2]
+    u = rng.random(p1.shape)
+    beta = np.where(u <= 0.5, (2 * u) ** (1 / (eta + 1)), (1 / (2 * (1 - u))) ** (1 / (eta + 1)))
+    beta[rng.random(p1.shape[0]) > p_cross] = 1.0
+    c1 = 0.5 * ((1 + beta) * p1 + (1 - beta) * p2)
+    c2 = 0.5 * ((1 - beta) * p1 + (1 + beta) * p2)
+    children = np.empty_like(parents)
+    children[0::2], children[1::2] = c1, c2
+    return np.clip(children, lower, upper)
+
+
+def _mutate(X, lower, upper, rng, eta=20.0):
+    """Polynomial mutation, one variable per design on average."""
+    mutate = rng.random(X.shape) < 1.0 / X.shape[1]
+    u = rng.random(X.shape)
+    delta = np.where(u < 0.5, (2 * u) ** (1 / (eta + 1)) - 1, 1 - (2 * (1 - u)) ** (1 / (eta + 1)))
+    return np.clip(X + mutate * delta * (upper - lower), lower, upper)
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    params = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # python pareto.py <archive.npz> extends and keeps that archive, a throwaway one otherwise
+        path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tmp, "pareto_archive.npz")
+
+        archive = ParetoArchive.load(path)
+        epsilon_front(np.linspace(0.0, 0.9, 10), driver="scipy", params=params, archive=archive)
+        print(f"{len(archive.front(configuration(params))[0])} non-dominated designs after the epsilon sweep")
+
+        nsga2(pop_size=100, generations=50, params=params, archive=archive, seed=0)
+        X, F = archive.front(configuration(params))
+        print(f"{len(X)} non-dominated designs after NSGA-II")
+        archive.save(path)
+
+    print("      L        t        m_s  mass_ratio   margin")
+    for i in np.argsort(F[:, 0])[:: max(1, len(X) // 10)]:
+        print("{:7.3f}  {:7.4f}  {:9.2f}  {:10.3f}  {:7.4f}".format(*X[i], *F[i]))
@@ -0,0 +1,196 @@
+# --- Python 3.8 ---
+"""
+@File : profiling.py
+@Time : 2021/05/01
+@Author : Peter Atma
+@Desc : Per-component call counts and times, driver iteration timings and memory high-water marks
+"""
+
+# --- Standard Python modules ---
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- External Python modules ---
+import openmdao.api as om
+
+# --- Extension modules ---
+
+# Driver methods timed as iterations: one model evaluation or one total derivative evaluation
+ITERATIONS = {"_run_solve_nonlinear": "model", "_compute_totals": "totals"}
+
+
+def max_rss():
+    """Peak resident set size of this process in bytes, None where the platform does not report it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profiler:
+    """
+    Times the hot paths of a set up Problem by wrapping methods of its
+    instances (the classes are left alone):
+
+    - ``compute``, ``compute_partials`` and ``_linearize`` of every
+      component. _linearize holds the complex-step or finite-difference
+      partials, and the compute calls they make are nested under it.
+    - ``_linearize`` (assembly and factorization) and ``solve`` of every
+      group's linear solver other than LinearRunOnce, and ``_linearize`` of
+      groups with approximated totals.
+    - the driver's model and total derivative evaluations, each kept as one
+      iteration with its time and the memory high-water mark after it.
+
+    A call costs two perf_counter reads and a few dict updates, so it can
+    be left on. ``trace_memory`` adds the tracemalloc peak of Python
+    allocations, which is much slower. Use as
+    ``with Profiler(prob) as prof: prob.run_driver()`` after prob.setup().
+    detach puts back whatever was there before, including methods other
+    code has already wrapped on the instances (cache.enable_cache).
+    """
+
+    def __init__(self, prob, trace_memory=False):
+        self.prob = prob
+        self.trace_memory = trace_memory
+        self.calls = defaultdict(lambda: [0, 0.0])  # frame -> [count, cumulative time]
+        self.stacks = defaultdict(float)  # stack of frames -> exclusive time
+        self.iterations = []
+        self._stack = []
+        self._child_time = []
+        self._patched = []
+        self._rss_start = None
+        self._traced_peak = None
+
+    def __enter__(self):
+        self.attach()
+        return self
+
+    def __exit__(self, *exc):
+        self.detach()
+
+    def attach(self):
+        prob = self.prob
+        for system in prob.model.system_iter(include_self=True, recurse=True):
+            path = system.pathname or "model"
+            if isinstance(system, om.ExplicitComponent):
+                for method in ("compute", "compute_partials", "_linearize"):
+                    self._wrap(system, method, f"{path}.{method.lstrip('_')}")
+            elif isinstance(system, om.Group):
+                if system._owns_approx_jac:
+                    self._wrap(system, "_linearize", f"{path}.linearize")
+                solver = system.linear_solver
+                if solver is not None and not isinstance(solver, om.LinearRunOnce):
+                    self._wrap(solver, "_linearize", f"{path}.{type(solver).__name__}.linearize")
+                    self._wrap(solver, "solve", f"{path}.{type(solver).__name__}.solve")
+
+        for method, kind in ITERATIONS.items():
+            self._wrap(prob.driver, method, f"driver.{kind}", kind)
+        self._wrap(prob, "run_driver", "run_driver")
+        self._wrap(prob, "run_model", "run_model")
+
+        self._rss_start = max_rss()
+        if self.trace_memory:
+            tracemalloc.start()
+
+    def detach(self):
+        for obj, method, previous in reversed(self._patched):
+            if previous is None:
+                delattr(obj, method)
+            else:
+                setattr(obj, method, previous)
+        self._patched = []
+        if self.trace_memory and tracemalloc.is_tracing():
+            self._traced_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def _wrap(self, obj, method, frame, iteration=None):
+        original = getattr(obj, method)
+
+        def timed(*args, **kwargs):
+            self._stack.append(frame)
+            self._child_time.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.stacks[tuple(self._stack)] += elapsed - self._child_time.pop()
+                self._stack.pop()
+                if self._child_time:
+                    self._child_time[-1] += elapsed
+                stat = self.calls[frame]
+                stat[0] += 1
+                stat[1] += elapsed
+                if iteration is not None:
+                    self.iterations.append({"kind": iteration, "time": elapsed, "max_rss": max_rss()})
+
+        # an attribute of the instance itself is restored on detach, a method of the class is uncovered
+        self._patched.append((obj, method, vars(obj).get(method)))
+        setattr(obj, method, timed)
+
+    def memory(self):
+        """Memory high-water marks in bytes: resident set before and after, tracemalloc peak if traced."""
+        mem = {"max_rss_start": self._rss_start, "max_rss": max_rss()}
+        if self.trace_memory:
+            traced = tracemalloc.is_tracing()
+            mem["traced_peak"] = tracemalloc.get_traced_memory()[1] if traced else self._traced_peak
+        return mem
+
+    def report(self):
+        """Everything recorded so far as a JSON-serializable dict."""
+        return {
+            "calls": {frame: {"count": count, "time": total} for frame, (count, total) in self.calls.items()},
+            "iterations": list(self.iterations),
+            "memory": self.memory(),
+        }
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=1)
+
+    def to_folded(self, path):
+        """Exclusive time per call stack in microseconds, one ``frame;frame;frame value`` line each (flamegraph.pl)."""
+        with open(path, "w") as f:
+            for stack, elapsed in sorted(self.stacks.items()):
+                f.write(f"{';'.join(stack)} {int(round(elapsed * 1e6))}\n")
+
+    def table(self, top=15):
+        """The ``top`` frames by cumulative time as a text table."""
+        rows = sorted(self.calls.items(), key=lambda item: -item[1][1])[:top]
+        lines = [f"{'frame':<40} {'calls':>8} {'total ms':>10} {'per call us':>12}"]
+        for frame, (count, total) in rows:
+            lines.append(f"{frame:<40} {count:>8} {total * 1e3:>10.2f} {total / count * 1e6:>12.1f}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import basecase
+    from multistart import make_driver
+
+    for method in (None, "cs"):
+        prob = basecase.build_problem(make_driver("scipy"), method=method)
+        prob.setup(force_alloc_complex=method == "cs")
+        prob.set_solver_print(level=0)
+
+        with Profiler(prob) as prof:
+            prob.run_driver()
+
+        print(f"--- {'analytic' if method is None else method} totals ---")
+        print(prof.table())
+        times = {kind: [it["time"] for it in prof.iterations if it["kind"] == kind] for kind in ITERATIONS.values()}
+        print(", ".join(f"{len(val)} {kind} evaluations {sum(val) * 1e3:.2f} ms" for kind, val in times.items()))
+        print(f"max rss {prof.memory()['max_rss'] / 2 ** 20:.1f} MiB")
+
+    # python profiling.py <dir> keeps the last profile as <dir>/profile.json and <dir>/profile.folded
+    if len(sys.argv) > 1:
+        prof.to_json(os.path.join(sys.argv[1], "profile.json"))
+        prof.to_folded(os.path.join(sys.argv[1], "profile.folded"))
@@ -0,0 +1,206 @@
+# --- Python 3.8 ---
+"""
+@File : rbdo.py
+@Time : 2021/04/22
+@Author : Peter Atma
+@Desc : Reliability-based sizing of mass.OneStage with sampled chance constraints
+"""
+
+# --- Standard Python modules ---
+import functools
+import zlib
+
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+from scipy.special import ndtr
+
+# --- Extension modules ---
+import components
+import equations
+import mass
+import uq
+
+# Chance-constrained outputs: name -> (equations function, smoothing scale in the constraint's units)
+CHANCE_CONSTRAINTS = {
+    "con1": (equations.con1, 1e7),
+    "con2": (equations.con2, 1e6),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def common_samples(name, n, seed):
+    """
+    Standard normal samples for uncertain input ``name``. Cached and seeded
+    per name, so every constraint and every optimizer iteration sees the
+    same samples of a given input (common random numbers).
+    """
+    z = np.random.default_rng([seed, zlib.crc32(name.encode())]).standard_normal(n)
+    z.flags.writeable = False
+    return z
+
+
+class ChanceConstraint(om.ExplicitComponent):
+    """
+    Probability that a constraint output is violated (positive) when some of
+    its inputs scatter, estimated over a fixed set of samples.
+
+    The indicator of violation is smoothed to the normal CDF of g / scale,
+    so the estimate and its analytic partials vary smoothly with the
+    remaining (deterministic) inputs. The samples are drawn once, so the
+    cost per evaluation is one vectorized pass over them.
+
+    The smoothed estimate is P(g + scale Z > 0) with Z standard normal: it
+    widens the scatter of g and overstates small probabilities unless the
+    scale is small against that scatter. A scale small enough for that
+    makes the estimate step between samples, so optimize with anneal,
+    which shrinks the scale between warm-started runs.
+    """
+
+    def initialize(self):
+        self.options.declare("constraint", desc="Vectorized constraint function, e.g. equations.con1")
+        self.options.declare("output", types=str, desc="Constraint name, a key of components.CONSTRAINT_INPUTS")
+        self.options.declare("distributions", types=dict, desc="Uncertain inputs, name -> uq distribution")
+        self.options.declare("scale", types=float, default=1.0, desc="Smoothing width in the constraint's units")
+        self.options.declare("n_samples", types=int, default=10000, desc="Number of common random samples")
+        self.options.declare("seed", types=int, default=0, desc="Seed of the common random samples")
+
+    def setup(self):
+        output = self.options["output"]
+        dists = self.options["distributions"]
+        n = self.options["n_samples"]
+        seed = self.options["seed"]
+
+        names = components.CONSTRAINT_INPUTS[output]
+        self._deterministic = [name for name in names if name not in dists]
+        self._samples = {
+            name: dist.transform(common_samples(name, n, seed)) for name, dist in dists.items() if name in names
+        }
+
+        # --- Inputs ---
+        for name in self._deterministic:
+            val, units = components.INPUTS[name]
+            self.add_input(name, val=val, units=units)
+
+        # --- Outputs ---
+        self.add_output(f"P_{output}", val=0.0)
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        self.declare_partials(f"P_{self.options['output']}", self._deterministic)
+
+    def _evaluate(self, inputs, step=None):
+        """Constraint over the samples, divided by the smoothing scale, with input ``step`` = (name, dx) added."""
+        values = {name: inputs[name] for name in self._deterministic}
+        if step is not None:
+            values[step[0]] = values[step[0]] + step[1]
+        return self.options["constraint"](**values, **self._samples) / self.options["scale"]
+
+    def compute(self, inputs, outputs):
+        outputs[f"P_{self.options['output']}"] = np.mean(ndtr(self._evaluate(inputs)))
+
+    def compute_partials(self, inputs, partials):
+        output = self.options["output"]
+        g = self._evaluate(inputs)
+
+        # d/dx mean(Phi(g / h)) = mean(phi(g / h) * d(g / h)/dx), the inner derivative by complex step
+        weight = np.exp(-0.5 * g ** 2) / np.sqrt(2 * np.pi)
+        for name in self._deterministic:
+            dg = self._evaluate(inputs, (name, 1e-30j)).imag / 1e-30
+            partials[f"P_{output}", name] = np.mean(weight * dg)
+
+
+class ReliableOneStage(om.Group):
+    """mass.OneStage with con1 and con2 replaced by their violation probabilities P_con1 and P_con2."""
+
+    def initialize(self):
+        self.options.declare("distributions", types=dict, default=uq.DISTRIBUTIONS, desc="Uncertain inputs")
+        self.options.declare("n_samples", types=int, default=10000, desc="Number of common random samples")
+        self.options.declare("seed", types=int, default=0, desc="Seed of the common random samples")
+
+    def setup(self):
+        self.add_subsystem(
+            "obj_cmp", components.StageMass(outputs=("m_s",)), promotes_inputs=["t", "L"], promotes_outputs=["m_s"]
+        )
+        for name, (constraint, scale) in CHANCE_CONSTRAINTS.items():
+            self.add_subsystem(
+                f"{name}_cmp",
+                ChanceConstraint(
+                    constraint=constraint,
+                    output=name,
+                    distributions=self.options["distributions"],
+                    scale=scale,
+                    n_samples=self.options["n_samples"],
+                    seed=self.options["seed"],
+                ),
+                promotes_inputs=["t"],
+                promotes_outputs=[f"P_{name}"],
+            )
+
+        self.set_input_defaults("t", 1e-3, units="m")
+        self.set_input_defaults("L", 0.5, units="m")
+
+
+def build_problem(driver=None, beta=1e-3, distributions=uq.DISTRIBUTIONS, n_samples=10000, seed=0):
+    """mass.build_problem with the chance constraints P_con1, P_con2 <= beta."""
+    prob = om.Problem(reports=False)
+    prob.model = ReliableOneStage(distributions=distributions, n_samples=n_samples, seed=seed)
+
+    if driver is None:
+        driver = om.pyOptSparseDriver()
+        driver.options["optimizer"] = "SLSQP"
+    prob.driver = driver
+
+    prob.model.add_design_var("L", lower=mass.L_LOWER)
+    # t scaled to order one, or SLSQP's path turns on the last bits of the gradients
+    prob.model.add_design_var("t", lower=mass.T_LOWER, upper=mass.T_UPPER, ref=1e-3)
+    prob.model.add_objective("m_s")
+    for name in CHANCE_CONSTRAINTS:
+        prob.model.add_constraint(f"P_{name}", upper=beta, ref=beta)
+
+    return prob
+
+
+def anneal(prob, factors=(1.0, 0.3, 0.1)):
+    """
+    run_driver with the smoothing scale of every ChanceConstraint set to
+    each of ``factors`` times its own, warm-starting each run from the last
+    optimum. Ends at the smallest scale, the scales are restored after.
+    Returns the result of the last run.
+    """
+    comps = list(prob.model.system_iter(recurse=True, typ=ChanceConstraint))
+    scales = [comp.options["scale"] for comp in comps]
+    try:
+        for factor in factors:
+            for comp, scale in zip(comps, scales):
+                comp.options["scale"] = scale * factor
+            result = prob.run_driver()
+    finally:
+        for comp, scale in zip(comps, scales):
+            comp.options["scale"] = scale
+    return result
+
+
+if __name__ == "__main__":
+    L, t, m_s, ok = mass.closed_form_optimum()
+    print("deterministic optimum", L, t, m_s)
+
+    # 1e5 samples put about 100 in the 1e-3 tail, 1e4 leave the estimate some 30% off
+    prob = build_problem(om.ScipyOptimizeDriver(optimizer="SLSQP"), beta=1e-3, n_samples=100000)
+    prob.setup()
+    prob.set_solver_print(level=0)
+    # start on the safe side of the deterministic optimum, where P_con1 is near 0
+    prob.set_val("t", 1.2 * t)
+
+    anneal(prob)
+
+    print("reliable optimum", prob.get_val("L")[0], prob.get_val("t")[0], prob.get_val("m_s")[0])
+    print("P_con1", prob.get_val("P_con1")[0], "P_con2", prob.get_val("P_con2")[0])
+
+    # the chance constraints without smoothing, on fresh samples
+    rng = np.random.default_rng(1)
+    samples = {name: dist.transform(rng.standard_normal(10 ** 6)) for name, dist in uq.DISTRIBUTIONS.items()}
+    for name, (constraint, _) in CHANCE_CONSTRAINTS.items():
+        scattered = {inp: samples[inp] for inp in components.CONSTRAINT_INPUTS[name] if inp in samples}
+        g = constraint(t=prob.get_val("t"), **scattered)
+        print(f"{name} violated on {np.mean(g > 0):.2e} of 1e6 fresh samples")
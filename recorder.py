@@ -0,0 +1,206 @@
+# --- Python 3.8 ---
+"""
+@File : recorder.py
+@Time : 2021/04/25
+@Author : Peter Atma
+@Desc : Sampled, buffered binary recorder of driver iterations with background flushing
+"""
+
+# --- Standard Python modules ---
+import json
+import os
+import queue
+import threading
+
+# --- External Python modules ---
+import numpy as np
+from openmdao.recorders.case_recorder import CaseRecorder
+
+# --- Extension modules ---
+
+# Variables recorded when none are chosen
+VARIABLES = ("L", "t")
+
+
+class BufferedRecorder(CaseRecorder):
+    """
+    Driver recorder that keeps every ``every``-th iteration of a few
+    variables. Rows are packed into float64 buffers of ``buffer_size``
+    rows, and full buffers are written by a background thread, so the
+    optimization only pays for a copy per recorded iteration.
+
+    The file at ``path`` is the raw rows. ``path + ".json"`` lists the
+    columns, and read_history turns both back into arrays. Use
+    attach_recorder, which maps the promoted names to the sources the
+    driver reports.
+
+    Problem.cleanup shuts the recorder down and drops it from the driver.
+    Added to the driver again and started by the next setup, it appends to
+    the same file, with the iteration count back at zero. The variables
+    must keep their sizes between runs.
+    """
+
+    def __init__(self, path, sources, every=1, buffer_size=1024):
+        super().__init__(record_viewer_data=False)
+        self.path = path
+        self.sources = dict(sources)
+        self.every = every
+        self.buffer_size = buffer_size
+
+        self._seen = 0
+        self._rows = 0
+        self._buffer = None
+        self._fill = 0
+        self._queue = None
+        self._thread = None
+        self._file = None
+        self._columns = None
+
+    def startup(self, recording_requester, comm=None):
+        super().startup(recording_requester, comm)
+        if self._thread is None:
+            self._seen = 0
+            self._buffer = None
+            self._fill = 0
+            self._file = open(self.path, "wb" if self._columns is None else "ab")
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._writer, daemon=True)
+            self._thread.start()
+
+    def _writer(self):
+        while True:
+            block = self._queue.get()
+            if block is None:
+                break
+            self._file.write(block.tobytes())
+        self._file.flush()
+
+    def _layout(self, outputs):
+        columns = [["iteration", 1]]
+        columns += [[name, int(np.size(outputs[src]))] for name, src in self.sources.items()]
+        if self._columns is not None and columns != self._columns:
+            raise ValueError(f"Recorded variables changed size since the last run: {self._columns} -> {columns}")
+        self._columns = columns
+        with open(self.path + ".json", "w") as f:
+            json.dump({"columns": columns, "every": self.every}, f)
+        self._width = sum(size for _, size in columns)
+        self._buffer = np.empty((self.buffer_size, self._width))
+
+    def record_iteration_driver(self, recording_requester, data, metadata):
+        self._seen += 1
+        if (self._seen - 1) % self.every:
+            return
+
+        outputs = data["output"]
+        if self._buffer is None:
+            self._layout(outputs)
+
+        row = self._buffer[self._fill]
+        row[0] = self._seen - 1
+        col = 1
+        for src in self.sources.values():
+            val = np.ravel(outputs[src])
+            row[col : col + val.size] = val.real
+            col += val.size
+
+        self._fill += 1
+        self._rows += 1
+        if self._fill == self.buffer_size:
+            self._queue.put(self._buffer)
+            self._buffer = np.empty_like(self._buffer)
+            self._fill = 0
+
+    def flush(self):
+        """Hand the partly filled buffer to the writer thread."""
+        if self._fill:
+            self._queue.put(self._buffer[: self._fill].copy())
+            self._fill = 0
+
+    def shutdown(self):
+        if self._thread is None:
+            return
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._thread = None
+
+    def record_metadata_system(self, system, run_number=None):
+        pass
+
+    def record_metadata_solver(self, solver, run_number=None):
+        pass
+
+    def record_viewer_data(self, model_viewer_data):
+        pass
+
+
+def attach_recorder(prob, path, variables=VARIABLES, every=1, buffer_size=1024):
+    """
+    Record ``variables`` (promoted names, e.g. "L", "t", "m_s", "con1")
+    of a set-up problem's driver every ``every`` iterations. Only those
+    variables are gathered from the model on each iteration.
+    """
+    sources = {name: prob.model.get_source(name) for name in variables}
+    recorder = BufferedRecorder(path, sources, every=every, buffer_size=buffer_size)
+
+    # design variables and responses are recorded anyway, naming them again only raises warnings
+    responses = set(prob.model.get_design_vars(get_sizes=False, use_prom_ivc=True))
+    responses |= set(prob.model.get_responses(get_sizes=False, use_prom_ivc=True))
+    options = prob.driver.recording_options
+    options["includes"] = [name for name in variables if name not in responses]
+    options["record_inputs"] = False
+    options["record_residuals"] = False
+    prob.driver.add_recorder(recorder)
+    return recorder
+
+
+def read_history(path):
+    """Recorded iterations as a dict of arrays, one row per recorded iteration."""
+    with open(path + ".json") as f:
+        columns = json.load(f)["columns"]
+    width = sum(size for _, size in columns)
+    n = os.path.getsize(path) // (8 * width)
+    rows = np.fromfile(path, dtype=np.float64, count=n * width).reshape(n, width)
+
+    history = {}
+    col = 0
+    for name, size in columns:
+        history[name] = rows[:, col] if size == 1 else rows[:, col : col + size]
+        col += size
+    history["iteration"] = history["iteration"].astype(int)
+    return history
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import time
+
+    import openmdao.api as om
+
+    import mass
+    from multistart import make_driver
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # python recorder.py <dir> keeps the histories in <dir>
+        out = sys.argv[1] if len(sys.argv) > 1 else tmp
+        for mode in ("none", "buffered", "sqlite"):
+            prob = mass.build_problem(make_driver("scipy"))
+            prob.setup()
+            prob.set_solver_print(level=0)
+            if mode == "buffered":
+                attach_recorder(prob, os.path.join(out, "history.bin"), ("L", "t", "m_s", "con1"))
+            elif mode == "sqlite":
+                prob.driver.add_recorder(om.SqliteRecorder(os.path.join(out, "history.sql")))
+
+            start = time.perf_counter()
+            prob.run_driver()
+            prob.cleanup()
+            timings[mode] = time.perf_counter() - start
+
+        history = read_history(os.path.join(out, "history.bin"))
+    print(f"{history['iteration'].size} iterations recorded")
+    print("final", ", ".join(f"{name} = {val[-1]:.6g}" for name, val in history.items()))
+    print(", ".join(f"{mode} {val:.4f} s" for mode, val in timings.items()))
@@ -0,0 +1,263 @@
+# --- Python 3.8 ---
+"""
+@File : service.py
+@Time : 2021/04/29
+@Author : Peter Atma
+@Desc : Asyncio service sizing stages on request, with coalescing, batching and a worker pool
+"""
+
+# --- Standard Python modules ---
+import asyncio
+import functools
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# --- External Python modules ---
+import numpy as np
+
+# --- Extension modules ---
+import basecase
+import equations
+from components import INPUTS
+from multistart import driver_success, is_feasible, make_driver
+
+# Inputs a request may set, everything but the design variables
+PARAMETERS = tuple(name for name in INPUTS if name not in ("L", "t"))
+
+# Problem owned by the current worker process, set up once by _init_worker
+_prob = None
+
+
+def _init_worker(driver):
+    global _prob
+    _prob = basecase.build_problem(make_driver(driver))
+    _prob.setup()
+    _prob.set_solver_print(level=0)
+
+
+def _optimize(params):
+    """Run the pre-built basecase problem at ``params``, every other input back at its default."""
+    for name in PARAMETERS:
+        _prob.set_val(name, params.get(name, INPUTS[name][0]))
+    _prob.set_val("L", 1.0)
+    _prob.set_val("t", 0.01)
+    success = driver_success(_prob.run_driver())
+    return {
+        "L": float(_prob.get_val("L")[0]),
+        "t": float(_prob.get_val("t")[0]),
+        "m01": float(_prob.get_val("m01")[0]),
+        "success": success and is_feasible(_prob),
+        "method": "SLSQP",
+    }
+
+
+def closed_form_batch(batch):
+    """
+    basecase optimum of every parameter dict in ``batch`` at once, from
+    equations.closed_form_optimum. m01 grows with L and, while the wall is
+    denser than the propellant, with t, so the m_s active set carries over.
+    Returns the results and a mask of the requests it is valid for.
+    """
+    values = {name: np.array([params.get(name, INPUTS[name][0]) for params in batch]) for name in PARAMETERS}
+    L, t, _, ok = equations.closed_form_optimum(
+        R=values["R"],
+        p=values["p"],
+        s_t=values["s_t"],
+        rho_s=values["rho_s"],
+        L_lower=basecase.L_LOWER,
+        t_lower=basecase.T_LOWER,
+        t_upper=basecase.T_UPPER,
+        con2=True,
+        s_y=values["s_y"],
+        g=values["g"],
+        m_L=values["m_L"],
+        con3=True,
+    )
+    stage = equations.stage(L, t, **{name: values[name] for name in ("R", "rho_s", "rho_o", "rho_f", "OF", "m_L")})
+    ok &= values["rho_s"] > stage["m_p"] / stage["v_p"]
+
+    results = [
+        {"L": float(L[i]), "t": float(t[i]), "m01": float(stage["m01"][i]), "success": True, "method": "closed-form"}
+        for i in range(len(batch))
+    ]
+    return results, ok
+
+
+class SizingService:
+    """
+    Queue of "size a stage for these loads and materials" requests, each a
+    basecase optimization.
+
+    - Requests whose parameters agree to ``bits`` mantissa bits share one
+      solve, and solved ones are answered from an LRU of ``cache_size``.
+    - The dispatcher gathers up to ``max_batch`` queued requests, waiting at
+      most ``max_wait`` seconds, and solves them with one vectorized closed
+      form evaluation.
+    - Requests the closed form does not cover go to ``n_workers`` processes,
+      each holding a problem set up once.
+
+    Use as ``async with SizingService() as service: await service.size(m_L=500)``.
+    """
+
+    def __init__(
+        self,
+        n_workers=None,
+        driver="scipy",
+        max_batch=256,
+        max_wait=0.002,
+        bits=20,
+        cache_size=4096,
+    ):
+        self.n_workers = n_workers or os.cpu_count()
+        self.driver = driver
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.scale = 2.0 ** bits
+        self.cache_size = cache_size
+
+        self.counts = dict.fromkeys(("requests", "coalesced", "cached", "batches", "closed_form", "optimized"), 0)
+        self.latencies = []
+        self._results = OrderedDict()
+        self._pending = {}
+        self._queue = None
+        self._pool = None
+        self._dispatcher = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._pool = ProcessPoolExecutor(self.n_workers, initializer=_init_worker, initargs=(self.driver,))
+        self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def stop(self):
+        await self._queue.put(None)
+        await self._dispatcher
+        if self._pending:
+            await asyncio.gather(*self._pending.values(), return_exceptions=True)
+        self._pool.shutdown()
+
+    def key(self, params):
+        """Parameters quantized to ``bits`` mantissa bits, so near-identical requests share a key."""
+        unknown = set(params) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown parameters {sorted(unknown)}, expected any of {PARAMETERS}")
+        vals = np.array([params.get(name, INPUTS[name][0]) for name in PARAMETERS], dtype=float)
+        mantissa, exponent = np.frexp(vals)
+        return np.rint(mantissa * self.scale).tobytes() + exponent.tobytes()
+
+    async def size(self, **params):
+        """Optimum L, t and m01 for ``params`` (any of PARAMETERS, the rest at their defaults)."""
+        start = time.perf_counter()
+        self.counts["requests"] += 1
+        key = self.key(params)
+
+        if key in self._results:
+            self.counts["cached"] += 1
+            self._results.move_to_end(key)
+            result = self._results[key]
+        elif key in self._pending:
+            self.counts["coalesced"] += 1
+            result = await asyncio.shield(self._pending[key])
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            await self._queue.put((key, params))
+            result = await asyncio.shield(future)
+
+        self.latencies.append(time.perf_counter() - start)
+        return dict(result)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._solve(batch)
+
+    def _solve(self, batch):
+        self.counts["batches"] += 1
+        # a failing batch fails its own requests, the dispatcher keeps serving the queue
+        try:
+            results, ok = closed_form_batch([params for _, params in batch])
+        except Exception as exc:
+            for key, _ in batch:
+                self._fail(key, exc)
+            return
+        loop = asyncio.get_running_loop()
+        for (key, params), result, valid in zip(batch, results, ok):
+            if valid:
+                self.counts["closed_form"] += 1
+                self._finish(key, result)
+                continue
+            self.counts["optimized"] += 1
+            try:
+                job = loop.run_in_executor(self._pool, _optimize, params)
+            except Exception as exc:  # e.g. a broken pool
+                self._fail(key, exc)
+            else:
+                job.add_done_callback(functools.partial(self._done, key))
+
+    def _done(self, key, job):
+        if job.exception() is not None:
+            self._fail(key, job.exception())
+        else:
+            self._finish(key, job.result())
+
+    def _fail(self, key, exc):
+        self._pending.pop(key).set_exception(exc)
+
+    def _finish(self, key, result):
+        self._results[key] = result
+        if len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+        self._pending.pop(key).set_result(result)
+
+    def latency_percentiles(self, q=(50, 90, 99)):
+        """Request latency percentiles in milliseconds, from submission to answer."""
+        if not self.latencies:
+            return {}
+        return dict(zip(q, np.percentile(np.array(self.latencies) * 1e3, q)))
+
+
+if __name__ == "__main__":
+
+    async def main():
+        rng = np.random.default_rng(0)
+        # a few hundred distinct requests, each repeated and slightly jittered; the
+        # heaviest payloads break con2 at the closed-form wall and need the optimizer
+        payloads = rng.choice(np.r_[np.linspace(100, 5e4, 300), np.linspace(1e5, 2e5, 4)], 5000)
+        pressures = rng.choice(np.linspace(0.2e6, 0.6e6, 5), 5000) * (1 + 1e-9 * rng.standard_normal(5000))
+
+        async with SizingService(n_workers=2, driver="scipy") as service:
+            start = time.perf_counter()
+            results = await asyncio.gather(*(service.size(m_L=m_L, p=p) for m_L, p in zip(payloads, pressures)))
+            elapsed = time.perf_counter() - start
+
+        print(f"{len(results)} requests in {elapsed:.3f} s")
+        print(", ".join(f"{name} {val}" for name, val in service.counts.items()))
+        print(", ".join(f"p{q} {val:.2f} ms" for q, val in service.latency_percentiles().items()))
+        heavy = max(results, key=lambda res: res["m01"])
+        print("heaviest", heavy)
+
+    asyncio.run(main())
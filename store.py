@@ -0,0 +1,279 @@
+# --- Python 3.8 ---
+"""
+@File : store.py
+@Time : 2021/04/24
+@Author : Peter Atma
+@Desc : Columnar on-disk store of OneStage optimization results indexed by parameter hash
+"""
+
+# --- Standard Python modules ---
+import contextlib
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+
+# --- Extension modules ---
+from multistart import PROBLEMS, driver_success, is_feasible, make_driver
+
+# Bumped when the stored columns or the key layout change
+SCHEMA_VERSION = 1
+
+# Modules every problem's results depend on, besides the problem module itself
+MODEL_MODULES = ("constants", "equations", "components")
+
+# One row per optimization run
+RUN_COLUMNS = {
+    "key": "S32",
+    "problem": "S16",
+    "driver": "S16",
+    "success": "?",
+    "feasible": "?",
+    "L": "f8",
+    "t": "f8",
+    "obj": "f8",
+    "n_iter": "i8",
+    "hist_start": "i8",
+    "elapsed": "f8",
+    "created": "f8",
+}
+
+# One row per driver iteration of every run
+HISTORY_COLUMNS = {
+    "run": "i8",
+    "iteration": "i8",
+    "L": "f8",
+    "t": "f8",
+    "obj": "f8",
+    "max_violation": "f8",
+}
+
+
+def model_version(problem):
+    """Hash of the sources ``problem``'s results depend on, so edits to the model miss the store."""
+    digest = hashlib.blake2b(digest_size=16)
+    for module in MODEL_MODULES + (problem,):
+        with open(importlib.util.find_spec(module).origin, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def parameter_key(problem, driver, params=None, x0=None):
+    """Hash identifying a configuration: schema and model version, problem, driver, input values and starting point."""
+    config = {
+        "schema": SCHEMA_VERSION,
+        "model": model_version(problem),
+        "problem": problem,
+        "driver": driver,
+        "params": {name: np.ravel(val).tolist() for name, val in sorted((params or {}).items())},
+        "x0": {name: np.ravel(val).tolist() for name, val in sorted((x0 or {}).items())},
+    }
+    return hashlib.blake2b(json.dumps(config, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+class Table:
+    """
+    Append-only table stored as one raw binary file per column. Columns
+    are read back as read-only memory maps, so lookups do not load the
+    table. Appends write one column after the other and are not atomic:
+    a table takes a single writer at a time, which ResultStore enforces
+    with a file lock.
+    """
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def __len__(self):
+        name, dtype = next(iter(self.columns.items()))
+        path = self._file(name)
+        return os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+
+    def column(self, name):
+        n = len(self)
+        if n == 0:
+            return np.empty(0, dtype=self.columns[name])
+        return np.memmap(self._file(name), dtype=self.columns[name], mode="r", shape=(n,))
+
+    def row(self, i):
+        return {name: self.column(name)[i].item() for name in self.columns}
+
+    def append(self, **values):
+        """Append rows given as equal-length arrays (or scalars) for every column."""
+        arrays = {name: np.atleast_1d(np.asarray(values[name], dtype=dtype)) for name, dtype in self.columns.items()}
+        for name, arr in arrays.items():
+            with open(self._file(name), "ab") as f:
+                f.write(arr.tobytes())
+
+
+class ResultStore:
+    """
+    Runs and iteration histories under ``root``, with an in-memory index
+    from parameter hash to run row built from the key column on open.
+    Input values of each run are kept alongside in params.jsonl. Records
+    from several processes are serialized by an exclusive lock on
+    ``root/.lock`` (POSIX only, without fcntl a store takes one writer).
+    """
+
+    def __init__(self, root="results"):
+        self.root = root
+        self.runs = Table(os.path.join(root, "runs"), RUN_COLUMNS)
+        self.iterations = Table(os.path.join(root, "history"), HISTORY_COLUMNS)
+        self.index = {key.decode(): i for i, key in enumerate(self.runs.column("key"))}
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.runs)
+
+    def lookup(self, key):
+        """Stored result for ``key``, or None."""
+        i = self.index.get(key)
+        if i is None:
+            return None
+        res = self.runs.row(i)
+        for name in ("key", "problem", "driver"):
+            res[name] = res[name].decode()
+        return res
+
+    def history(self, key):
+        """Driver iteration history of run ``key`` as a dict of columns."""
+        res = self.lookup(key)
+        if res is None:
+            raise KeyError(key)
+        rows = slice(res["hist_start"], res["hist_start"] + res["n_iter"])
+        return {name: np.array(self.iterations.column(name)[rows]) for name in HISTORY_COLUMNS}
+
+    @contextlib.contextmanager
+    def _lock(self):
+        with open(os.path.join(self.root, ".lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def record(self, key, problem, driver, params, result, history):
+        """Append one run and its history. ``history`` maps HISTORY_COLUMNS (but run) to arrays."""
+        with self._lock():
+            self._record(key, problem, driver, params, result, history)
+
+    def _record(self, key, problem, driver, params, result, history):
+        run = len(self.runs)
+        n_iter = len(history["iteration"])
+        self.iterations.append(run=np.full(n_iter, run), **history)
+        self.runs.append(
+            key=key,
+            problem=problem,
+            driver=driver,
+            n_iter=n_iter,
+            hist_start=len(self.iterations) - n_iter,
+            created=time.time(),
+            **{name: result[name] for name in ("success", "feasible", "L", "t", "obj", "elapsed")},
+        )
+        with open(os.path.join(self.root, "params.jsonl"), "a") as f:
+            params = {name: np.ravel(val).tolist() for name, val in (params or {}).items()}
+            f.write(json.dumps({"key": key, "params": params}) + "\n")
+        self.index[key] = run
+
+
+def _driver_history(path, prob):
+    """Iteration columns from a driver SqliteRecorder file."""
+    bounds = prob.model.get_constraints()
+    reader = om.CaseReader(path)
+    history = {name: [] for name in HISTORY_COLUMNS if name != "run"}
+    for i, case_id in enumerate(reader.list_cases("driver", recurse=False, out_stream=None)):
+        case = reader.get_case(case_id)
+        violation = 0.0
+        for name, val in case.get_constraints().items():
+            meta = bounds[name]
+            if meta["upper"] is not None:
+                violation = max(violation, float(np.max(val - meta["upper"])))
+            if meta["lower"] is not None:
+                violation = max(violation, float(np.max(meta["lower"] - val)))
+        history["iteration"].append(i)
+        history["L"].append(case["L"][0])
+        history["t"].append(case["t"][0])
+        history["obj"].append(next(iter(case.get_objectives().values()))[0])
+        history["max_violation"].append(violation)
+    return history
+
+
+def cached_run(problem="mass", params=None, driver="scipy", x0=None, store=None):
+    """
+    Optimize ``<problem>.build_problem()`` with ``params`` (model paths to
+    values, e.g. {"s_t": 400e6}) and start ``x0`` unless the same
+    configuration is already in ``store``. Returns the result row, with
+    ``cached`` telling whether it came from disk.
+    """
+    if problem not in PROBLEMS:
+        raise ValueError(f"Unknown problem '{problem}', expected one of {PROBLEMS}")
+    store = ResultStore() if store is None else store
+    key = parameter_key(problem, driver, params, x0)
+
+    res = store.lookup(key)
+    if res is not None:
+        res["cached"] = True
+        return res
+
+    prob = importlib.import_module(problem).build_problem(make_driver(driver))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "driver.sql")
+        prob.driver.add_recorder(om.SqliteRecorder(path))
+        prob.setup()
+        prob.set_solver_print(level=0)
+        for name, val in dict(params or {}, **(x0 or {})).items():
+            prob.set_val(name, val)
+
+        start = time.perf_counter()
+        success = driver_success(prob.run_driver())
+        elapsed = time.perf_counter() - start
+        prob.cleanup()
+
+        history = _driver_history(path, prob)
+
+    result = {
+        "success": success,
+        "feasible": is_feasible(prob),
+        "L": prob.get_val("L")[0],
+        "t": prob.get_val("t")[0],
+        "obj": next(iter(prob.driver.get_objective_values(driver_scaling=False).values()))[0],
+        "elapsed": elapsed,
+    }
+    store.record(key, problem, driver, params, result, history)
+
+    res = store.lookup(key)
+    res["cached"] = False
+    return res
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python store.py [root], a throwaway store unless a directory is given
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(sys.argv[1] if len(sys.argv) > 1 else tmp)
+        for _ in range(2):
+            res = cached_run("mass", {"s_t": 400e6}, driver="scipy", store=store)
+            source = "from store" if res["cached"] else f"optimized in {res['elapsed']:.3f} s"
+            print(f"L = {res['L']:.4f}, t = {res['t']:.4f}, obj = {res['obj']:.2f} ({source})")
+        print(f"{res['n_iter']} iterations recorded, {len(store)} runs in the store")
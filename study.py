@@ -0,0 +1,91 @@
+# --- Python 3.8 ---
+"""
+@File : study.py
+@Time : 2021/04/15
+@Author : Peter Atma
+@Desc : Warm-started parametric re-optimization of basecase.OneStage
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+
+# --- Extension modules ---
+import basecase
+from multistart import driver_success, is_feasible, make_driver
+
+# Study parameters, promoted OneStage inputs
+PARAMETERS = ("m_L", "p", "s_t", "s_y", "rho_s")
+
+# Recorded outputs besides the parameters themselves
+RESULTS = ("L", "t", "m01", "con1", "con2", "con3")
+
+
+class ParametricStudy:
+    """
+    basecase.OneStage set up once and re-optimized for each parameter vector.
+
+    Each case starts from the previous optimum unless that solve neither
+    converged nor ended feasible, in which case it restarts from ``x0`` (the
+    OneStage defaults when not given).
+    """
+
+    def __init__(self, driver="pyoptsparse", warm_start=True, x0=None):
+        self.warm_start = warm_start
+
+        self.prob = basecase.build_problem(make_driver(driver))
+        self.prob.setup()
+        self.prob.set_solver_print(level=0)
+
+        self.x0 = {name: self.prob.get_val(name).copy() for name in ("L", "t")}
+        self.x0.update(x0 or {})
+
+    def run(self, path=None, **cases):
+        """
+        Solve one case per row of ``cases`` (equal-length 1-D arrays keyed by
+        PARAMETERS names) and return the table as a dict of columns. Parameters
+        not given keep their OneStage defaults. With ``path`` the table is also
+        saved as an .npz file.
+        """
+        unknown = set(cases) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown study parameters {sorted(unknown)}, expected {PARAMETERS}")
+        cases = {name: np.atleast_1d(np.asarray(val, dtype=float)) for name, val in cases.items()}
+        n = len(next(iter(cases.values()))) if cases else 1
+        if any(val.size != n for val in cases.values()):
+            raise ValueError("All study parameters need the same number of cases")
+
+        table = {name: val.copy() for name, val in cases.items()}
+        table.update({name: np.empty(n) for name in RESULTS})
+        table["success"] = np.zeros(n, dtype=bool)
+        table["feasible"] = np.zeros(n, dtype=bool)
+
+        prob = self.prob
+        cold = True
+        for i in range(n):
+            for name, val in cases.items():
+                prob.set_val(name, val[i])
+            if cold or not self.warm_start:
+                for name, val in self.x0.items():
+                    prob.set_val(name, val)
+
+            table["success"][i] = driver_success(prob.run_driver())
+            table["feasible"][i] = is_feasible(prob)
+            for name in RESULTS:
+                table[name][i] = prob.get_val(name)[0]
+
+            cold = not (table["success"][i] or table["feasible"][i])
+
+        if path is not None:
+            np.savez(path, **table)
+        return table
+
+
+if __name__ == "__main__":
+    study = ParametricStudy()
+    res = study.run(m_L=np.linspace(50, 500, 500))
+
+    print(f"{res['success'].sum()} of {res['m_L'].size} cases converged")
+    i = np.argmax(res["m_L"])
+    print("heaviest payload", res["m_L"][i])
+    print(res["L"][i], res["t"][i], res["m01"][i])
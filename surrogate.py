@@ -0,0 +1,241 @@
+# --- Python 3.8 ---
+"""
+@File : surrogate.py
+@Time : 2021/04/18
+@Author : Peter Atma
+@Desc : Kriging surrogates of the sizing equations with exact fallback
+"""
+
+# --- Standard Python modules ---
+import inspect
+
+# --- External Python modules ---
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+from scipy.optimize import minimize
+
+# --- Extension modules ---
+
+
+class GaussianProcess:
+    """
+    Kriging model: a Gaussian process with constant mean and an anisotropic
+    squared-exponential correlation, on inputs and output scaled to zero
+    mean and unit variance. The correlation lengths maximize the
+    concentrated likelihood. Means and RMSEs come out for whole batches.
+    """
+
+    def __init__(self, nugget=1e-10, bounds=(-3.0, 2.0), n_starts=4, seed=0):
+        self.nugget = nugget
+        self.bounds = bounds  # of log10 theta
+        self.n_starts = n_starts
+        self.seed = seed
+
+    def _correlation(self, x_a, x_b, thetas):
+        return np.exp(-np.einsum("ijk,k->ij", np.square(x_a[:, None, :] - x_b[None, :, :]), thetas))
+
+    def _factor(self, log_thetas):
+        thetas = 10.0 ** log_thetas
+        R = self._correlation(self.X, self.X, thetas) + self.nugget * np.eye(self.X.shape[0])
+        return thetas, cho_factor(R, lower=True)
+
+    def _nll(self, log_thetas):
+        """Negative concentrated log-likelihood, up to a constant."""
+        try:
+            _, factor = self._factor(log_thetas)
+        except np.linalg.LinAlgError:
+            return np.inf
+        n = self.X.shape[0]
+        sigma2 = self.Y @ cho_solve(factor, self.Y) / n
+        return n * np.log(sigma2) + 2 * np.sum(np.log(np.diag(factor[0])))
+
+    def fit(self, x, y):
+        x, y = np.atleast_2d(x), np.ravel(y)
+        self.x_mean, self.x_std = x.mean(axis=0), x.std(axis=0) + 1e-12
+        self.y_mean, self.y_std = y.mean(), y.std() + 1e-12
+        self.X = (x - self.x_mean) / self.x_std
+        self.Y = (y - self.y_mean) / self.y_std
+
+        # the likelihood is flat and noisy towards smooth, ill-conditioned fits, so start from a few points
+        starts = np.random.default_rng(self.seed).uniform(*self.bounds, (self.n_starts, x.shape[1]))
+        best = min(
+            (minimize(self._nll, start, method="L-BFGS-B", bounds=[self.bounds] * x.shape[1]) for start in starts),
+            key=lambda res: res.fun,
+        )
+        self.thetas, self.factor = self._factor(best.x)
+        self.alpha = cho_solve(self.factor, self.Y)
+        self.sigma2 = self.Y @ self.alpha / self.X.shape[0]
+        return self
+
+    def predict(self, x, chunk=4096):
+        """Mean and RMSE at the rows of ``x``, both of shape (n,)."""
+        x = np.atleast_2d(x)
+        mean = np.empty(x.shape[0])
+        rmse = np.empty(x.shape[0])
+        for start in range(0, x.shape[0], chunk):
+            rows = slice(start, start + chunk)
+            r = self._correlation((x[rows] - self.x_mean) / self.x_std, self.X, self.thetas)
+            mean[rows] = self.y_mean + self.y_std * (r @ self.alpha)
+            v = solve_triangular(self.factor[0], r.T, lower=True)
+            mse = self.sigma2 * (1.0 - np.sum(v * v, axis=0))
+            rmse[rows] = self.y_std * np.sqrt(np.maximum(mse, 0.0))
+        return mean, rmse
+
+
+class SurrogateModel:
+    """
+    Kriging surrogate of one output of a vectorized function over a few
+    varied inputs, e.g. equations.stage or equations.con1. It wraps the
+    equations rather than the OpenMDAO components: the components compute
+    from the same functions, one design per call.
+
+    Batches go through ``evaluate``: points whose predicted error
+    (``n_sigma`` times the Kriging RMSE) is within ``tol``, in the output's
+    units, are served from the surrogate. The rest are computed exactly by
+    ``func``, and a random subset of them become training data. The
+    surrogate is refit once ``retrain_every`` new training points have
+    accumulated, up to ``max_train`` points in total.
+
+    The Kriging RMSE is an estimate, and it runs low where the fit is
+    poor. So ``n_check`` of the served points of every batch are also
+    computed exactly. When one of them is off by more than ``tol /
+    safety``, n_sigma is raised to ``safety`` times its error over its
+    RMSE, and the batch is split again with the new n_sigma. The checked
+    points are returned exact, and the ones that missed join the training
+    data. Each served point is then within ``tol`` unless the fit misses
+    there and nowhere among the checks of any batch so far.
+    """
+
+    def __init__(
+        self,
+        func,
+        inputs,
+        output,
+        tol,
+        n_sigma=3.0,
+        fixed=None,
+        min_train=20,
+        max_train=400,
+        retrain_every=20,
+        n_check=32,
+        safety=2.0,
+        seed=None,
+    ):
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.output = output  # key of the output when func returns a dict
+        self.tol = tol
+        self.n_sigma = n_sigma
+        self.min_train = min_train
+        self.max_train = max_train
+        self.retrain_every = retrain_every
+        self.n_check = n_check
+        self.safety = safety
+
+        # every other argument of func at ``fixed`` or its default
+        unknown = (set(self.inputs) | set(fixed or {})) - set(inspect.signature(func).parameters)
+        if unknown:
+            raise ValueError(f"{func.__name__} takes no arguments {sorted(unknown)}")
+        self.fixed = {name: val for name, val in (fixed or {}).items() if name not in self.inputs}
+
+        self._rng = np.random.default_rng(seed)
+        self.gp = None
+        self.x_train = np.empty((0, len(self.inputs)))
+        self.y_train = np.empty(0)
+        self._pending = 0
+
+        self.n_exact = 0
+        self.n_surrogate = 0
+
+    def exact(self, x):
+        """Evaluate ``func`` on a batch of points, one row per point."""
+        y = self.func(**self.fixed, **{name: x[:, j] for j, name in enumerate(self.inputs)})
+        y = y[self.output] if isinstance(y, dict) else y
+        return np.broadcast_to(y, x.shape[0])
+
+    def _train(self, x, y):
+        room = self.max_train - self.x_train.shape[0]
+        if room <= 0:
+            return
+        self.x_train = np.vstack((self.x_train, x[:room]))
+        self.y_train = np.concatenate((self.y_train, y[:room]))
+        self._pending += min(room, x.shape[0])
+
+        if self.x_train.shape[0] >= self.min_train and (self.gp is None or self._pending >= self.retrain_every):
+            self.gp = GaussianProcess().fit(self.x_train, self.y_train)
+            self._pending = 0
+
+    def _check(self, x, y, rmse, served):
+        """
+        Exact values at up to n_check of the ``served`` points, raising
+        n_sigma where they miss. Returns the checked points, their values
+        and the ones that missed.
+        """
+        checked = self._rng.permutation(served)[: self.n_check]
+        y_checked = self.exact(x[checked])
+        miss = np.abs(y_checked - y[checked])
+        near = miss > self.tol / self.safety
+        if near.any():
+            with np.errstate(divide="ignore"):
+                self.n_sigma = max(self.n_sigma, self.safety * np.max(miss[near] / rmse[checked][near]))
+        return checked, y_checked, checked[near]
+
+    def evaluate(self, x):
+        """
+        Output values and error estimates for a batch ``x`` of shape
+        (n, len(inputs)). Exactly computed points report zero error.
+        """
+        x = np.atleast_2d(np.asarray(x, dtype=float))
+        y = np.empty(x.shape[0])
+        err = np.zeros_like(y)
+        checked = missed = np.empty(0, dtype=int)
+
+        if self.gp is None:
+            exact = np.ones(x.shape[0], dtype=bool)
+        else:
+            y, rmse = self.gp.predict(x)
+            served = np.flatnonzero(self.n_sigma * rmse <= self.tol)
+            if served.size:
+                checked, y_checked, missed = self._check(x, y, rmse, served)
+                y[checked] = y_checked
+            err = self.n_sigma * rmse
+            exact = err > self.tol
+            exact[checked] = False
+
+        # checked points that missed are where the fit needs data
+        new = missed
+        if exact.any():
+            idx = np.flatnonzero(exact)
+            y[idx] = self.exact(x[idx])
+            # train on a random subset of them; picking only the least certain points
+            # clusters the training set on the domain edges and upsets the MLE fit
+            new = np.concatenate((missed, self._rng.permutation(idx)[: self.retrain_every]))
+        if new.size:
+            self._train(x[new], y[new])
+        err[exact] = 0.0
+        err[checked] = 0.0
+
+        self.n_exact += int(exact.sum()) + checked.size
+        self.n_surrogate += int((~exact).sum()) - checked.size
+        return y, err
+
+    @property
+    def exact_fraction(self):
+        total = self.n_exact + self.n_surrogate
+        return self.n_exact / total if total else 0.0
+
+
+if __name__ == "__main__":
+    import equations
+
+    rng = np.random.default_rng(0)
+    model = SurrogateModel(equations.stage, ("L", "t"), "m_s", tol=10.0)
+
+    worst = 0.0
+    for _ in range(100):
+        x = np.column_stack((rng.uniform(0.5, 5.0, 10000), rng.uniform(1e-3, 0.05, 10000)))
+        y, err = model.evaluate(x)
+        worst = max(worst, np.max(np.abs(y - model.exact(x))))
+
+    print("exact evaluations", model.n_exact, "of", model.n_exact + model.n_surrogate)
+    print("largest mass error", worst)
@@ -0,0 +1,156 @@
+# --- Python 3.8 ---
+"""
+@File : sweep.py
+@Time : 2021/04/12
+@Author : Peter Atma
+@Desc : Chunked, vectorized design-space sweeps of model.mass_ratio
+"""
+
+# --- Standard Python modules ---
+import inspect
+import json
+import os
+
+# --- External Python modules ---
+import numpy as np
+
+# --- Extension modules ---
+from model import mass_ratio
+
+# Arguments of mass_ratio that can be swept, in call order
+AXES = tuple(inspect.signature(mass_ratio).parameters)
+
+# Rough working set of mass_ratio per grid point: the gathered arguments plus
+# the stage temporaries, all float64
+BYTES_PER_POINT = 8 * (len(AXES) + 24)
+
+
+class SweepResult:
+    """
+    Labeled sweep output.
+
+    ``values[i, j, ...]`` is the mass ratio at ``coords[dims[0]][i]``,
+    ``coords[dims[1]][j]``, ... with the remaining arguments held at ``fixed``.
+    When the sweep was streamed to disk ``values`` is a read-only memmap.
+    """
+
+    def __init__(self, dims, coords, fixed, values, path=None):
+        self.dims = tuple(dims)
+        self.coords = coords
+        self.fixed = fixed
+        self.values = values
+        self.path = path
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def sel(self, **points):
+        """Select the grid slice nearest to the given coordinate values."""
+        index = []
+        dims = []
+        coords = {}
+        fixed = dict(self.fixed)
+        for name in self.dims:
+            if name in points:
+                i = int(np.argmin(np.abs(self.coords[name] - points[name])))
+                index.append(i)
+                fixed[name] = float(self.coords[name][i])
+            else:
+                index.append(slice(None))
+                dims.append(name)
+                coords[name] = self.coords[name]
+        return SweepResult(dims, coords, fixed, self.values[tuple(index)])
+
+    def argmin(self):
+        """Coordinates of the smallest mass ratio, scanned chunk by chunk."""
+        flat = self.values.reshape(-1)
+        chunk = 2 ** 24
+        best, best_i = np.inf, 0
+        for start in range(0, flat.size, chunk):
+            block = np.asarray(flat[start : start + chunk])
+            i = int(np.nanargmin(block))
+            if block[i] < best:
+                best, best_i = block[i], start + i
+        index = np.unravel_index(best_i, self.shape)
+        point = {name: float(self.coords[name][i]) for name, i in zip(self.dims, index)}
+        point.update(self.fixed)
+        return point
+
+
+def _grid(axes):
+    dims = []
+    coords = {}
+    fixed = {}
+    for name, val in axes.items():
+        if name not in AXES:
+            raise ValueError(f"Unknown sweep axis '{name}', expected one of {AXES}")
+        val = np.asarray(val, dtype=float)
+        if val.ndim == 0:
+            fixed[name] = float(val)
+        elif val.ndim == 1:
+            dims.append(name)
+            coords[name] = val
+        else:
+            raise ValueError(f"Sweep axis '{name}' must be a scalar or a 1-D array")
+    return dims, coords, fixed
+
+
+def sweep(memory_budget=256 * 2 ** 20, path=None, **axes):
+    """
+    Evaluate mass_ratio over the outer product of the given axes.
+
+    Each keyword is an argument of mass_ratio; 1-D arrays become grid
+    dimensions (in keyword order) and scalars are held fixed; L1 and L2 are
+    required, the other arguments fall back to the model defaults. The grid
+    is evaluated in flat chunks sized so one chunk's working set stays
+    within ``memory_budget`` bytes. When ``path`` is given the values are
+    written to ``<path>/values.npy`` chunk by chunk, so the grid does not
+    have to fit in memory.
+    """
+    dims, coords, fixed = _grid(axes)
+    missing = [name for name in ("L1", "L2") if name not in axes]
+    if missing:
+        raise ValueError(f"Sweep requires {missing}")
+
+    shape = tuple(coords[name].size for name in dims)
+    if path is None:
+        values = np.empty(shape)
+    else:
+        os.makedirs(path, exist_ok=True)
+        values = np.lib.format.open_memmap(os.path.join(path, "values.npy"), mode="w+", shape=shape)
+        np.savez(os.path.join(path, "coords.npz"), **coords)
+        with open(os.path.join(path, "sweep.json"), "w") as f:
+            json.dump({"dims": dims, "fixed": fixed}, f)
+
+    flat = values.reshape(-1)
+    chunk = max(1, int(memory_budget // BYTES_PER_POINT))
+    for start in range(0, flat.size, chunk):
+        stop = min(start + chunk, flat.size)
+        index = np.unravel_index(np.arange(start, stop), shape)
+        args = {name: coords[name][i] for name, i in zip(dims, index)}
+        flat[start:stop] = mass_ratio(**args, **fixed)
+
+    if path is not None:
+        values.flush()
+        del values
+        return load_sweep(path)
+    return SweepResult(dims, coords, fixed, values)
+
+
+def load_sweep(path):
+    """Open a sweep written by ``sweep(path=...)`` without loading its values."""
+    with open(os.path.join(path, "sweep.json")) as f:
+        meta = json.load(f)
+    with np.load(os.path.join(path, "coords.npz")) as data:
+        coords = {name: data[name] for name in meta["dims"]}
+    values = np.load(os.path.join(path, "values.npy"), mmap_mode="r")
+    return SweepResult(meta["dims"], coords, meta["fixed"], values, path=path)
+
+
+if __name__ == "__main__":
+    res = sweep(L1=np.linspace(1, 8, 1000), L2=np.linspace(1, 3, 1000), t1=np.linspace(0.005, 0.02, 4))
+
+    print("grid", dict(zip(res.dims, res.shape)))
+    print("minimum mass ratio at")
+    print(res.argmin())
@@ -0,0 +1,19 @@
+# --- Python 3.8 ---
+"""
+@File : conftest.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : Shared pytest fixtures
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import pytest
+
+# --- Extension modules ---
+
+
+@pytest.fixture(autouse=True)
+def _in_tmp_path(tmp_path, monkeypatch):
+    # OpenMDAO writes total coloring files to <problem>_out/ under the working directory, keep them out of the tree
+    monkeypatch.chdir(tmp_path)
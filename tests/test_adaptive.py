@@ -0,0 +1,69 @@
+# --- Python 3.8 ---
+"""
+@File : test_adaptive.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : adaptive.sample_quadtree against the full grid and the analytic con1 boundary t = p R / s_t
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import adaptive
+import constants as c
+
+P_RANGE, T_RANGE = (1e5, 2e6), (1e-5, 5e-3)
+
+
+@pytest.fixture(scope="module")
+def con1_map():
+    func = adaptive.stage_fields("p", "t", fields=("con1",))
+    X, Y, fields, n_evals = adaptive.sample_quadtree(func, P_RANGE, T_RANGE, levels={"con1": [0.0]})
+    return func, X, Y, fields["con1"], n_evals
+
+
+def test_con1_boundary_within_a_cell(con1_map):
+    _, X, Y, Z, _ = con1_map
+    dt = Y[1, 0] - Y[0, 0]
+    # thinnest feasible wall on each column of the grid
+    t_min = Y[np.argmax(Z <= 0, axis=0), 0]
+    assert np.all(np.abs(t_min - X[0] * c.R / c.st_ss) <= dt)
+
+
+def test_con1_feasibility_matches_full_grid(con1_map):
+    func, X, Y, Z, n_evals = con1_map
+    exact = func(X, Y)["con1"]
+    assert np.array_equal(Z <= 0, exact <= 0)
+    assert n_evals < 0.1 * X.size
+
+
+def test_error_near_tolerance(con1_map):
+    func, X, Y, Z, _ = con1_map
+    exact = func(X, Y)["con1"]
+    # tol (1e-3 of the range) bounds the error at the cell centers, the rest of a cell may be a little worse
+    assert np.max(np.abs(Z - exact)) <= 2e-3 * np.ptp(exact)
+
+
+def test_linear_field_needs_only_the_base_grid():
+    X, Y, fields, n_evals = adaptive.sample_quadtree(
+        lambda x, y: 2 * x - 3 * y, (0, 1), (0, 1), levels={"value": np.linspace(-3, 2, 50)}, base=4, max_depth=5
+    )
+    # the corners of the 4 x 4 base cells and their centers, evaluated to find nothing to refine
+    assert n_evals == 5 ** 2 + 4 ** 2
+    assert fields["value"] == pytest.approx(2 * X - 3 * Y, abs=1e-12)
+
+
+def test_fill_is_continuous_at_hanging_nodes():
+    # sin(8 pi y) vanishes at the corners and centers of the 4 x 4 base cells, so only the cells right of
+    # x = 0.75, where the quadratic term bends, are refined, and their edge points on x = 0.75 hang
+    def func(x, y):
+        return np.sin(8 * np.pi * y) + 10 * np.maximum(x - 0.75, 0) ** 2
+
+    X, Y, fields, _ = adaptive.sample_quadtree(func, (0, 1), (0, 1), tol=1e-3, base=4, max_depth=3)
+    Z = fields["value"]
+    # left of the line the coarse cells interpolate zero, so the line must read zero from both sides
+    assert Z[:, X[0] == 0.75] == pytest.approx(0.0, abs=1e-12)
+    assert np.abs(Z[:, X[0] > 0.75]).max() > 0.5
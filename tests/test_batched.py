@@ -0,0 +1,74 @@
+# --- Python 3.8 ---
+"""
+@File : test_batched.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : batched.solve_batch against the closed-form optimum and against run_driver of basecase.py
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import basecase
+import batched
+import equations
+from multistart import driver_success, make_driver
+
+# aluminium 6061-T6, Ti-6Al-4V and stainless steel: density and tensile strength
+MATERIALS = np.array([[2700.0, 310e6], [4430.0, 900e6], [8000.0, 515e6]])
+
+# closed_form_optimum options for the basecase.py problem
+BASECASE = dict(con2=True, con3=True, L_lower=batched.L_LOWER, t_lower=batched.T_LOWER, t_upper=batched.T_UPPER)
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    n = 200
+    rng = np.random.default_rng(1)
+    material = MATERIALS[rng.integers(len(MATERIALS), size=n)]
+    params = {
+        "m_L": rng.uniform(100.0, 5e4, n),
+        "p": rng.uniform(0.1e6, 1e6, n),
+        "R": rng.uniform(0.3, 1.5, n),
+        "rho_s": material[:, 0],
+        "s_t": material[:, 1],
+    }
+    return params, batched.solve_batch(**params)
+
+
+def test_all_converge(catalog):
+    _, res = catalog
+    assert res["success"].all()
+
+
+def test_matches_closed_form(catalog):
+    params, res = catalog
+    L, t, _, ok = equations.closed_form_optimum(**params, **BASECASE)
+    assert ok.sum() > 100
+    m01 = equations.stage(L, t, **{name: params[name] for name in ("R", "rho_s", "m_L")})["m01"]
+
+    assert res["L"][ok] == pytest.approx(L[ok], rel=1e-6)
+    assert res["t"][ok] == pytest.approx(t[ok], rel=1e-5)
+    assert res["m01"][ok] == pytest.approx(m01[ok], rel=1e-8)
+
+
+def test_matches_run_driver(catalog):
+    params, res = catalog
+    # closed_form_optimum marks the problems with con2 active as not ok, take some of those and some others
+    *_, ok = equations.closed_form_optimum(**params, **BASECASE)
+    sample = np.r_[np.flatnonzero(~ok)[:5], np.flatnonzero(ok)[:3]]
+
+    prob = basecase.build_problem(make_driver("scipy"))
+    prob.setup()
+    prob.set_solver_print(level=0)
+    for i in sample:
+        for name, val in params.items():
+            prob.set_val(name, val[i])
+        prob.set_val("L", 1.0)
+        prob.set_val("t", 0.01)
+        assert driver_success(prob.run_driver())
+        assert res["m01"][i] == pytest.approx(prob.get_val("m01")[0], rel=1e-7)
+        assert res["t"][i] == pytest.approx(prob.get_val("t")[0], rel=1e-5)
@@ -0,0 +1,62 @@
+# --- Python 3.8 ---
+"""
+@File : test_boundary.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : boundary.trace_zero along the con1 and con2 limit curves against their analytic forms
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import boundary
+import constants as c
+import equations
+
+
+def vertical(x, y_lower, y_upper):
+    x = np.asarray(x, dtype=float)
+    return np.c_[x, np.full(x.size, y_lower)], np.c_[x, np.full(x.size, y_upper)]
+
+
+def test_seeds_on_con1():
+    R = np.array([0.5, 1.0])
+    func = boundary.constraint("con1", "p", "t", R=R)
+    seeds, _ = boundary.seed_on_segments(func, *vertical([1e6, 1e6], 1e-5, 5e-3))
+    assert seeds[:, 1] == pytest.approx(1e6 * R / c.st_ss, rel=1e-8)
+
+
+def test_no_seed_without_a_sign_change():
+    func = boundary.constraint("con1", "p", "t")
+    seeds, _ = boundary.seed_on_segments(func, *vertical([1e6], 1e-2, 5e-2))
+    assert np.isnan(seeds).all()
+
+
+def test_con1_curves_follow_hoop_stress_limit():
+    R = np.linspace(0.25, 1.5, 6)
+    bounds = ((1e5, 2e6), (1e-5, 5e-3))
+    func = boundary.constraint("con1", "p", "t", R=R)
+    seeds, _ = boundary.seed_on_segments(func, *vertical(np.full(R.size, 1e6), *bounds[1]))
+    curves, _ = boundary.trace_zero(func, seeds, bounds)
+
+    for curve, r in zip(curves, R):
+        p, t = curve.T
+        assert t == pytest.approx(p * r / c.st_ss, rel=1e-8)
+        # traced from edge to edge of the box, leaving through the top where the wall gets too thick
+        assert p.min() == pytest.approx(bounds[0][0])
+        assert p.max() == pytest.approx(min(bounds[0][1], bounds[1][1] * c.st_ss / r))
+
+
+def test_con2_curves_stay_on_the_limit():
+    p = np.array([0.0, 1e5, 3e5])
+    bounds = ((1e-5, 5e-3), (0.0, 1e7))
+    func = boundary.constraint("con2", "t", "m_L", p=p)
+    seeds, _ = boundary.seed_on_segments(func, *vertical(np.full(p.size, 1e-3), *bounds[1]))
+    curves, _ = boundary.trace_zero(func, seeds, bounds)
+
+    for curve, pi in zip(curves, p):
+        assert len(curve) > 10
+        assert np.abs(equations.con2(curve[:, 0], p=pi, m_L=curve[:, 1])).max() <= 1e-6 * c.sy_ss
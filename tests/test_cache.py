@@ -0,0 +1,87 @@
+# --- Python 3.8 ---
+"""
+@File : test_cache.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : Cached component evaluations against uncached ones, LRU eviction and input quantization
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import basecase
+from cache import ComputeCache, cache_report, enable_cache
+from multistart import make_driver
+
+DESIGNS = ((2.0, 0.01), (3.5, 2e-3), (2.0, 0.01), (3.5, 2e-3))
+
+
+def square(inputs, outputs):
+    square.calls += 1
+    outputs["y"] = inputs["x"] ** 2
+
+
+def compute(cache, x):
+    outputs = {"y": np.zeros(1)}
+    cache.compute(square, {"x": np.atleast_1d(x)}, outputs)
+    return outputs["y"][0]
+
+
+def evaluations(prob):
+    results = []
+    for L, t in DESIGNS:
+        prob.set_val("L", L)
+        prob.set_val("t", t)
+        prob.run_model()
+        outputs = {name: prob.get_val(name).copy() for name in ("m01", "con1", "con2", "con3")}
+        results.append((outputs, prob.compute_totals()))
+    return results
+
+
+def test_hits_match_uncached_outputs_and_totals():
+    probs = []
+    for cached in (False, True):
+        prob = basecase.build_problem(make_driver("scipy"))
+        prob.setup()
+        prob.set_solver_print(level=0)
+        if cached:
+            enable_cache(prob.model)
+        probs.append(prob)
+    reference, results = (evaluations(prob) for prob in probs)
+
+    for (ref_out, ref_totals), (out, totals) in zip(reference, results):
+        for name, val in ref_out.items():
+            assert np.array_equal(out[name], val)
+        for key, val in ref_totals.items():
+            assert np.array_equal(totals[key], val)
+    # the repeated designs came from the caches
+    assert all(info.hits > 0 for info in cache_report(probs[1].model, out=None).values())
+
+
+def test_least_recently_used_point_is_evicted():
+    cache = ComputeCache(maxsize=2)
+    square.calls = 0
+    for x in (1.0, 2.0, 1.0, 3.0):
+        compute(cache, x)
+    assert square.calls == 3 and cache.info().currsize == 2
+
+    # 2.0 went when 3.0 came in, 1.0 was used more recently
+    assert compute(cache, 1.0) == 1.0 and square.calls == 3
+    assert compute(cache, 2.0) == 4.0 and square.calls == 4
+    assert cache.info() == (2, 4, 2, 2)
+
+
+@pytest.mark.parametrize("bits", [20, 40])
+def test_inputs_within_the_quantum_share_an_entry(bits):
+    cache = ComputeCache(bits=bits)
+    square.calls = 0
+    x = 1.2345
+    compute(cache, x)
+    # the key keeps ``bits`` mantissa bits of the input: well below the quantum, well above it
+    assert compute(cache, x * (1 + 2.0 ** -(bits + 4))) == x ** 2
+    assert square.calls == 1
+    compute(cache, x * (1 + 2.0 ** -(bits - 4)))
+    assert square.calls == 2
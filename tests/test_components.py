@@ -0,0 +1,61 @@
+# --- Python 3.8 ---
+"""
+@File : test_components.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : Analytic partials of the components.py sizing components against complex step
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import openmdao.api as om
+import pytest
+from openmdao.utils.assert_utils import assert_check_partials, assert_check_totals
+
+# --- Extension modules ---
+import components
+
+
+def check(comp, **values):
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("comp", comp, promotes=["*"])
+    prob.setup(force_alloc_complex=True)
+    for name, val in values.items():
+        prob.set_val(name, val)
+    prob.run_model()
+    assert_check_partials(prob.check_partials(method="cs", out_stream=None), atol=1e-8, rtol=1e-8)
+
+
+# designs away from the defaults, so no partial is checked at a special point
+DESIGNS = {"L": [0.7, 2.5, 6.0], "t": [2e-4, 3e-3, 0.05], "R": [0.4, 0.5, 1.2], "m_L": [50.0, 400.0, 3e4]}
+
+
+@pytest.mark.parametrize("output", list(components.STAGE_OUTPUTS))
+def test_stage_mass_partials(output):
+    check(components.StageMass(outputs=(output,)), L=2.5, t=3e-3, R=0.7)
+
+
+def test_stage_mass_partials_vectorized():
+    outputs = tuple(components.STAGE_OUTPUTS)
+    check(components.StageMass(vec_size=3, outputs=outputs), **DESIGNS)
+
+
+@pytest.mark.parametrize("name", list(components.CONSTRAINTS))
+@pytest.mark.parametrize("vec_size", [1, 3])
+def test_constraint_partials(name, vec_size):
+    inputs = components.CONSTRAINT_INPUTS[name]
+    values = {key: val[:vec_size] for key, val in DESIGNS.items() if key in inputs}
+    check(components.CONSTRAINTS[name](vec_size=vec_size), **values)
+
+
+def test_total_partials():
+    check(components.Total(vec_size=3, output="m_s"), m_s=[1.0, 2.0, 3.0])
+
+
+def test_vectorized_problem_totals():
+    prob = components.build_problem(om.ScipyOptimizeDriver(optimizer="SLSQP"), vec_size=3)
+    prob.setup(force_alloc_complex=True)
+    for name, val in DESIGNS.items():
+        prob.set_val(name, val)
+    prob.run_model()
+    assert_check_totals(prob.check_totals(method="cs", out_stream=None), atol=1e-8, rtol=1e-8)
@@ -0,0 +1,71 @@
+# --- Python 3.8 ---
+"""
+@File : test_distributed.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : distributed.py summaries against NumPy on one rank and against one rank under mpirun -n 2
+"""
+
+# --- Standard Python modules ---
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import distributed
+import equations
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HAVE_MPI = shutil.which("mpirun") is not None and all(
+    importlib.util.find_spec(name) is not None for name in ("mpi4py", "petsc4py")
+)
+
+
+def population(n=1001):
+    """Designs around the basecase optimum, feasible and not, an odd count so the ranks split unevenly."""
+    rng = np.random.default_rng(0)
+    return rng.uniform(0.3, 3.0, n), 10 ** rng.uniform(-4, -2, n)
+
+
+def test_single_rank_matches_numpy():
+    L, t = population()
+    res = distributed.run_population(L, t)
+
+    stage = equations.stage(L, t)
+    feasible = (equations.con1(t) <= 0) & (equations.con2(t) <= 0) & (equations.con3(L) <= 0)
+    i = np.flatnonzero(feasible)[np.argmin(stage["m01"][feasible])]
+
+    assert res["n_feasible"] == feasible.sum()
+    assert res["m01_mean"] == pytest.approx(stage["m01"].mean(), rel=1e-12)
+    assert res["m01_min"] == pytest.approx(stage["m01"][i], rel=1e-12)
+    assert (res["L_best"], res["t_best"]) == (L[i], t[i])
+
+
+@pytest.mark.mpi
+@pytest.mark.skipif(not HAVE_MPI, reason="needs mpirun, mpi4py and petsc4py")
+def test_two_ranks_match_single_rank(tmp_path):
+    out = tmp_path / "summary.json"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (ROOT, os.environ.get("PYTHONPATH")))))
+    subprocess.run(["mpirun", "-n", "2", sys.executable, __file__, str(out)], env=env, check=True, timeout=600)
+
+    gathered = json.loads(out.read_text())
+    assert gathered.pop("size") == 2
+    single = distributed.run_population(*population())
+    assert gathered == pytest.approx(single, rel=1e-12)
+
+
+if __name__ == "__main__":
+    # harness of test_two_ranks_match_single_rank: mpirun -n 2 python test_distributed.py summary.json
+    L, t = population()
+    res = distributed.run_population(L, t)
+    comm = distributed.MPI.COMM_WORLD
+    if comm.rank == 0:
+        with open(sys.argv[1], "w") as f:
+            json.dump(dict(res, size=comm.size), f)
@@ -0,0 +1,105 @@
+# --- Python 3.8 ---
+"""
+@File : test_multistage.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : MultiStage partials against complex step, and a joint 3-stage optimization against the equations
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+import pytest
+from openmdao.utils.assert_utils import assert_check_partials, assert_check_totals
+from scipy.optimize import minimize
+
+# --- Extension modules ---
+import equations
+import model
+import multistage
+import trajectory
+from multistart import make_driver
+
+# per stage, bottom to top, away from the defaults
+L = (6.0, 2.5, 0.7)
+T = (0.01, 0.005, 0.003)
+DV_TARGET = 15000.0
+
+
+def build_problem(n_stages=3, vec_size=1):
+    """Lightest vehicle (mass_ratio) over the stage lengths that delivers DV_TARGET."""
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("vehicle", multistage.MultiStage(n_stages=n_stages, vec_size=vec_size), promotes=["*"])
+    prob.model.add_subsystem("dv_cmp", trajectory.DeltaV(n_stages=n_stages, vec_size=vec_size), promotes_outputs=["dv"])
+    for i in range(1, n_stages + 1):
+        prob.model.connect(f"stage{i}.m0", f"dv_cmp.stage{i}_m0")
+        prob.model.connect(f"stage{i}.m_p", f"dv_cmp.stage{i}_m_p")
+        prob.model.add_design_var(f"stage{i}.L", lower=0.5, upper=50.0)
+    prob.model.add_objective("mass_ratio", ref=100.0)
+    prob.model.add_constraint("dv", lower=DV_TARGET, ref=DV_TARGET)
+    return prob
+
+
+def set_stages(prob, L, T):
+    for i, (L_i, t_i) in enumerate(zip(L, T), start=1):
+        prob.set_val(f"stage{i}.L", L_i)
+        prob.set_val(f"stage{i}.t", t_i)
+
+
+def stack(L, T):
+    """Mass ratio and delta-v of the stages from equations.stage, top stage first."""
+    props = dict(R=model.r, rho_s=model.rho_s, rho_o=model.rho_p, rho_f=model.rho_p)
+    m0, dv = model.mL, 0.0
+    for L_i, t_i in zip(L[::-1], T[::-1]):
+        stage = equations.stage(L_i, t_i, m_L=m0, **props)
+        dv = dv + trajectory.rocket_delta_v(stage["m01"], stage["m_p"])
+        m0 = stage["m01"]
+    return m0 / model.mL, dv
+
+
+def test_two_stages_match_model():
+    prob = om.Problem(reports=False)
+    prob.model = multistage.MultiStage(n_stages=2)
+    prob.setup()
+    set_stages(prob, (8.0, 2.0), (0.01, 0.005))
+    prob.run_model()
+    assert prob.get_val("mass_ratio")[0] == pytest.approx(model.mass_ratio(8.0, 2.0), rel=1e-12)
+
+
+@pytest.mark.parametrize("vec_size", [1, 3])
+def test_three_stage_partials(vec_size):
+    prob = build_problem(vec_size=vec_size)
+    prob.setup(force_alloc_complex=True)
+    # vehicles of different lengths in each row
+    set_stages(prob, [np.linspace(0.5, 1.5, vec_size) * L_i for L_i in L], T)
+    prob.run_model()
+    assert_check_partials(prob.check_partials(method="cs", out_stream=None), atol=1e-8, rtol=1e-8)
+    assert_check_totals(prob.check_totals(method="cs", out_stream=None), atol=1e-8, rtol=1e-8)
+
+
+def test_joint_optimum_matches_equations():
+    prob = build_problem()
+    prob.driver = make_driver("scipy")
+    prob.setup()
+    prob.set_solver_print(level=0)
+    set_stages(prob, (2.0, 2.0, 2.0), T)
+    prob.run_driver()
+
+    # the same problem solved directly on the equations
+    ref = minimize(
+        lambda x: stack(x, T)[0],
+        np.full(3, 2.0),
+        method="SLSQP",
+        bounds=[(0.5, 50.0)] * 3,
+        constraints={"type": "ineq", "fun": lambda x: stack(x, T)[1] / DV_TARGET - 1.0},
+        options={"ftol": 1e-12},
+    )
+    assert ref.success
+
+    L_opt = [prob.get_val(f"stage{i}.L")[0] for i in (1, 2, 3)]
+    assert L_opt == pytest.approx(ref.x, rel=1e-4)
+    assert prob.get_val("mass_ratio")[0] == pytest.approx(ref.fun, rel=1e-6)
+    assert prob.get_val("dv")[0] == pytest.approx(DV_TARGET, rel=1e-6)
+    # the lower stages are sized by the dv target, the top one sits on its bound
+    assert L_opt[0] > 1.0 and L_opt[1] > 1.0 and L_opt[2] == pytest.approx(0.5)
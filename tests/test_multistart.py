@@ -0,0 +1,60 @@
+# --- Python 3.8 ---
+"""
+@File : test_multistart.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : Best feasible start of a multistart, its Latin hypercube and the worker pool against one process
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import basecase
+import equations
+import multistart
+
+
+def test_best_is_the_lightest_converged_feasible_start():
+    # (L0, t0, L, t, obj, success, feasible); the two lightest failed or ended infeasible
+    rows = [
+        (1.0, 0.1, 0.6, 1e-3, 900.0, True, True),
+        (2.0, 0.2, 0.5, 1e-4, 500.0, True, False),
+        (3.0, 0.3, 0.5, 2e-4, 600.0, False, True),
+        (4.0, 0.1, 0.7, 1e-3, 800.0, True, True),
+        (5.0, 0.2, np.nan, np.nan, np.nan, False, False),
+    ]
+    res = multistart.MultistartResult(rows)
+    assert len(res) == 5
+    assert res.best == {"L": 0.7, "t": 1e-3, "obj": 800.0, "start": 3}
+
+    assert multistart.MultistartResult(rows[1:3] + rows[4:]).best is None
+
+
+def test_latin_hypercube_fills_every_stratum():
+    bounds = [(0.5, 10.0), (1e-3, 0.4)]
+    x = multistart.latin_hypercube(20, bounds, seed=0)
+    for j, (lower, upper) in enumerate(bounds):
+        strata = np.floor((x[:, j] - lower) / (upper - lower) * 20).astype(int)
+        assert sorted(strata) == list(range(20))
+
+
+def test_basecase_best_start_is_the_optimum():
+    res = multistart.multistart("basecase", n_starts=8, driver="scipy", n_workers=1, seed=0)
+    assert res.best is not None
+    L, t, _, ok = equations.closed_form_optimum(
+        L_lower=basecase.L_LOWER, t_lower=basecase.T_LOWER, t_upper=basecase.T_UPPER, con2=True, con3=True
+    )
+    m01 = equations.stage(L, t)["m01"]
+
+    assert ok
+    assert res.best["obj"] == pytest.approx(m01, rel=1e-6)
+    assert (res.best["L"], res.best["t"]) == pytest.approx((L, t), rel=1e-6, abs=1e-8)
+    assert np.all(res.obj[res.success & res.feasible] >= res.best["obj"])
+
+    # the same starts spread over worker processes
+    pooled = multistart.multistart("basecase", n_starts=8, driver="scipy", n_workers=2, seed=0)
+    assert np.array_equal(pooled.L0, res.L0)
+    assert pooled.obj == pytest.approx(res.obj, rel=1e-12, nan_ok=True)
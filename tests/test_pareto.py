@@ -0,0 +1,51 @@
+# --- Python 3.8 ---
+"""
+@File : test_pareto.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : ParetoArchive fronts kept per configuration, and their round trip through .npz
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+
+# --- Extension modules ---
+from pareto import ParetoArchive, configuration
+
+DEFAULT = configuration()
+HIGH_P = configuration({"p": 2e6})
+
+
+def test_fronts_of_different_configurations_do_not_prune_each_other():
+    archive = ParetoArchive()
+    # (m_s, mass_ratio, margin): the second design dominates the first only if they were comparable
+    archive.add([[0.5, 1e-3]], [[20.0, 2.0, 0.1]], DEFAULT)
+    archive.add([[0.5, 2e-3]], [[10.0, 1.5, 0.2]], HIGH_P)
+
+    assert len(archive) == 2
+    assert archive.front(DEFAULT)[1].tolist() == [[20.0, 2.0, 0.1]]
+    assert archive.front(HIGH_P)[1].tolist() == [[10.0, 1.5, 0.2]]
+
+
+def test_dominated_designs_are_dropped_within_a_configuration():
+    archive = ParetoArchive()
+    archive.add([[0.5, 1e-3], [0.6, 1e-3]], [[20.0, 2.0, 0.1], [10.0, 1.5, 0.2]], DEFAULT)
+    archive.add([[0.7, 1e-3]], [[15.0, 1.0, 0.3]], DEFAULT)
+
+    X, F = archive.front(DEFAULT)
+    assert X.tolist() == [[0.6, 1e-3], [0.7, 1e-3]]
+
+
+def test_round_trip(tmp_path):
+    archive = ParetoArchive()
+    archive.add([[0.5, 1e-3]], [[20.0, 2.0, 0.1]], DEFAULT)
+    archive.add([[0.5, 2e-3]], [[10.0, 1.5, 0.2]], HIGH_P)
+    archive.mark_solved((0.1, np.nan), HIGH_P)
+    path = str(tmp_path / "archive.npz")
+    archive.save(path)
+
+    loaded = ParetoArchive.load(path)
+    for config in (DEFAULT, HIGH_P):
+        assert np.array_equal(loaded.front(config)[0], archive.front(config)[0])
+    assert loaded.solved((0.1, np.nan), HIGH_P) and not loaded.solved((0.1, np.nan), DEFAULT)
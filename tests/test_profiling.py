@@ -0,0 +1,60 @@
+# --- Python 3.8 ---
+"""
+@File : test_profiling.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : Profiler report of a basecase optimization: per-component timings, iterations and clean detach
+"""
+
+# --- Standard Python modules ---
+import json
+
+# --- External Python modules ---
+import openmdao.api as om
+
+# --- Extension modules ---
+import basecase
+from multistart import make_driver
+from profiling import Profiler
+
+
+def profile():
+    prob = basecase.build_problem(make_driver("scipy"))
+    prob.setup()
+    prob.set_solver_print(level=0)
+    prob.final_setup()
+    with Profiler(prob) as prof:
+        prob.run_driver()
+    return prob, prof
+
+
+def test_report_has_timings_per_component(tmp_path):
+    prob, prof = profile()
+    path = str(tmp_path / "profile.json")
+    prof.to_json(path)
+    with open(path) as f:
+        report = json.load(f)
+
+    comps = [comp.pathname for comp in prob.model.system_iter(recurse=True, typ=om.ExplicitComponent)]
+    assert comps
+    n_model = sum(it["kind"] == "model" for it in report["iterations"])
+    n_totals = sum(it["kind"] == "totals" for it in report["iterations"])
+    assert n_model > 1 and n_totals > 1
+    for path in comps:
+        if path == "_auto_ivc":  # holds the design variables, never computed
+            continue
+        compute = report["calls"][f"{path}.compute"]
+        # once per model evaluation of the driver, the analytic partials once per total derivative
+        assert compute["count"] == n_model and compute["time"] > 0.0
+        assert report["calls"][f"{path}.compute_partials"]["count"] == n_totals
+
+    # the components' exclusive times are inside the driver's
+    inside = sum(val["time"] for frame, val in report["calls"].items() if frame.endswith(".compute"))
+    assert inside < report["calls"]["run_driver"]["time"]
+
+
+def test_detach_restores_the_instances():
+    prob, _ = profile()
+    for system in prob.model.system_iter(include_self=True, recurse=True):
+        assert not {"compute", "compute_partials", "_linearize"} & set(vars(system))
+    assert not {"run_driver", "run_model"} & set(vars(prob))
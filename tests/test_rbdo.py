@@ -0,0 +1,69 @@
+# --- Python 3.8 ---
+"""
+@File : test_rbdo.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : ChanceConstraint partials against finite differences, and the reliable optimum on fresh samples
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+import pytest
+from openmdao.utils.assert_utils import assert_check_partials
+
+# --- Extension modules ---
+import components
+import mass
+import rbdo
+import uq
+from multistart import driver_success, make_driver
+
+BETA = 1e-3
+
+
+# deterministic inputs where the violation probability is well inside (0, 1)
+@pytest.mark.parametrize("output, values", [("con1", {"t": 3.5e-4, "R": 0.45}), ("con2", {"t": 1e-3, "m_L": 1.33e5})])
+def test_partials_against_finite_differences(output, values):
+    constraint, scale = rbdo.CHANCE_CONSTRAINTS[output]
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem(
+        "cmp",
+        rbdo.ChanceConstraint(
+            constraint=constraint, output=output, distributions=uq.DISTRIBUTIONS, scale=scale, n_samples=2000
+        ),
+        promotes=["*"],
+    )
+    prob.setup()
+    for name, val in values.items():
+        prob.set_val(name, val)
+    prob.run_model()
+    assert 0.01 < prob.get_val(f"P_{output}")[0] < 0.99
+
+    # the common samples are fixed, so the estimate is a smooth function of the inputs
+    data = prob.check_partials(method="fd", form="central", step=1e-6, step_calc="rel", out_stream=None)
+    assert_check_partials(data, atol=1e-8, rtol=1e-5)
+
+
+def test_optimum_violation_on_fresh_samples():
+    prob = rbdo.build_problem(make_driver("scipy"), beta=BETA, n_samples=100000)
+    prob.setup()
+    prob.set_solver_print(level=0)
+    t = mass.closed_form_optimum()[1]
+    prob.set_val("t", 1.2 * t)
+    assert driver_success(rbdo.anneal(prob))
+
+    # the chance constraints without smoothing, on samples the optimizer never saw
+    rng = np.random.default_rng(1)
+    samples = {name: dist.transform(rng.standard_normal(10 ** 6)) for name, dist in uq.DISTRIBUTIONS.items()}
+    violated = {}
+    for name, (constraint, _) in rbdo.CHANCE_CONSTRAINTS.items():
+        scattered = {inp: samples[inp] for inp in components.CONSTRAINT_INPUTS[name] if inp in samples}
+        violated[name] = np.mean(constraint(t=prob.get_val("t"), **scattered) > 0)
+
+    # con1 is active at beta, within the error of 1e5 common samples; con2 is far from its limit
+    assert violated["con1"] == pytest.approx(BETA, rel=0.2)
+    assert violated["con2"] == 0.0
+    # and the design is only as much heavier than the deterministic optimum as it has to be
+    assert t < prob.get_val("t")[0] < 1.2 * t
@@ -0,0 +1,68 @@
+# --- Python 3.8 ---
+"""
+@File : test_recorder.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : BufferedRecorder histories read back against OpenMDAO's SqliteRecorder of the same run
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+
+# --- Extension modules ---
+import mass
+from multistart import make_driver
+from recorder import attach_recorder, read_history
+
+VARIABLES = ("L", "t", "m_s", "con1")
+
+
+def run(tmp_path, every, buffer_size):
+    prob = mass.build_problem(make_driver("scipy"))
+    prob.setup()
+    prob.set_solver_print(level=0)
+    recorder = attach_recorder(prob, str(tmp_path / "history.bin"), VARIABLES, every=every, buffer_size=buffer_size)
+    prob.driver.add_recorder(om.SqliteRecorder(str(tmp_path / "history.sql")))
+    prob.run_driver()
+    prob.cleanup()
+
+    cases = om.CaseReader(str(tmp_path / "history.sql")).get_cases("driver", recurse=False)
+    return prob, recorder, cases
+
+
+def test_cases_round_trip(tmp_path):
+    # buffers smaller than the run, so the writer thread flushes full ones and the last partial one
+    prob, recorder, cases = run(tmp_path, every=1, buffer_size=3)
+    history = read_history(recorder.path)
+
+    assert len(cases) > 3
+    assert history["iteration"].tolist() == list(range(len(cases)))
+    for name in VARIABLES:
+        assert np.array_equal(history[name], [case.get_val(name)[0] for case in cases])
+    assert history["L"][-1] == prob.get_val("L")[0]
+
+
+def test_every_nth_iteration(tmp_path):
+    _, recorder, cases = run(tmp_path, every=2, buffer_size=1024)
+    history = read_history(recorder.path)
+
+    assert history["iteration"].tolist() == list(range(0, len(cases), 2))
+    assert np.array_equal(history["t"], [case.get_val("t")[0] for case in cases[::2]])
+
+
+def test_restart_appends(tmp_path):
+    prob, recorder, cases = run(tmp_path, every=1, buffer_size=3)
+    # cleanup dropped the recorder from the driver; added back and set up again, it appends to the same file
+    prob.driver.add_recorder(recorder)
+    prob.setup()
+    prob.set_solver_print(level=0)
+    prob.run_driver()
+    prob.cleanup()
+
+    history = read_history(recorder.path)
+    first = len(cases)
+    assert history["iteration"][:first].tolist() == list(range(first))
+    assert history["iteration"][first] == 0
+    assert np.array_equal(history["m_s"][:first], [case.get_val("m_s")[0] for case in cases])
@@ -0,0 +1,78 @@
+# --- Python 3.8 ---
+"""
+@File : test_service.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : SizingService coalescing of concurrent requests, and its batched results against the equations
+"""
+
+# --- Standard Python modules ---
+import asyncio
+
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import basecase
+import equations
+import service
+from components import INPUTS
+
+
+def serve(requests, monkeypatch):
+    """Results of the concurrent ``requests`` and the number of closed form evaluations behind them."""
+    rows = []
+    closed_form_batch = service.closed_form_batch
+
+    def counted(batch):
+        rows.extend(batch)
+        return closed_form_batch(batch)
+
+    monkeypatch.setattr(service, "closed_form_batch", counted)
+
+    async def main():
+        async with service.SizingService(n_workers=1) as sizing:
+            results = await asyncio.gather(*(sizing.size(**params) for params in requests))
+        return results, sizing.counts
+
+    results, counts = asyncio.run(main())
+    return results, counts, len(rows)
+
+
+def test_concurrent_identical_requests_are_evaluated_once(monkeypatch):
+    # the same request, some of it jittered below the 20 bits of the key
+    m_L = 500.0 * (1 + 1e-9 * np.random.default_rng(0).standard_normal(50))
+    results, counts, evaluations = serve([{"m_L": val} for val in m_L], monkeypatch)
+
+    assert evaluations == 1
+    assert counts["coalesced"] == 49 and counts["closed_form"] == 1
+    assert all(res == results[0] for res in results)
+
+
+def test_batched_results_match_equations(monkeypatch):
+    requests = [{"m_L": m_L, "p": p} for m_L in (100.0, 2000.0, 3e4) for p in (0.2e6, 0.36e6, 0.6e6)]
+    results, counts, evaluations = serve(requests, monkeypatch)
+    assert counts["batches"] == 1 and evaluations == len(requests)
+
+    for params, res in zip(requests, results):
+        values = {name: params.get(name, INPUTS[name][0]) for name in service.PARAMETERS}
+        L, t, _, ok = equations.closed_form_optimum(
+            R=values["R"],
+            p=values["p"],
+            s_t=values["s_t"],
+            rho_s=values["rho_s"],
+            L_lower=basecase.L_LOWER,
+            t_lower=basecase.T_LOWER,
+            t_upper=basecase.T_UPPER,
+            con2=True,
+            s_y=values["s_y"],
+            g=values["g"],
+            m_L=values["m_L"],
+            con3=True,
+        )
+        assert ok
+        stage = equations.stage(L, t, **{name: values[name] for name in ("R", "rho_s", "rho_o", "rho_f", "OF", "m_L")})
+        assert res["method"] == "closed-form"
+        assert (res["L"], res["t"]) == pytest.approx((L, t), rel=1e-12)
+        assert res["m01"] == pytest.approx(stage["m01"], rel=1e-12)
@@ -0,0 +1,51 @@
+# --- Python 3.8 ---
+"""
+@File : test_store.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : store.cached_run hits and misses, and the store read back from disk
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import pytest
+
+# --- Extension modules ---
+import store
+from store import ResultStore, cached_run
+
+
+def test_second_run_comes_from_store(tmp_path):
+    results = ResultStore(str(tmp_path))
+    first = cached_run("mass", {"s_t": 400e6}, store=results)
+    second = cached_run("mass", {"s_t": 400e6}, store=results)
+
+    assert not first["cached"] and second["cached"]
+    assert len(results) == 1
+    for name in ("L", "t", "obj", "n_iter", "key"):
+        assert second[name] == first[name]
+    assert len(results.history(first["key"])["iteration"]) == first["n_iter"] > 0
+
+
+def test_other_parameters_miss(tmp_path):
+    results = ResultStore(str(tmp_path))
+    low = cached_run("mass", {"s_t": 400e6}, store=results)
+    high = cached_run("mass", {"s_t": 600e6}, store=results)
+
+    assert not high["cached"]
+    assert len(results) == 2
+    # con1 is active, t = p R / s_t
+    assert high["t"] == pytest.approx(low["t"] * 400 / 600, rel=1e-6)
+
+
+def test_reopened_store_hits(tmp_path):
+    first = cached_run("mass", store=ResultStore(str(tmp_path)))
+    again = cached_run("mass", store=ResultStore(str(tmp_path)))
+    assert again["cached"] and again["obj"] == first["obj"]
+
+
+def test_model_change_misses(tmp_path, monkeypatch):
+    results = ResultStore(str(tmp_path))
+    cached_run("mass", store=results)
+    monkeypatch.setattr(store, "model_version", lambda problem: "changed")
+    assert not cached_run("mass", store=results)["cached"]
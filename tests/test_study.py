@@ -0,0 +1,50 @@
+# --- Python 3.8 ---
+"""
+@File : test_study.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : Warm-started parametric study against cold starts and the closed form optimum
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import basecase
+import equations
+from study import ParametricStudy
+
+CASES = {"m_L": np.linspace(50.0, 500.0, 6), "p": np.linspace(0.3e6, 0.5e6, 6)}
+
+
+def test_warm_start_matches_cold(tmp_path):
+    path = str(tmp_path / "study.npz")
+    warm = ParametricStudy(driver="scipy").run(path=path, **CASES)
+    cold = ParametricStudy(driver="scipy", warm_start=False).run(**CASES)
+
+    assert warm["success"].all() and warm["feasible"].all()
+    for name in ("L", "t", "m01"):
+        assert warm[name] == pytest.approx(cold[name], rel=1e-6)
+
+    L, t, _, ok = equations.closed_form_optimum(
+        p=CASES["p"],
+        L_lower=basecase.L_LOWER,
+        t_lower=basecase.T_LOWER,
+        t_upper=basecase.T_UPPER,
+        con2=True,
+        m_L=CASES["m_L"],
+        con3=True,
+    )
+    assert ok.all()
+    assert warm["t"] == pytest.approx(t, rel=1e-6)
+    assert warm["L"] == pytest.approx(L, abs=1e-6)
+
+    with np.load(path) as saved:
+        assert np.array_equal(saved["m01"], warm["m01"]) and np.array_equal(saved["m_L"], CASES["m_L"])
+
+
+def test_mismatched_cases():
+    with pytest.raises(ValueError, match="same number"):
+        ParametricStudy(driver="scipy").run(m_L=[100.0, 200.0], p=[0.3e6])
@@ -0,0 +1,64 @@
+# --- Python 3.8 ---
+"""
+@File : test_surrogate.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : SurrogateModel errors on held-out points against its tolerance, and the spot checks that tighten it
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import equations
+from surrogate import SurrogateModel
+
+
+def batches(rng, n_batches, size, t_range):
+    for _ in range(n_batches):
+        yield np.column_stack((rng.uniform(0.5, 5.0, size), rng.uniform(*t_range, size)))
+
+
+@pytest.mark.parametrize(
+    "output, tol, t_range, n_sigma",
+    [
+        ("m_s", 10.0, (1e-3, 0.05), 3.0),
+        ("m01", 1.0, (1e-3, 0.05), 3.0),
+        ("m_s", 0.5, (1e-4, 0.01), 3.0),
+        # overconfident: the checks have to carry the tolerance
+        ("m_s", 10.0, (1e-3, 0.05), 0.1),
+    ],
+)
+def test_held_out_error_within_tolerance(output, tol, t_range, n_sigma):
+    rng = np.random.default_rng(0)
+    model = SurrogateModel(equations.stage, ("L", "t"), output, tol=tol, n_sigma=n_sigma, seed=0)
+    for x in batches(rng, 10, 5000, t_range):
+        model.evaluate(x)
+
+    x = next(batches(np.random.default_rng(1), 1, 20000, t_range))
+    y, err = model.evaluate(x)
+    assert np.max(np.abs(y - model.exact(x))) <= tol
+    assert np.all(err <= tol)
+    # the surrogate is doing the work
+    assert model.exact_fraction < 0.2
+
+
+def test_missed_check_tightens_and_trains():
+    model = SurrogateModel(equations.stage, ("L", "t"), "m_s", tol=10.0, seed=0)
+    for x in batches(np.random.default_rng(0), 3, 5000, (1e-3, 0.05)):
+        model.evaluate(x)
+    n_sigma, n_train = model.n_sigma, model.x_train.shape[0]
+
+    # the fitted surrogate is now 20 kg off everywhere
+    stage = model.func
+    model.func = lambda **kwargs: stage(**kwargs)["m_s"] + 20.0
+    x = next(batches(np.random.default_rng(1), 1, 5000, (1e-3, 0.05)))
+    y, err = model.evaluate(x)
+
+    assert model.n_sigma > n_sigma
+    assert model.x_train.shape[0] > n_train
+    # with the new n_sigma nothing is trusted to the surrogate
+    assert np.all(err == 0.0)
+    assert y == pytest.approx(model.exact(x))
@@ -0,0 +1,50 @@
+# --- Python 3.8 ---
+"""
+@File : test_sweep.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : Chunked and disk-backed sweeps against one in-memory evaluation of model.mass_ratio
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import sweep
+from model import mass_ratio
+
+AXES = {"L1": np.linspace(1.0, 8.0, 23), "t2": np.linspace(0.003, 0.01, 5), "L2": np.linspace(1.0, 3.0, 17)}
+
+
+def test_chunked_memmap_sweep_matches_in_memory(tmp_path):
+    whole = sweep.sweep(**AXES, t1=0.008)
+    # a budget of a few points per chunk, so chunks straddle every grid dimension
+    chunked = sweep.sweep(memory_budget=7 * sweep.BYTES_PER_POINT, path=str(tmp_path), **AXES, t1=0.008)
+
+    assert isinstance(chunked.values, np.memmap) and chunked.dims == ("L1", "t2", "L2")
+    assert np.array_equal(chunked.values, whole.values)
+
+    L1, t2, L2 = np.meshgrid(*AXES.values(), indexing="ij")
+    assert np.array_equal(whole.values, mass_ratio(L1, L2, t1=0.008, t2=t2))
+
+    reloaded = sweep.load_sweep(str(tmp_path))
+    assert np.array_equal(reloaded.values, whole.values)
+    assert reloaded.fixed == {"t1": 0.008}
+    assert reloaded.argmin() == whole.argmin()
+
+
+def test_sel_and_argmin():
+    res = sweep.sweep(**AXES)
+    cut = res.sel(t2=0.0051)
+    assert cut.dims == ("L1", "L2") and cut.fixed["t2"] == pytest.approx(AXES["t2"][1])
+    assert np.array_equal(cut.values, res.values[:, 1, :])
+
+    best = res.argmin()
+    assert mass_ratio(**best) == np.min(res.values)
+
+
+def test_unknown_axis():
+    with pytest.raises(ValueError, match="Unknown sweep axis"):
+        sweep.sweep(L1=1.0, L2=[1.0, 2.0], L3=[1.0])
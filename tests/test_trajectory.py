@@ -0,0 +1,51 @@
+# --- Python 3.8 ---
+"""
+@File : test_trajectory.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : DeltaV partials against complex step, and its g0 kept apart from the load factor of con2
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+import pytest
+from openmdao.utils.assert_utils import assert_check_partials
+
+# --- Extension modules ---
+import constants as c
+import trajectory
+
+
+@pytest.mark.parametrize("n_stages, vec_size", [(1, 1), (3, 1), (3, 4)])
+def test_delta_v_partials(n_stages, vec_size):
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("dv_cmp", trajectory.DeltaV(n_stages=n_stages, vec_size=vec_size), promotes=["*"])
+    prob.setup(force_alloc_complex=True)
+    rng = np.random.default_rng(0)
+    for i in range(1, n_stages + 1):
+        m0 = rng.uniform(1e3, 1e5, vec_size)
+        prob.set_val(f"stage{i}_m0", m0)
+        prob.set_val(f"stage{i}_m_p", rng.uniform(0.5, 0.95, vec_size) * m0)
+    prob.set_val("isp", rng.uniform(250.0, 350.0, vec_size))
+    prob.run_model()
+    assert_check_partials(prob.check_partials(method="cs", out_stream=None), atol=1e-8, rtol=1e-8)
+
+
+def test_load_factor_does_not_change_isp_gravity():
+    prob = om.Problem(reports=False)
+    prob.model = trajectory.VehicleStage()
+    prob.setup()
+    prob.set_val("L", 2.0)
+    prob.set_val("t", 1e-3)
+    prob.run_model()
+    dv, con2 = prob.get_val("dv")[0], prob.get_val("con2")[0]
+    assert dv == pytest.approx(trajectory.rocket_delta_v(prob.get_val("m01"), prob.get_val("m_p"))[0])
+
+    # a stage loaded at 3 g still burns its propellant at the same specific impulse
+    prob.set_val("g", 3 * c.g0)
+    prob.run_model()
+    assert prob.get_val("dv")[0] == dv
+    assert prob.get_val("con2")[0] != con2
+    assert prob.get_val("g0")[0] == c.g0
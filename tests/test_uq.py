@@ -0,0 +1,63 @@
+# --- Python 3.8 ---
+"""
+@File : test_uq.py
+@Time : 2021/05/05
+@Author : Peter Atma
+@Desc : Streaming statistics and quantiles of uq.py on split batches against numpy on the whole sample
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import pytest
+
+# --- Extension modules ---
+import uq
+
+
+def sample():
+    # batches of uneven size drifting upwards, so the histogram has to grow both ways
+    rng = np.random.default_rng(0)
+    batches = [rng.normal(loc, scale, size) for loc, scale, size in ((0.0, 1.0, 1), (5.0, 2.0, 997), (-3.0, 0.1, 5000))]
+    batches += [rng.lognormal(2.0, 0.5, 20000)]
+    return batches, np.concatenate(batches)
+
+
+def test_merged_running_stats_match_numpy():
+    batches, x = sample()
+    # two streams over alternate batches, merged
+    first, second = uq.RunningStats(), uq.RunningStats()
+    for i, batch in enumerate(batches):
+        (first if i % 2 else second).update(batch)
+    first.merge(second)
+
+    assert first.n == x.size
+    assert first.mean == pytest.approx(np.mean(x), rel=1e-12)
+    assert first.var == pytest.approx(np.var(x, ddof=1), rel=1e-12)
+    assert (first.min, first.max) == (np.min(x), np.max(x))
+
+
+def test_histogram_quantiles_match_numpy():
+    batches, x = sample()
+    hist = uq.StreamingHistogram(bins=1024)
+    for batch in batches:
+        hist.update(batch)
+
+    q = np.array([0.001, 0.01, 0.25, 0.5, 0.75, 0.99, 0.999])
+    assert hist.counts.sum() == x.size
+    assert np.abs(hist.quantile(q) - np.quantile(x, q)).max() <= hist.width
+
+
+def test_nonfinite_values_are_counted_not_binned():
+    x = np.array([1.0, np.nan, 2.0, np.inf, -np.inf, 3.0])
+    stats = uq.RunningStats()
+    hist = uq.StreamingHistogram(bins=64)
+    for batch in (x, np.array([np.nan])):
+        stats.update(batch)
+        hist.update(batch)
+
+    assert (stats.n, stats.n_nonfinite) == (3, 4)
+    assert (stats.mean, stats.var) == (2.0, 1.0)
+    assert (hist.counts.sum(), hist.n_nonfinite) == (3, 4)
+    assert np.isfinite(hist.width)
+    assert hist.quantile(0.5) == pytest.approx(2.0, abs=hist.width)
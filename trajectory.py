@@ -0,0 +1,252 @@
+# --- Python 3.8 ---
+"""
+@File : trajectory.py
+@Time : 2021/04/30
+@Author : Peter Atma
+@Desc : Rocket-equation delta-v and a lockstep vertical-ascent integrator for sized stages
+"""
+
+# --- Standard Python modules ---
+# --- External Python modules ---
+import numpy as np
+import openmdao.api as om
+
+# --- Extension modules ---
+import constants as c
+import components
+
+# --- Ascent ---
+TW = 1.5  # lift-off thrust to weight ratio
+CD = 0.5  # drag coefficient on the tank cross-section
+RHO_SL = 1.225  # sea-level air density, kg/m**3
+H_SCALE = 8500.0  # atmosphere scale height, m
+
+
+def rocket_delta_v(m0, m_p, isp=c.isp_rp1, g=c.g0):
+    """Ideal delta-v of a stage burning m_p of its initial mass m0. All arguments broadcast."""
+    return isp * g * np.log(m0 / (m0 - m_p))
+
+
+def integrate_ascent(m0, m_p, isp=c.isp_rp1, tw=TW, R=c.R, cd=CD, n_steps=200, g=c.g0):
+    """
+    Vertical ascent of many vehicles at once under constant thrust tw * m0 * g,
+    gravity and exponential-atmosphere drag, until burnout. Each vehicle's
+    burn is cut into the same number of steps (Heun's method), so all
+    vehicles advance in lockstep as arrays. Complex inputs are carried
+    through for complex-step derivatives.
+
+    Returns burnout velocity and altitude and the gravity and drag losses.
+    """
+    m0, m_p, isp, tw, R, cd = np.broadcast_arrays(*(np.asarray(x) for x in (m0, m_p, isp, tw, R, cd)))
+    thrust = tw * m0 * g
+    mdot = thrust / (isp * g)
+    dt = m_p / mdot / n_steps
+    drag_k = 0.5 * cd * np.pi * R ** 2
+
+    def forces(time, h, v):
+        m = m0 - mdot * time
+        drag = drag_k * RHO_SL * np.exp(-h / H_SCALE) * v * v
+        return (thrust - drag) / m - g, drag / m
+
+    h = np.zeros_like(dt)
+    v = np.zeros_like(dt)
+    loss_drag = np.zeros_like(dt)
+    for k in range(n_steps):
+        time = k * dt
+        a1, d1 = forces(time, h, v)
+        a2, d2 = forces(time + dt, h + dt * v, v + dt * a1)
+        h = h + 0.5 * dt * (v + v + dt * a1)
+        v = v + 0.5 * dt * (a1 + a2)
+        loss_drag = loss_drag + 0.5 * dt * (d1 + d2)
+
+    return {"v_bo": v, "h_bo": h, "loss_gravity": g * n_steps * dt, "loss_drag": loss_drag}
+
+
+class DeltaV(om.ExplicitComponent):
+    """
+    Ideal delta-v of a stack of stages from the rocket equation. Stage i
+    burns stage<i>_m_p of its initial mass stage<i>_m0, e.g. m_p and m0 of
+    multistage.Stage, or m_p and m01 of components.StageMass for one stage.
+    """
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of vehicle designs evaluated per call")
+        self.options.declare("n_stages", types=int, default=1, desc="Number of stages")
+
+    def setup(self):
+        n = self.options["vec_size"]
+
+        # --- Inputs ---
+        for i in range(1, self.options["n_stages"] + 1):
+            self.add_input(f"stage{i}_m0", val=1000.0, shape=n, units="kg")
+            self.add_input(f"stage{i}_m_p", val=900.0, shape=n, units="kg")
+        self.add_input("isp", val=c.isp_rp1, shape=n, units="s")
+        self.add_input("g0", val=c.g0, shape=n, units="m/s**2")  # standard gravity of the specific impulse
+
+        # --- Outputs ---
+        self.add_output("dv", shape=n, units="m/s")
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        ar = np.arange(self.options["vec_size"])
+        self.declare_partials("dv", "*", rows=ar, cols=ar)
+
+    def compute(self, inputs, outputs):
+        dv = 0.0
+        for i in range(1, self.options["n_stages"] + 1):
+            dv = dv + rocket_delta_v(inputs[f"stage{i}_m0"], inputs[f"stage{i}_m_p"], inputs["isp"], inputs["g0"])
+        outputs["dv"] = dv
+
+    def compute_partials(self, inputs, partials):
+        isp = inputs["isp"]
+        g = inputs["g0"]
+
+        log_sum = 0.0
+        for i in range(1, self.options["n_stages"] + 1):
+            m0 = inputs[f"stage{i}_m0"]
+            m_b = m0 - inputs[f"stage{i}_m_p"]  # burnout mass
+
+            partials["dv", f"stage{i}_m0"] = isp * g * (1 / m0 - 1 / m_b)
+            partials["dv", f"stage{i}_m_p"] = isp * g / m_b
+            log_sum = log_sum + np.log(m0 / m_b)
+
+        partials["dv", "isp"] = g * log_sum
+        partials["dv", "g0"] = isp * log_sum
+
+
+class Ascent(om.ExplicitComponent):
+    """
+    Burnout state of a vertical single-stage ascent (integrate_ascent) and
+    the delta-v lost to gravity and drag. Every vehicle only depends on
+    its own inputs, so the complex-step partials are colored: one
+    integration per input, however many vehicles.
+    """
+
+    def initialize(self):
+        self.options.declare("vec_size", types=int, default=1, desc="Number of vehicle designs evaluated per call")
+        self.options.declare("n_steps", types=int, default=200, desc="Integration steps per burn")
+
+    def setup(self):
+        n = self.options["vec_size"]
+
+        # --- Inputs ---
+        self.add_input("m0", val=1000.0, shape=n, units="kg")
+        self.add_input("m_p", val=900.0, shape=n, units="kg")
+        self.add_input("isp", val=c.isp_rp1, shape=n, units="s")
+        self.add_input("tw", val=TW, shape=n)
+        self.add_input("R", val=c.R, shape=n, units="m")
+        self.add_input("cd", val=CD, shape=n)
+
+        # --- Outputs ---
+        self.add_output("v_bo", shape=n, units="m/s")
+        self.add_output("h_bo", shape=n, units="m")
+        self.add_output("dv_loss", shape=n, units="m/s")
+
+    def setup_partials(self):
+        # --- Derivatives ---
+        self.declare_partials("*", "*", method="cs")
+        if self.options["vec_size"] > 1:
+            self.declare_coloring(wrt="*", method="cs", show_summary=False)
+
+    def compute(self, inputs, outputs):
+        names = ("m0", "m_p", "isp", "tw", "R", "cd")
+        res = integrate_ascent(*(inputs[name] for name in names), n_steps=self.options["n_steps"])
+
+        outputs["v_bo"] = res["v_bo"]
+        outputs["h_bo"] = res["h_bo"]
+        outputs["dv_loss"] = res["loss_gravity"] + res["loss_drag"]
+
+
+class VehicleStage(components.OneStage):
+    """
+    components.OneStage with the delta-v it delivers: the rocket-equation
+    dv and, with ``ascent``, the burnout velocity v_bo of a vertical ascent
+    with gravity and drag losses.
+
+    The dv takes the standard gravity of the specific impulse as g0, apart
+    from the g of con2, the acceleration the stage is loaded with.
+    """
+
+    def initialize(self):
+        super().initialize()
+        self.options["outputs"] = ("m01", "m_p")
+        self.options.declare("ascent", types=bool, default=False, desc="Integrate the ascent for v_bo")
+
+    def setup(self):
+        super().setup()
+        n = self.options["vec_size"]
+
+        self.add_subsystem(
+            "dv_cmp",
+            DeltaV(vec_size=n),
+            promotes_inputs=[("stage1_m0", "m01"), ("stage1_m_p", "m_p"), "isp", "g0"],
+            promotes_outputs=["dv"],
+        )
+        if self.options["ascent"]:
+            self.add_subsystem(
+                "ascent_cmp",
+                Ascent(vec_size=n),
+                promotes_inputs=[("m0", "m01"), "m_p", "isp", "tw", "R", "cd"],
+                promotes_outputs=["v_bo", "h_bo", "dv_loss"],
+            )
+            self.set_input_defaults("tw", np.full(n, TW))
+            self.set_input_defaults("cd", np.full(n, CD))
+        self.set_input_defaults("isp", np.full(n, c.isp_rp1), units="s")
+        self.set_input_defaults("g0", np.full(n, c.g0), units="m/s**2")
+
+
+def build_problem(driver=None, dv_target=6000.0, ascent=False, method=None):
+    """
+    Lightest stage (m01) meeting con1-con3 that delivers ``dv_target``: the
+    rocket-equation dv, or with ``ascent`` the burnout velocity v_bo.
+    """
+    prob = om.Problem(reports=False)
+    prob.model = VehicleStage(ascent=ascent)
+
+    if driver is None:
+        driver = om.pyOptSparseDriver()
+        driver.options["optimizer"] = "SLSQP"
+    prob.driver = driver
+
+    prob.model.add_design_var("L", lower=0.5, upper=50.0)
+    prob.model.add_design_var("t", lower=1e-5, upper=0.4)
+    prob.model.add_objective("m01", ref=1e3)
+    for name in ("con1", "con2", "con3"):
+        prob.model.add_constraint(name, upper=0.0, ref=components.CONSTRAINT_REFS[name])
+    prob.model.add_constraint("v_bo" if ascent else "dv", lower=dv_target, ref=dv_target)
+
+    if method is not None:
+        prob.model.approx_totals(method=method)
+
+    return prob
+
+
+if __name__ == "__main__":
+    import time
+
+    import equations
+    from multistart import make_driver
+
+    # lockstep integration of many vehicles
+    n = 10000
+    L = np.linspace(0.5, 20.0, n)
+    stage = equations.stage(L, 5e-4)
+    start = time.perf_counter()
+    res = integrate_ascent(stage["m01"], stage["m_p"])
+    elapsed = time.perf_counter() - start
+    print(f"{n} ascents in {elapsed * 1e3:.1f} ms, {elapsed / n * 1e6:.2f} us per vehicle")
+    print(f"ideal dv {rocket_delta_v(stage['m01'][-1], stage['m_p'][-1]):.0f} m/s, v_bo {res['v_bo'][-1]:.0f} m/s")
+
+    for ascent, target in ((False, 7000.0), (True, 4500.0)):
+        prob = build_problem(make_driver("scipy"), dv_target=target, ascent=ascent)
+        prob.setup(force_alloc_complex=ascent)
+        prob.set_solver_print(level=0)
+        prob.set_val("L", 2.0)
+        prob.set_val("t", 1e-3)
+        prob.run_driver()
+
+        name = "v_bo" if ascent else "dv"
+        print(
+            f"{name} >= {target:.0f} m/s: L = {prob.get_val('L')[0]:.4f}, t = {prob.get_val('t')[0]:.6f}, "
+            f"m01 = {prob.get_val('m01')[0]:.1f} kg, {name} = {prob.get_val(name)[0]:.1f} m/s"
+        )
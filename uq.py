@@ -0,0 +1,267 @@
+# --- Python 3.8 ---
+"""
+@File : uq.py
+@Time : 2021/04/21
+@Author : Peter Atma
+@Desc : Monte Carlo propagation of material and chamber scatter through the stage sizing model
+"""
+
+# --- Standard Python modules ---
+import inspect
+import time
+
+# --- External Python modules ---
+import numpy as np
+from scipy.special import ndtr
+
+# --- Extension modules ---
+import equations
+
+
+class Normal:
+    def __init__(self, mean, std):
+        self.mean = mean
+        self.std = std
+
+    def sample(self, rng, n):
+        return rng.normal(self.mean, self.std, n)
+
+    def transform(self, z):
+        # map standard normal samples onto this distribution
+        return self.mean + self.std * z
+
+
+class Uniform:
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng, n):
+        return rng.uniform(self.low, self.high, n)
+
+    def transform(self, z):
+        return self.low + (self.high - self.low) * ndtr(z)
+
+
+class LogNormal:
+    """Log-normal with the given mean and coefficient of variation, for strictly positive inputs."""
+
+    def __init__(self, mean, cov):
+        self.sigma = np.sqrt(np.log1p(cov ** 2))
+        self.mu = np.log(mean) - 0.5 * self.sigma ** 2
+
+    def sample(self, rng, n):
+        return rng.lognormal(self.mu, self.sigma, n)
+
+    def transform(self, z):
+        return np.exp(self.mu + self.sigma * z)
+
+
+# Manufacturing scatter about the nominal stage inputs
+DISTRIBUTIONS = {
+    "rho_s": Normal(8000, 80),
+    "s_t": LogNormal(515e6, 0.03),
+    "s_y": LogNormal(332e6, 0.03),
+    "p": Normal(0.36e6, 0.01e6),
+    "OF": Normal(2.56, 0.03),
+}
+
+# Outputs evaluated per sample: name -> vectorized equations function, stage outputs from equations.stage
+OUTPUTS = {
+    "m01": equations.stage,
+    "con1": equations.con1,
+    "con2": equations.con2,
+    "con3": equations.con3,
+}
+
+CONSTRAINTS = ("con1", "con2", "con3")
+
+
+class RunningStats:
+    """
+    Count, mean, variance and extremes of a stream, updated a batch at a
+    time. NaN and infinite values are left out and counted in n_nonfinite.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.n_nonfinite = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, x):
+        x = np.ravel(x)
+        finite = np.isfinite(x)
+        other = RunningStats()
+        other.n_nonfinite = x.size - int(np.count_nonzero(finite))
+        x = x[finite]
+        if x.size:
+            other.n = x.size
+            other.mean = float(np.mean(x))
+            other.m2 = float(np.sum(np.square(x - other.mean)))
+            other.min = float(np.min(x))
+            other.max = float(np.max(x))
+        self.merge(other)
+
+    def merge(self, other):
+        # pairwise update of Chan et al., exact for any split of the stream
+        n = self.n + other.n
+        self.n_nonfinite += other.n_nonfinite
+        if other.n == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta ** 2 * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+
+class StreamingHistogram:
+    """
+    Equal-width histogram whose range doubles, merging bin pairs, whenever
+    a sample falls outside it. Quantiles are interpolated within a bin, so
+    they are good to about (max - min) / bins. NaN and infinite values
+    are left out and counted in n_nonfinite.
+    """
+
+    def __init__(self, bins=4096):
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.n_nonfinite = 0
+        self.lo = None
+        self.width = None
+
+    @property
+    def hi(self):
+        return self.lo + self.bins * self.width
+
+    def _grow(self, downward):
+        merged = self.counts.reshape(-1, 2).sum(axis=1)
+        self.counts = np.zeros_like(self.counts)
+        if downward:
+            self.counts[self.bins // 2 :] = merged
+            self.lo -= self.bins * self.width
+        else:
+            self.counts[: self.bins // 2] = merged
+        self.width *= 2
+
+    def update(self, x):
+        x = np.ravel(x)
+        finite = np.isfinite(x)
+        self.n_nonfinite += x.size - int(np.count_nonzero(finite))
+        x = x[finite]
+        if x.size == 0:
+            return
+
+        x_min, x_max = float(np.min(x)), float(np.max(x))
+        if self.lo is None:
+            span = x_max - x_min or max(abs(x_min), 1.0) * 1e-6
+            self.lo = x_min - 0.5 * span
+            self.width = 2 * span / self.bins
+        while x_min < self.lo:
+            self._grow(downward=True)
+        while x_max >= self.hi:
+            self._grow(downward=False)
+
+        idx = ((x - self.lo) / self.width).astype(np.int64)
+        self.counts += np.bincount(np.clip(idx, 0, self.bins - 1), minlength=self.bins)
+
+    def quantile(self, q):
+        cdf = np.cumsum(self.counts)
+        target = np.asarray(q, dtype=float) * cdf[-1]
+        i = np.minimum(np.searchsorted(cdf, target, side="left"), self.bins - 1)
+        below = np.where(i > 0, cdf[i - 1], 0)
+        frac = (target - below) / np.maximum(self.counts[i], 1)
+        return self.lo + (i + frac) * self.width
+
+
+class MonteCarlo:
+    """
+    Sample ``distributions`` (names of stage inputs; defaults to
+    DISTRIBUTIONS) at the design (L, t) and push the samples through the
+    vectorized sizing equations in batches of ``batch_size``, every other
+    input at its nominal value. Only running statistics are kept, so
+    memory does not grow with the sample count.
+    """
+
+    def __init__(self, L, t, distributions=None, batch_size=2 ** 18, bins=4096, seed=None):
+        self.distributions = DISTRIBUTIONS if distributions is None else distributions
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+
+        self.design = {"L": np.asarray(L, dtype=float), "t": np.asarray(t, dtype=float)}
+        self.inputs = {output: set(inspect.signature(func).parameters) for output, func in OUTPUTS.items()}
+
+        self.stats = {name: RunningStats() for name in OUTPUTS}
+        self.hists = {name: StreamingHistogram(bins) for name in OUTPUTS}
+        self.violations = dict.fromkeys(CONSTRAINTS + ("any",), 0)
+
+    def _batch(self, n):
+        samples = {name: dist.sample(self.rng, n) for name, dist in self.distributions.items()}
+        failed = np.zeros(n, dtype=bool)
+        values = dict(self.design, **samples)
+        for output, func in OUTPUTS.items():
+            y = func(**{name: val for name, val in values.items() if name in self.inputs[output]})
+            y = np.broadcast_to(y[output] if isinstance(y, dict) else y, n)
+
+            self.stats[output].update(y)
+            self.hists[output].update(y)
+            if output in CONSTRAINTS:
+                violated = y > 0.0
+                self.violations[output] += int(np.count_nonzero(violated))
+                failed |= violated
+        self.violations["any"] += int(np.count_nonzero(failed))
+
+    def run(self, n_samples):
+        """Add ``n_samples`` samples to the running statistics and return the summary."""
+        done = 0
+        while done < n_samples:
+            n = min(self.batch_size, n_samples - done)
+            self._batch(n)
+            done += n
+        return self.summary()
+
+    def summary(self, quantiles=(0.01, 0.05, 0.5, 0.95, 0.99)):
+        n = self.stats["m01"].n
+        res = {"n": n}
+        for name, stats in self.stats.items():
+            res[name] = {
+                "mean": stats.mean,
+                "std": stats.std,
+                "min": stats.min,
+                "max": stats.max,
+                "n_nonfinite": stats.n_nonfinite,
+                "quantiles": dict(zip(quantiles, self.hists[name].quantile(quantiles))),
+            }
+        res["p_fail"] = {}
+        for name, count in self.violations.items():
+            p_fail = count / n
+            # binomial standard error of the estimate
+            res["p_fail"][name] = (p_fail, np.sqrt(p_fail * (1 - p_fail) / n))
+        return res
+
+
+if __name__ == "__main__":
+    mc = MonteCarlo(L=2.0, t=0.0004, seed=0)
+
+    start = time.perf_counter()
+    res = mc.run(10 ** 7)
+    print(f"{res['n']} samples in {time.perf_counter() - start:.2f} s")
+
+    for name in OUTPUTS:
+        q = res[name]["quantiles"]
+        mean, std = res[name]["mean"], res[name]["std"]
+        print(f"{name:<5} mean {mean:12.5g} std {std:12.5g}  p5 {q[0.05]:12.5g} p95 {q[0.95]:12.5g}")
+    for name, (p_fail, err) in res["p_fail"].items():
+        print(f"P({name} > 0) = {p_fail:.5f} +- {err:.5f}")